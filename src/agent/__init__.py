@@ -3,7 +3,7 @@ from .tools.locate_restaurant import LocateRestaurantTool
 from .tools.restaurant_menu import RestaurantMenuTool
 from .tools.restaurant_recommendations import RestaurantRecommendationsTool
 from .tools.find_menu_on_doordash import FindMenuOnDeliverySiteTool
-from .tools.normalize_menu import normalize_with_llm
+from .tools.normalize_menu import normalize_with_llm, normalize_menu_parallel
 
 __all__ = [
     "BrowserTool",
@@ -11,5 +11,6 @@ __all__ = [
     "RestaurantMenuTool",
     "RestaurantRecommendationsTool",
     "FindMenuOnDeliverySiteTool",
-    "normalize_with_llm"
+    "normalize_with_llm",
+    "normalize_menu_parallel"
 ]
@@ -1,5 +1,4 @@
-import autogen
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 import os
 import re
 from dotenv import load_dotenv
@@ -7,6 +6,7 @@ import logging
 from datetime import datetime
 import json
 import sys
+import threading
 import src.agent.agent
 sys.stdout.reconfigure(encoding='utf-8')
 
@@ -14,16 +14,30 @@ from .tools.locate_restaurant import LocateRestaurantTool
 from .tools.restaurant_menu import RestaurantMenuTool
 from .tools.restaurant_recommendations import RestaurantRecommendationsTool
 from .tools.find_menu_on_doordash import FindMenuOnDeliverySiteTool
+from .tools.async_adapters import AsyncToolAdapter, run_blocking, run_in_background, first_successful
+from .llm_cache import LLMResponseCache, get_llm_cache
+from .llm_gateway import LLMGateway, get_llm_gateway
+from .history import ConversationHistory
+from .intent_classifier import IntentClassifier, get_intent_classifier, is_context_dependent
+from .turn_analysis import (TurnAnalysis, TURN_ANALYSIS_FORMAT, turn_analysis_prompt, parse_turn_analysis,
+                            extract_preferences, states_unknown_preference)
 
 # Load environment variables
 load_dotenv()
 api_key = os.getenv("OPENAI_API_KEY")
+# How long the website gets to produce a menu before DoorDash is tried alongside it
+MENU_RACE_HEAD_START_SECONDS = float(os.getenv("MENU_RACE_HEAD_START", "8"))
 
 class RestaurantAgent:
-    def __init__(self, user_id: str):
+    def __init__(self, user_id: str, llm_cache: Optional[LLMResponseCache] = None,
+                 intent_classifier: Optional[IntentClassifier] = None, llm: Optional[LLMGateway] = None):
         self.user_id = user_id
+        self.llm_cache = llm_cache or get_llm_cache()
+        self.llm = llm or get_llm_gateway()
+        self.intent_classifier = intent_classifier or get_intent_classifier()
         self.setup_logging()
-        self.setup_llm()
+        # Round-indexed, token-windowed chat history; chat_history below is its message list
+        self.history = ConversationHistory(summarizer=self._summarize_history)
         self.conversation_context = {
             "current_restaurant": None,
             "current_location": None,
@@ -31,8 +45,9 @@ class RestaurantAgent:
             "health_data": None,
             "budget": None,
             "food_preference": None,
-            "chat_history": [],
-            "current_round": 0
+            "contextual_preferences": [],  # preferences stated in the current round
+            "chat_history": self.history.messages,
+            "current_round": self.history.current_round
         }
 
 
@@ -41,6 +56,11 @@ class RestaurantAgent:
         self.delivery_menu_tool = FindMenuOnDeliverySiteTool()
         self.recommendations_tool = RestaurantRecommendationsTool(agent=self)
 
+        # Coroutine views of the blocking tools, used by the async API
+        self.async_location_search_tool = AsyncToolAdapter(self.location_search_tool)
+        self.async_menu_tool = AsyncToolAdapter(self.menu_tool)
+        self.async_delivery_menu_tool = AsyncToolAdapter(self.delivery_menu_tool)
+
         self.action_registry = {}
         self._register_default_actions()
 
@@ -137,6 +157,36 @@ class RestaurantAgent:
         self.conversation_context["restaurant_url"] = restaurant_info.get("url", "")
         return self._handle_get_menu()  # proceed to fetch menu + recommend
 
+    @staticmethod
+    def _is_menu_result(result) -> bool:
+        return isinstance(result, dict) and result.get("status") == "success" and bool(result.get("menu_items"))
+
+    def _menu_found_response(self, restaurant: str, result: Dict, source: str) -> Dict:
+        """Store a fetched menu in the context and build the reply for it"""
+        self.conversation_context["menu_items"] = result["menu_items"]
+        menu_items_count = len(result["menu_items"])
+
+        if source == "doordash":
+            self.logger.info(f"[DOORDASH] Stored {menu_items_count} items into context")
+            # No longer automatically chain to recommendations
+            success_message = f"I found the menu for {restaurant} on DoorDash with {menu_items_count} items. Would you like me to recommend some dishes based on your preferences?"
+        else:
+            self.logger.info(f"Stored {menu_items_count} items into context")
+            if self.conversation_context["current_location"] and not self.conversation_context.get("meal_time"):
+                return {
+                    "status": "user_select_meal_time",
+                    "options": ["Breakfast", "Lunch", "Dinner"],
+                    "message": "Please select a meal time."
+                }
+            # No longer automatically chain to recommendations
+            success_message = f"I found the menu for {restaurant} with {menu_items_count} items. Would you like me to recommend some dishes based on your preferences?"
+
+        return {
+            "status": "success",
+            "message": success_message,
+            "menu_items": result["menu_items"]
+        }
+
     def _handle_get_menu(self) -> Dict:
         try:
             restaurant = self.conversation_context.get("current_restaurant", "")
@@ -150,24 +200,8 @@ class RestaurantAgent:
                 zipcode=zipcode
             )
 
-            if result.get("status") == "success" and result.get("menu_items"):
-                self.conversation_context["menu_items"] = result["menu_items"]
-                self.logger.info(f"Stored {len(result['menu_items'])} items into context")
-                if self.conversation_context["current_location"] and not self.conversation_context.get("meal_time"):
-                    return {
-                        "status": "user_select_meal_time",
-                        "options": ["Breakfast", "Lunch", "Dinner"],
-                        "message": "Please select a meal time."
-                    }    
-                # No longer automatically chain to recommendations
-                menu_items_count = len(result["menu_items"])
-                success_message = f"I found the menu for {restaurant} with {menu_items_count} items. Would you like me to recommend some dishes based on your preferences?"
-                
-                return {
-                    "status": "success",
-                    "message": success_message,
-                    "menu_items": result["menu_items"]
-                }
+            if self._is_menu_result(result):
+                return self._menu_found_response(restaurant, result, source="website")
 
             self.logger.info("Website scrape failed or incomplete — trying DoorDash...")
             dd_result = self.delivery_menu_tool.find_doordash_menu(restaurant, zipcode)
@@ -177,21 +211,11 @@ class RestaurantAgent:
                 fallback_result = self.menu_tool.get_menu(
                     restaurant,
                     restaurant_url=dd_result.get("url"),
-                    zipcode=zipcode
+                    zipcode=zipcode,
+                    source="doordash"
                 )
-                if fallback_result.get("status") == "success" and fallback_result.get("menu_items"):
-                    self.conversation_context["menu_items"] = fallback_result["menu_items"]
-                    self.logger.info(f"[DOORDASH] Stored {len(fallback_result['menu_items'])} items into context")
-                    
-                    # No longer automatically chain to recommendations
-                    menu_items_count = len(fallback_result["menu_items"])
-                    success_message = f"I found the menu for {restaurant} on DoorDash with {menu_items_count} items. Would you like me to recommend some dishes based on your preferences?"
-                    
-                    return {
-                        "status": "success",
-                        "message": success_message,
-                        "menu_items": fallback_result["menu_items"]
-                    }
+                if self._is_menu_result(fallback_result):
+                    return self._menu_found_response(restaurant, fallback_result, source="doordash")
 
             return {
                 "status": "request_upload",
@@ -207,7 +231,7 @@ class RestaurantAgent:
                 "menu_items": []
             }
 
-    def _handle_recommendations(self) -> Dict:
+    def _handle_recommendations(self, stream: bool = False) -> Dict:
         try:
             menu_items = self.conversation_context.get("menu_items", [])
             self.logger.info(f"Ready to recommend from {len(menu_items)} items")
@@ -229,7 +253,7 @@ class RestaurantAgent:
 
             health_data = self.conversation_context.get("health_data", {})
             budget = self.conversation_context.get("budget")
-            food_preference = self.conversation_context.get("food_preference")
+            food_preference = self._food_preference()
             generate_images = self.conversation_context.get("generate_images", False) # Check if image generation is requested
             
             # Only execute if the user has requested dish images
@@ -243,7 +267,8 @@ class RestaurantAgent:
                     "status": image_result["status"],
                     "message": image_result["message"],
                     "menu_items": [],
-                    "dish_images": image_result.get("dish_images", [])
+                    "dish_images": image_result.get("dish_images", []),
+                    "image_stats": image_result.get("image_stats", {})
                 }
             
             # Normal recommendation process, execute if no image generation requested
@@ -255,17 +280,21 @@ class RestaurantAgent:
                 health_data, 
                 budget,
                 food_preference,
-                debug_prompt=True
+                debug_prompt=True,
+                stream=stream
             )
             if recommendations.get("status") == "success" and recommendations.get("message"):
                 self.conversation_context["last_recommendations"] = recommendations["message"]
 
-            return {
+            result = {
                 "status": recommendations["status"],
                 "message": recommendations["message"],
                 "menu_items": recommendations.get("menu_items", []),
                 "dish_images": []  # Ensure empty list since regular recommendations don't generate images
             }
+            if recommendations.get("stream") is not None:
+                result["stream"] = recommendations["stream"]
+            return result
             
         except Exception as e:
             self.logger.error(f"Error handling recommendations: {str(e)}")
@@ -287,7 +316,7 @@ class RestaurantAgent:
             
             # Get relevant context from the restaurant and conversation
             restaurant = self.conversation_context.get("current_restaurant", "")
-            food_preference = self.conversation_context.get("food_preference", "")
+            food_preference = self._food_preference()
             menu_items = self.conversation_context.get("menu_items", [])
             menu_available = len(menu_items) > 0
             budget = self.conversation_context.get("budget")
@@ -311,7 +340,7 @@ class RestaurantAgent:
             Keep your response friendly and concise.
             """
             
-            response = self.ask_llm(prompt)
+            response = self.ask_llm(prompt, action="general_conversation")
             
             return {
                 "status": "success",
@@ -350,7 +379,7 @@ class RestaurantAgent:
             Keep your response friendly and helpful.
             """
             
-            response = self.ask_llm(prompt)
+            response = self.ask_llm(prompt, action="health_query")
             
             return {
                 "status": "success",
@@ -362,121 +391,134 @@ class RestaurantAgent:
             self.logger.error(f"Error handling health query: {str(e)}")
             return {"status": "error", "message": "I'm sorry, but I could not provide any medical advice. Is there anything else I can help you with?", "menu_items": []}
             
-    def extract_contextual_preferences(self, conversation_history: List[Dict]) -> str:
-        """
-        Extract implicit food preferences based on the current round's conversation history
-        
-        Args:
-            conversation_history: List of conversation messages
-            
-        Returns:
-            str: Extracted food preferences as a comma-separated string
+    def _food_preference(self) -> str:
+        """Saved food preference plus the preferences stated in the current round"""
+        saved = self.conversation_context.get("food_preference") or ""
+        stated = self.conversation_context.get("contextual_preferences") or []
+        if not stated:
+            return saved
+        parts = [saved] if saved and saved != "No Preference" else []
+        return ", ".join(parts + stated)
+
+    def _apply_preferences(self, preferences: List[str]):
+        """Add preferences from the latest message to those of the current round"""
+        stated = self.conversation_context.setdefault("contextual_preferences", [])
+        for preference in preferences:
+            if preference not in stated:
+                stated.append(preference)
+
+    def analyze_turn(self, user_input: str) -> TurnAnalysis:
         """
-        if not conversation_history:
-            return ""
-            
-        # Combine all user messages in the current round
-        combined_messages = " ".join([
-            msg["content"] for msg in conversation_history 
-            if msg["role"] == "user"
-        ])
-        
-        if not combined_messages:
-            return ""
-            
-        # Ask LLM to extract food preferences
-        prompt = f"""
-        Extract food preferences from the following conversation:
-        
-        "{combined_messages}"
-        
-        Return ONLY a comma-separated list of food preferences (ingredients, types of food, dietary preferences).
-        If no preferences are found, return an empty string.
-        Examples: "spicy, chicken, low-calorie" or "vegetarian, no onions, dairy-free"
+        Restaurant, zip code, action and food preferences for one message.
+
+        Answered by the local fast path when it is confident, otherwise by a
+        single structured-output LLM call (one round trip per message).
         """
-        
+        analysis = self._local_turn_analysis(user_input)
+        if analysis is not None:
+            return analysis
+        prompt = turn_analysis_prompt(user_input, self.conversation_context.get("current_restaurant"))
+        history_window = self.history.window()
+        cache_key = self.llm_cache.make_key(self.llm.model, prompt, history_window)
         try:
-            preferences = self.ask_llm(prompt).strip()
-            # Remove any quotes that might be in the response
-            preferences = preferences.replace('"', '').replace("'", "")
-            return preferences
+            content = self.llm_cache.get(cache_key, action="analyze_turn")
+            if content is None:
+                content = self.llm.complete(self.history.build_prompt(prompt), response_format=TURN_ANALYSIS_FORMAT)
+                analysis = parse_turn_analysis(content)
+                self.llm_cache.set(cache_key, content, action="analyze_turn")
+            else:
+                self.logger.info("LLM cache hit for action 'analyze_turn'")
+                analysis = parse_turn_analysis(content)
         except Exception as e:
-            self.logger.error(f"Error extracting contextual preferences: {str(e)}")
-            return ""
+            self.logger.warning(f"Structured turn analysis failed: {e}, falling back to rules")
+            return self._fallback_turn_analysis(user_input)
+        return self._finish_turn_analysis(user_input, analysis)
 
-    def extract_restaurant_info_llm(self, user_input: str) -> tuple[str, str]:
-        prompt = f"""
-        Your task is to extract structured information from user input.
+    def _local_turn_analysis(self, user_input: str) -> Optional[TurnAnalysis]:
+        """Turn analysis from the local classifier, or None when the LLM has to decide"""
+        if is_context_dependent(user_input):
+            # "yes" or "that one" only makes sense next to the previous assistant turn
+            return None
+        local = self.intent_classifier.extract(user_input)
+        if local is None:
+            return None
+        restaurant, zipcode = local
+        if restaurant and zipcode:
+            action = "search_restaurant"
+        else:
+            known_restaurant = restaurant or self.conversation_context.get("current_restaurant")
+            action = self._rule_based_action(user_input, known_restaurant) or self._local_action(user_input, known_restaurant)
+        if not action:
+            return None
+        preferences = extract_preferences(user_input)
+        if states_unknown_preference(user_input, preferences):
+            return None
+        return TurnAnalysis(restaurant=restaurant, zipcode=zipcode, action=action,
+                            preferences=preferences, source="local")
 
-        Input:
-        "{user_input}"
+    def _finish_turn_analysis(self, user_input: str, analysis: TurnAnalysis) -> TurnAnalysis:
+        """Let the keyword rules override the LLM's action, and learn from the LLM's label"""
+        self.intent_classifier.learn(user_input, analysis.action)
+        known_restaurant = analysis.restaurant or self.conversation_context.get("current_restaurant")
+        action = self._rule_based_action(user_input, known_restaurant)
+        if action and action != analysis.action:
+            analysis = analysis.model_copy(update={"action": action})
+        return analysis
 
-        Return ONLY a JSON object in the following format:
-        {{
-            "restaurant": "RESTAURANT_NAME",
-            "zipcode": "ZIPCODE"
-        }}
+    def _fallback_turn_analysis(self, user_input: str) -> TurnAnalysis:
+        restaurant, zipcode = self._regex_restaurant_info(user_input)
+        known_restaurant = restaurant or self.conversation_context.get("current_restaurant")
+        action = self._rule_based_action(user_input, known_restaurant)
+        return TurnAnalysis(restaurant=restaurant, zipcode=zipcode, action=action, source="fallback")
 
-        For restaurant, extract the specific restaurant name.
-        For zipcode, extract a 5-digit US zip code if present.
-        If the user mentions 'eat at' or 'go to' a restaurant, that's likely the restaurant name.
-        If any value is missing, return an empty string for that field.
-        """
-        response = self.ask_llm(prompt)
-        try:
-            parsed = json.loads(response)
-            restaurant = parsed.get("restaurant", "").strip()
-            zipcode = parsed.get("zipcode", "").strip()
-            return restaurant, zipcode
-        except Exception as e:
-            self.logger.warning(f"LLM parsing failed: {e}, fallback to regex")
-            # Try to extract restaurant name
-            restaurant_match = re.search(r"(?:eat|eating|at|go to|visit|find)\s+(?:at\s+)?([A-Za-z0-9\s'&]+?)(?:\s+in|\s+at|\s+near|\s+\d{5}|$)", user_input, re.IGNORECASE)
-            restaurant = restaurant_match.group(1).strip() if restaurant_match else ""
-            
-            # Try to extract zip code
-            zip_match = re.search(r'\b(\d{5})\b', user_input)
-            zipcode = zip_match.group(1) if zip_match else ""
-            
-            self.logger.info(f"Regex extracted: restaurant='{restaurant}', zipcode='{zipcode}'")
-            return restaurant, zipcode
+    def _regex_restaurant_info(self, user_input: str) -> tuple[str, str]:
+        # Try to extract restaurant name
+        restaurant_match = re.search(r"(?:eat|eating|at|go to|visit|find)\s+(?:at\s+)?([A-Za-z0-9\s'&]+?)(?:\s+in|\s+at|\s+near|\s+\d{5}|$)", user_input, re.IGNORECASE)
+        restaurant = restaurant_match.group(1).strip() if restaurant_match else ""
+
+        # Try to extract zip code
+        zip_match = re.search(r'\b(\d{5})\b', user_input)
+        zipcode = zip_match.group(1) if zip_match else ""
+
+        self.logger.info(f"Regex extracted: restaurant='{restaurant}', zipcode='{zipcode}'")
+        return restaurant, zipcode
 
     def start_new_conversation_round(self):
         """Start a new conversation round"""
-        self.conversation_context["current_round"] += 1
+        self.conversation_context["current_round"] = self.history.start_round()
+        self.conversation_context["contextual_preferences"] = []
         self.logger.info(f"Starting new conversation round: {self.conversation_context['current_round']}")
 
     def add_to_chat_history(self, role: str, content: str):
         """Add a message to the chat history"""
-        self.conversation_context["chat_history"].append({
-            "role": role,
-            "content": content,
-            "round": self.conversation_context["current_round"]
-        })
+        self.history.add(role, content)
         self.logger.info(f"Added {role} message to chat history (round {self.conversation_context['current_round']})")
+        if role == "assistant" and self.history.needs_compaction():
+            # Summarize older turns once the reply is out, off the request path
+            run_in_background(self.history.compact)
 
     def get_current_round_history(self) -> List[Dict]:
         """Get chat history for the current round only"""
-        current_round = self.conversation_context["current_round"]
-        return [
-            msg for msg in self.conversation_context["chat_history"] 
-            if msg["round"] == current_round
-        ]
+        return self.history.round_messages()
         
-    def analyze_user_input(self, user_input: str) -> str:
+    def _local_action(self, user_input: str, restaurant: Optional[str] = None) -> Optional[str]:
+        """Action from the local classifier, or None when it is not confident"""
+        action = self.intent_classifier.classify(user_input)
+        if action in ("get_menu", "get_recommendations") and not (restaurant or self.conversation_context.get("current_restaurant")):
+            # Same guard as the keyword rules: these need a restaurant in context
+            return None
+        return action
+
+    def fast_path_stats(self) -> Dict[str, Dict]:
+        """Hit rate of the local extraction/intent fast path"""
+        return self.intent_classifier.stats()
+
+    def _rule_based_action(self, user_input: str, restaurant: Optional[str] = None) -> Optional[str]:
         """
-        Analyze user input intention to determine the most appropriate action 
-        
-        Args:
-            user_input: User message text
-            
-        Returns:
-            str: Suggested action name
+        Keyword rules for the obvious intents; None when the LLM has to decide.
+        `restaurant` overrides the context's current restaurant (e.g. one just extracted).
         """
-        current_history = self.get_current_round_history()
-        restaurant = self.conversation_context.get("current_restaurant")
-        
-        # Basic rule-based analysis first
+        restaurant = restaurant or self.conversation_context.get("current_restaurant")
         lower_input = user_input.lower()
         
         # Check for restaurant search intent
@@ -496,41 +538,78 @@ class RestaurantAgent:
         # Check for health-related queries
         if "health" in lower_input or "calories" in lower_input or "diet" in lower_input or "nutrition" in lower_input:
             return "health_query"
-        
-        # Budget questions now handled by general conversation
-        
-        # If no clear match from rules, ask LLM for classification
-        action_prompt = f"""
-        Classify the following user input into one of these categories:
-        
-        User input: "{user_input}"
-        Current restaurant: {restaurant if restaurant else "None"}
-        
-        Categories:
-        1. search_restaurant - User wants to find or learn about a restaurant
-        2. get_menu - User wants to see a menu for a restaurant
-        3. get_recommendations - User wants food recommendations 
-        4. general_conversation - General chat, questions, or small talk
-        5. health_query - Questions about health aspects of food
-        
-        Return ONLY the category name (e.g., "search_restaurant").
-        """
-        
-        try:
-            # Use a simpler LLM call to avoid recursion
-            action_type = self.ask_llm(action_prompt).strip().lower()
-            
-            # Extract just the action name if there's extra text
-            for action in self.action_registry:
-                if action in action_type:
-                    return action
-                    
-            # Default to general conversation if no match
-            return "general_conversation"
-            
-        except Exception as e:
-            self.logger.error(f"Error analyzing user input: {str(e)}")
-            return "general_conversation"  # Default fallback
+        return None
+
+    def _apply_extracted_info(self, restaurant_name: str, zip_code: str):
+        """Update the context with an extracted restaurant and zip code"""
+        if restaurant_name:
+            prev_restaurant = self.conversation_context.get("current_restaurant", "")
+            if prev_restaurant and prev_restaurant.lower() != restaurant_name.lower():
+                self.logger.info(f" Restaurant changed from '{prev_restaurant}' to '{restaurant_name}', clearing old menu and URL")
+                self.conversation_context["menu_items"] = []
+                self.conversation_context["restaurant_url"] = ""
+            self.conversation_context["current_restaurant"] = restaurant_name.strip()
+            self.logger.info(f"Updated conversation context with restaurant: '{self.conversation_context['current_restaurant']}'")
+
+        if zip_code:
+            self.conversation_context["current_location"] = zip_code
+            self.logger.info(f"Updated conversation context with location: '{self.conversation_context['current_location']}'")
+
+        # Debug log to verify context before search
+        self.logger.info(f"Current context before action: restaurant='{self.conversation_context.get('current_restaurant')}', zip='{self.conversation_context.get('current_location')}'")
+
+    def _search_reply(self, restaurant_name: str, search_result: Dict) -> Dict:
+        """Turn a restaurant search result into the reply for the user"""
+        if search_result.get("status") == "user_select":
+            # Return for user selection
+            self.add_to_chat_history("assistant", search_result.get("message", "Please select a restaurant."))
+            return search_result
+        elif search_result.get("status") == "success":
+            # Remember the name so the local fast path recognizes it next time
+            self.intent_classifier.add_restaurant(restaurant_name)
+            # Success message confirming restaurant was found, but don't chain to menu/recommendations
+            self.logger.info("Search successful, waiting for user's next instruction")
+            confirmation_message = f"I found {restaurant_name}. Would you like to get dish recommendations for this restaurant?"
+            self.add_to_chat_history("assistant", confirmation_message)
+            return {
+                "status": "success",
+                "message": confirmation_message,
+                "url": search_result.get("url", "")
+            }
+        else:
+            # Search failed
+            self.add_to_chat_history("assistant", search_result.get("message", "I couldn't find that restaurant."))
+            return search_result
+
+    def _missing_requirements_response(self, action: str) -> Optional[Dict]:
+        """Return an error reply when an action needs a restaurant or location that is not known yet"""
+        if action == "get_menu" or action == "get_recommendations":
+            if not self.conversation_context.get("current_restaurant"):
+                return {
+                    "status": "error",
+                    "message": "I need to know which restaurant you're interested in first. Could you tell me the name?",
+                    "menu_items": []
+                }
+                
+            # If we're asking for menu or recommendations without location, ask for it
+            if not self.conversation_context.get("current_location"):
+                return {
+                    "status": "error", 
+                    "message": f"I need to know where {self.conversation_context.get('current_restaurant')} is located. Could you provide a zip code?",
+                    "menu_items": []
+                }
+        return None
+
+    def _process_uploaded_menu(self) -> Dict:
+        if not hasattr(self, 'uploaded_menu_data'):
+            return {"status": "error", "message": "No menu data uploaded", "menu_items": []}
+        menu_result = self.menu_tool.get_menu(
+            self.conversation_context.get("current_restaurant", "Unknown Restaurant"),
+            uploaded_menu=self.uploaded_menu_data
+        )
+        if menu_result["status"] == "success":
+            self.conversation_context["menu_items"] = menu_result["menu_items"]
+        return menu_result
 
     def process_input(self, user_input: str) -> Dict:
         try:
@@ -540,82 +619,30 @@ class RestaurantAgent:
             self.add_to_chat_history("user", user_input)
 
             if user_input == "process_uploaded_menu":
-                if not hasattr(self, 'uploaded_menu_data'):
-                    return {"status": "error", "message": "No menu data uploaded", "menu_items": []}
-                menu_result = self.menu_tool.get_menu(
-                    self.conversation_context.get("current_restaurant", "Unknown Restaurant"),
-                    uploaded_menu=self.uploaded_menu_data
-                )
-                if menu_result["status"] == "success":
-                    self.conversation_context["menu_items"] = menu_result["menu_items"]
-                return menu_result
+                return self._process_uploaded_menu()
 
-            # Extract restaurant name and zip code
-            restaurant_name, zip_code = self.extract_restaurant_info_llm(user_input)
-            self.logger.info(f"LLM-extracted: restaurant='{restaurant_name}', zip='{zip_code}'")
+            # Restaurant, zip code, intent and preferences in one pass
+            analysis = self.analyze_turn(user_input)
+            restaurant_name, zip_code = analysis.restaurant, analysis.zipcode
+            self.logger.info(f"Analyzed ({analysis.source}): restaurant='{restaurant_name}', zip='{zip_code}', "
+                             f"action='{analysis.action}', preferences={analysis.preferences}")
 
-            # Update context with restaurant and location if found
-            if restaurant_name:
-                prev_restaurant = self.conversation_context.get("current_restaurant", "")
-                if prev_restaurant and prev_restaurant.lower() != restaurant_name.lower():
-                    self.logger.info(f" Restaurant changed from '{prev_restaurant}' to '{restaurant_name}', clearing old menu and URL")
-                    self.conversation_context["menu_items"] = []
-                    self.conversation_context["restaurant_url"] = ""
-                self.conversation_context["current_restaurant"] = restaurant_name.strip()
-                self.logger.info(f"Updated conversation context with restaurant: '{self.conversation_context['current_restaurant']}'")
-
-            if zip_code:
-                self.conversation_context["current_location"] = zip_code
-                self.logger.info(f"Updated conversation context with location: '{self.conversation_context['current_location']}'")
-
-            # Debug log to verify context before search
-            self.logger.info(f"Current context before action: restaurant='{self.conversation_context.get('current_restaurant')}', zip='{self.conversation_context.get('current_location')}'")
+            # Update context with restaurant, location and preferences if found
+            self._apply_extracted_info(restaurant_name, zip_code)
+            self._apply_preferences(analysis.preferences)
 
             # If both restaurant and zip are provided, perform a restaurant search but don't automatically chain to menu/recommendations
             if restaurant_name and zip_code:
                 self.logger.info(f"Restaurant '{restaurant_name}' and location '{zip_code}' detected, searching first")
                 search_result = self._handle_search_restaurant()
-                
-                if search_result.get("status") == "user_select":
-                    # Return for user selection
-                    self.add_to_chat_history("assistant", search_result.get("message", "Please select a restaurant."))
-                    return search_result
-                elif search_result.get("status") == "success":
-                    # Success message confirming restaurant was found, but don't chain to menu/recommendations
-                    self.logger.info("Search successful, waiting for user's next instruction")
-                    confirmation_message = f"I found {restaurant_name}. Would you like to get dish recommendations for this restaurant?"
-                    self.add_to_chat_history("assistant", confirmation_message)
-                    return {
-                        "status": "success",
-                        "message": confirmation_message,
-                        "url": search_result.get("url", "")
-                    }
-                else:
-                    # Search failed
-                    self.add_to_chat_history("assistant", search_result.get("message", "I couldn't find that restaurant."))
-                    return search_result
+                return self._search_reply(restaurant_name, search_result)
             
-            # For all other cases, use intent detection
-            action = self.analyze_user_input(user_input)
+            # For all other cases, use the detected intent
+            action = analysis.action
             
             # Check if necessary requirements are met for this action
-            if action == "get_menu" or action == "get_recommendations":
-                if not self.conversation_context.get("current_restaurant"):
-                    response = {
-                        "status": "error",
-                        "message": "I need to know which restaurant you're interested in first. Could you tell me the name?",
-                        "menu_items": []
-                    }
-                    self.add_to_chat_history("assistant", response["message"])
-                    return response
-                    
-            # If we're asking for menu or recommendations without location, ask for it
-            if (action == "get_menu" or action == "get_recommendations") and not self.conversation_context.get("current_location"):
-                response = {
-                    "status": "error", 
-                    "message": f"I need to know where {self.conversation_context.get('current_restaurant')} is located. Could you provide a zip code?",
-                    "menu_items": []
-                }
+            response = self._missing_requirements_response(action)
+            if response:
                 self.add_to_chat_history("assistant", response["message"])
                 return response
             
@@ -647,8 +674,23 @@ class RestaurantAgent:
             self.add_to_chat_history("assistant", error_response["message"])
             return error_response
 
-    def handle_input(self, user_input: str, force_action: str = None) -> Dict:
-        """Process user input with option to force a specific action"""
+    def _record_streamed_reply(self, chunks: Iterator[str]) -> Iterator[str]:
+        """Pass a streamed reply through and add the full text to the chat history once it ends"""
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        message = "".join(parts).strip()
+        self.conversation_context["last_recommendations"] = message
+        self.add_to_chat_history("assistant", message)
+
+    def handle_input(self, user_input: str, force_action: str = None, stream: bool = False) -> Dict:
+        """
+        Process user input with option to force a specific action
+
+        With `stream=True`, text recommendations come back with a `stream`
+        generator of text chunks instead of a complete `message`.
+        """
         try:
             self.logger.info(f"Handling input with forced action={force_action}: {user_input}")
             
@@ -695,7 +737,12 @@ class RestaurantAgent:
                 
                 print("="*10)
                 print("Everything before _handle_recommendations looks good!")
-                result = self._handle_recommendations()
+                generate_images = self.conversation_context.get("generate_images", False)
+                result = self._handle_recommendations(stream=stream and not generate_images)
+                if result.get("stream") is not None:
+                    # History and last_recommendations are recorded once the stream is consumed
+                    result["stream"] = self._record_streamed_reply(result["stream"])
+                    return result
                 if not self.conversation_context.get("generate_images", False):
                     if result.get("status") == "success" and result.get("message"):
                         self.conversation_context["last_recommendations"] = result["message"]
@@ -733,6 +780,179 @@ class RestaurantAgent:
             self.add_to_chat_history("assistant", error_response["message"])
             return error_response
 
+    async def _ahandle_get_menu(self) -> Dict:
+        """
+        Async _handle_get_menu: the website gets a head start, and DoorDash is
+        tried when the website fails or has not produced a menu in time.
+
+        The first source that returns menu items wins; the other is cancelled and
+        its blocking work stops at the next cancel check.
+        """
+        cancel = threading.Event()
+        try:
+            restaurant = self.conversation_context.get("current_restaurant", "")
+            website = self.conversation_context.get("restaurant_url", "")
+            zipcode = self.conversation_context.get("current_location", "00000")
+            self.logger.info(f"Fetching the menu of {restaurant} from {website}, DoorDash as backup")
+
+            async def from_website():
+                result = await self.async_menu_tool.get_menu(restaurant, restaurant_url=website, zipcode=zipcode,
+                                                              source="website", cancel_event=cancel)
+                return "website", website, result
+
+            async def from_doordash():
+                dd_result = await self.async_delivery_menu_tool.find_doordash_menu(restaurant, zipcode,
+                                                                                   cancel_event=cancel)
+                if not (isinstance(dd_result, dict) and dd_result.get("status") == "success"):
+                    return "doordash", None, None
+                url = dd_result.get("url")
+                result = await self.async_menu_tool.get_menu(restaurant, restaurant_url=url, zipcode=zipcode,
+                                                              source="doordash", cancel_event=cancel)
+                return "doordash", url, result
+
+            winner = await first_successful(
+                [from_website(), from_doordash()],
+                is_success=lambda outcome: self._is_menu_result(outcome[2]),
+                head_start=MENU_RACE_HEAD_START_SECONDS
+            )
+            if winner is None:
+                return {
+                    "status": "request_upload",
+                    "message": "Couldn't find the menu online. Please upload it manually.",
+                    "menu_items": []
+                }
+
+            source, url, result = winner
+            self.logger.info(f"Menu found via {source}")
+            if source == "doordash":
+                self.conversation_context["restaurant_url"] = url
+            return self._menu_found_response(restaurant, result, source=source)
+
+        except Exception as e:
+            self.logger.error(f"Error in _ahandle_get_menu: {str(e)}", exc_info=True)
+            return {
+                "status": "error",
+                "message": f"Error retrieving menu: {str(e)}",
+                "menu_items": []
+            }
+        finally:
+            cancel.set()
+
+    async def _ahandle_recommendations(self, stream: bool = False) -> Dict:
+        """Async _handle_recommendations; fetches a missing menu with the racing fetcher first"""
+        if not self.conversation_context.get("menu_items") and self.conversation_context.get("current_restaurant") \
+                and self.conversation_context.get("current_location"):
+            await self._ahandle_get_menu()
+        return await run_blocking(self._handle_recommendations, stream=stream)
+
+    async def _arun_action(self, action: str, stream: bool = False) -> Dict:
+        """Run an action handler without blocking the event loop"""
+        if action == "search_restaurant":
+            return await run_blocking(self._handle_search_restaurant)
+        if action == "get_menu":
+            return await self._ahandle_get_menu()
+        if action in ("get_recommendations", "recommendations"):
+            return await self._ahandle_recommendations(stream=stream)
+        if action == "health_query":
+            return await run_blocking(self._handle_health_query)
+        if action == "general_conversation":
+            return await run_blocking(self._handle_general_conversation)
+        self.logger.warning(f"Unknown action: {action}")
+        return {"status": "error", "message": f"Unknown action: {action}", "menu_items": []}
+
+    async def aanalyze_turn(self, user_input: str) -> TurnAnalysis:
+        """Async analyze_turn"""
+        analysis = self._local_turn_analysis(user_input)
+        if analysis is not None:
+            return analysis
+        prompt = turn_analysis_prompt(user_input, self.conversation_context.get("current_restaurant"))
+        history_window = self.history.window()
+        cache_key = self.llm_cache.make_key(self.llm.model, prompt, history_window)
+        try:
+            content = await run_blocking(self.llm_cache.get, cache_key, action="analyze_turn")
+            if content is None:
+                content = await self.llm.acomplete(self.history.build_prompt(prompt), response_format=TURN_ANALYSIS_FORMAT)
+                analysis = parse_turn_analysis(content)
+                await run_blocking(self.llm_cache.set, cache_key, content, action="analyze_turn")
+            else:
+                self.logger.info("LLM cache hit for action 'analyze_turn'")
+                analysis = parse_turn_analysis(content)
+        except Exception as e:
+            self.logger.warning(f"Structured turn analysis failed: {e}, falling back to rules")
+            return self._fallback_turn_analysis(user_input)
+        return await run_blocking(self._finish_turn_analysis, user_input, analysis)
+
+    async def aprocess_input(self, user_input: str) -> Dict:
+        """Async process_input"""
+        try:
+            self.logger.info(f"Processing input (async): {user_input}")
+            self.add_to_chat_history("user", user_input)
+
+            if user_input == "process_uploaded_menu":
+                return await run_blocking(self._process_uploaded_menu)
+
+            analysis = await self.aanalyze_turn(user_input)
+            restaurant_name, zip_code = analysis.restaurant, analysis.zipcode
+            self.logger.info(f"Analyzed ({analysis.source}): restaurant='{restaurant_name}', zip='{zip_code}', "
+                             f"action='{analysis.action}', preferences={analysis.preferences}")
+
+            self._apply_extracted_info(restaurant_name, zip_code)
+            self._apply_preferences(analysis.preferences)
+
+            if restaurant_name and zip_code:
+                self.logger.info(f"Restaurant '{restaurant_name}' and location '{zip_code}' detected, searching first")
+                search_result = await run_blocking(self._handle_search_restaurant)
+                return self._search_reply(restaurant_name, search_result)
+
+            action = analysis.action
+
+            response = self._missing_requirements_response(action)
+            if response:
+                self.add_to_chat_history("assistant", response["message"])
+                return response
+
+            result = await self._arun_action(action)
+
+            if result.get("status") != "user_select":
+                self.add_to_chat_history("assistant", result.get("message", ""))
+            return result
+
+        except Exception as e:
+            self.logger.error(f"Error processing input: {str(e)}")
+            error_response = {
+                "status": "error",
+                "message": f"I'm sorry, I encountered an error: {str(e)}",
+                "menu_items": []
+            }
+            self.add_to_chat_history("assistant", error_response["message"])
+            return error_response
+
+    async def ahandle_input(self, user_input: str, force_action: str = None, stream: bool = False) -> Dict:
+        """
+        Async handle_input.
+
+        Browser and LLM work runs on the shared tool executor, so one event loop
+        can serve many agents (one per session) at once. A single agent still
+        expects its own calls to be awaited one after another.
+        """
+        if not force_action:
+            return await self.aprocess_input(user_input)
+
+        if force_action == "get_menu":
+            if user_input != "process_uploaded_menu":
+                self.add_to_chat_history("user", user_input)
+            result = await self._ahandle_get_menu()
+            if result.get("status") != "user_select":
+                self.add_to_chat_history("assistant", result.get("message", ""))
+            return result
+
+        if force_action == "recommendations" and not self.conversation_context.get("menu_items") \
+                and self.conversation_context.get("current_restaurant") and self.conversation_context.get("current_location"):
+            # Fetch the menu with the racing fetcher so the sync handler finds it in context
+            await self._ahandle_get_menu()
+
+        return await run_blocking(self.handle_input, user_input, force_action, stream)
+
     def setup_logging(self):
         log_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
         os.makedirs(log_dir, exist_ok=True)
@@ -743,38 +963,84 @@ class RestaurantAgent:
         ])
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    def setup_llm(self):
-        self.config_list = [{"model": "gpt-4o-mini", "api_key": os.getenv("OPENAI_API_KEY") }]
-        self.assistant = autogen.AssistantAgent(name="assistant", llm_config={"config_list": self.config_list})
-        self.user_proxy = autogen.UserProxyAgent(name="user_proxy", human_input_mode="NEVER", max_consecutive_auto_reply=10, code_execution_config={"work_dir": "workspace", "use_docker": False})
+    def _summarize_history(self, previous_summary: str, messages: List[Dict]) -> str:
+        """Fold older turns of a round into its rolling summary (called by ConversationHistory)"""
+        transcript = "".join(f"{'User' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}\n" for msg in messages)
+        prompt = f"""
+        Update the summary of a conversation between a user and a restaurant assistant.
+
+        Current summary:
+        {previous_summary or "(none)"}
+
+        New messages:
+        {transcript}
 
-    def ask_llm(self, prompt: str) -> str:
+        Return ONLY the updated summary in at most 120 words. Keep restaurant names, locations,
+        food preferences, budgets and any decisions the user made.
+        """
+        cache_key = self.llm_cache.make_key(self.llm.model, prompt)
+        cached = self.llm_cache.get(cache_key, action="summarize_history")
+        if cached is not None:
+            return cached
+        summary = self.llm.complete(prompt)
+        self.llm_cache.set(cache_key, summary, action="summarize_history")
+        return summary
+
+    def ask_llm(self, prompt: str, action: Optional[str] = None) -> str:
+        """
+        Send a prompt (with the current round's history) to the LLM.
+
+        `action` selects the response-cache TTL; identical prompts with identical
+        history are answered from the cache without an LLM call.
+        """
         try:
-            # Add conversation history from the current round as context
-            current_round_history = self.get_current_round_history()
-            context_prompt = ""
-            
-            if current_round_history:
-                context_prompt = "\nConversation history for this round:\n"
-                for msg in current_round_history:
-                    role_display = "User" if msg["role"] == "user" else "Assistant"
-                    context_prompt += f"{role_display}: {msg['content']}\n"
-                    
-                context_prompt += "\nNow respond to the current request:\n"
-            
-            # Prepend the context to the prompt
-            enhanced_prompt = context_prompt + prompt if context_prompt else prompt
-            
-            chat_result = self.user_proxy.initiate_chat(self.assistant, message=enhanced_prompt, max_turns=1)
-            for msg in reversed(chat_result.chat_history):
-                content = msg.get('content', '').strip()
-                if content:
-                   return content.replace("TERMINATE", "").strip()
-            return "No response from LLM"
+            # Add conversation history from the current round as context:
+            # a token-bounded window of the current round (rolling summary + recent turns)
+            history_window = self.history.window()
+
+            cache_key = self.llm_cache.make_key(self.llm.model, prompt, history_window)
+            cached = self.llm_cache.get(cache_key, action=action)
+            if cached is not None:
+                self.logger.info(f"LLM cache hit for action '{action or 'default'}'")
+                return cached
+
+            enhanced_prompt = self.history.build_prompt(prompt)
+
+            response = self.llm.complete(enhanced_prompt)
+            if not response:
+                return "No response from LLM"
+            self.llm_cache.set(cache_key, response, action=action)
+            return response
         except Exception as e:
             self.logger.error(f"Error asking LLM: {str(e)}")
             return f"Error: {str(e)}"
 
+    def ask_llm_stream(self, prompt: str, action: Optional[str] = None) -> Iterator[str]:
+        """
+        Streaming variant of ask_llm: yields the completion as text deltas.
+
+        Cache hits are yielded as a single chunk; a completed stream is stored in
+        the response cache like a regular completion.
+        """
+        history_window = self.history.window()
+        cache_key = self.llm_cache.make_key(self.llm.model, prompt, history_window)
+        cached = self.llm_cache.get(cache_key, action=action)
+        if cached is not None:
+            self.logger.info(f"LLM cache hit for action '{action or 'default'}'")
+            yield cached
+            return
+
+        enhanced_prompt = self.history.build_prompt(prompt)
+        try:
+            parts = []
+            for delta in self.llm.stream(enhanced_prompt):
+                parts.append(delta)
+                yield delta
+            self.llm_cache.set(cache_key, "".join(parts).strip(), action=action)
+        except Exception as e:
+            self.logger.error(f"Error streaming from LLM: {str(e)}")
+            yield f"Error: {str(e)}"
+
     def close(self):
         self.location_search_tool.close()
         self.menu_tool.close()
@@ -0,0 +1,208 @@
+import os
+import bisect
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+from .tools.normalize_menu import count_tokens
+
+DEFAULT_MAX_HISTORY_TOKENS = int(os.getenv("HISTORY_MAX_TOKENS", "1500"))
+DEFAULT_COMPACT_TOKENS = int(os.getenv("HISTORY_COMPACT_TOKENS", "3000"))
+
+HISTORY_HEADER = "\nConversation history for this round:\n"
+HISTORY_FOOTER = "\nNow respond to the current request:\n"
+SUMMARY_ROLE = "summary"
+
+# summarizer(previous_summary, messages) -> new summary
+Summarizer = Callable[[str, List[Dict]], str]
+
+
+def render_message(msg: Dict) -> str:
+    role_display = "User" if msg["role"] == "user" else "Assistant"
+    return f"{role_display}: {msg['content']}\n"
+
+
+def extractive_summary(previous_summary: str, messages: List[Dict]) -> str:
+    """Summarizer used when no LLM summarizer is available: keeps the first sentence of each turn"""
+    parts = [previous_summary] if previous_summary else []
+    for msg in messages:
+        first_sentence = str(msg["content"]).strip().split("\n")[0].split(". ")[0][:200]
+        parts.append(f"{'User' if msg['role'] == 'user' else 'Assistant'}: {first_sentence}")
+    return " | ".join(parts)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Drop the start of `text` until it fits in `max_tokens` tokens"""
+    tokens = count_tokens(text)
+    while tokens > max_tokens and text:
+        keep = int(len(text) * max_tokens / tokens * 0.9)
+        text = "..." + text[len(text) - keep:] if keep > 0 else ""
+        tokens = count_tokens(text)
+    return text
+
+
+class _Round:
+    """Messages of one round with their rendered lines and running token totals"""
+    def __init__(self):
+        self.messages: List[Dict] = []
+        self.lines: List[str] = []
+        self.cumulative_tokens: List[int] = []  # tokens of lines[0..i] inclusive
+        self.summary = ""
+        self.summary_tokens = 0
+        self.summarized = 0  # messages[:summarized] are folded into the summary
+        self._rendered = {}  # start index -> (end index, rendered text)
+
+    def tokens_between(self, start: int, end: int) -> int:
+        if end <= start:
+            return 0
+        before = self.cumulative_tokens[start - 1] if start > 0 else 0
+        return self.cumulative_tokens[end - 1] - before
+
+
+class ConversationHistory:
+    """
+    Chat history indexed by round.
+
+    Each round keeps its rendered transcript lines and running token counts, so
+    adding a message costs one render and one token count. Prompts get a window
+    of the most recent turns that fits `max_tokens`; once a round's unsummarized
+    turns exceed `compact_tokens`, `compact()` folds the oldest ones into a
+    rolling summary that is sent in their place. Compaction is left to the
+    caller (the summarizer may be an LLM call) and runs outside the lock.
+    """
+    def __init__(self, max_tokens: int = DEFAULT_MAX_HISTORY_TOKENS, compact_tokens: int = DEFAULT_COMPACT_TOKENS,
+                 summarizer: Optional[Summarizer] = None):
+        self.max_tokens = max(1, max_tokens)
+        self.compact_tokens = max(self.max_tokens, compact_tokens)
+        self.summarizer = summarizer or extractive_summary
+        self.messages: List[Dict] = []
+        self.current_round = 0
+        self._rounds: Dict[int, _Round] = {}
+        self._lock = threading.RLock()
+        self._compacting = False
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def _round(self, round_number: int) -> _Round:
+        if round_number not in self._rounds:
+            self._rounds[round_number] = _Round()
+        return self._rounds[round_number]
+
+    def start_round(self) -> int:
+        with self._lock:
+            self.current_round += 1
+            return self.current_round
+
+    def add(self, role: str, content: str) -> Dict:
+        """Append a message to the current round"""
+        msg = {"role": role, "content": content if isinstance(content, str) else str(content),
+               "round": self.current_round}
+        with self._lock:
+            self.messages.append(msg)
+            round_ = self._round(self.current_round)
+            line = render_message(msg)
+            total = (round_.cumulative_tokens[-1] if round_.cumulative_tokens else 0) + count_tokens(line)
+            round_.messages.append(msg)
+            round_.lines.append(line)
+            round_.cumulative_tokens.append(total)
+        return msg
+
+    def round_messages(self, round_number: Optional[int] = None) -> List[Dict]:
+        """All messages of a round (the current one by default)"""
+        with self._lock:
+            round_ = self._rounds.get(self.current_round if round_number is None else round_number)
+            return list(round_.messages) if round_ else []
+
+    def needs_compaction(self) -> bool:
+        """True when the current round's unsummarized turns exceed `compact_tokens`"""
+        with self._lock:
+            round_ = self._rounds.get(self.current_round)
+            if not round_ or self._compacting:
+                return False
+            return round_.tokens_between(round_.summarized, len(round_.lines)) > self.compact_tokens
+
+    def compact(self) -> bool:
+        """
+        Fold the oldest turns of the current round into its summary if it is over
+        `compact_tokens`. The summarizer runs without holding the lock, so
+        messages can be added and prompts built meanwhile. Returns True when
+        the round was compacted.
+        """
+        with self._lock:
+            round_number = self.current_round
+            round_ = self._rounds.get(round_number)
+            if not round_ or self._compacting:
+                return False
+            if round_.tokens_between(round_.summarized, len(round_.lines)) <= self.compact_tokens:
+                return False
+            # Keep roughly half the window verbatim and fold everything older into the summary
+            cutoff = self._window_start(round_, self.max_tokens // 2)
+            if cutoff <= round_.summarized:
+                return False
+            previous_summary = round_.summary
+            to_fold = round_.messages[round_.summarized:cutoff]
+            self._compacting = True
+        try:
+            try:
+                summary = self.summarizer(previous_summary, to_fold).strip()
+            except Exception as e:
+                self.logger.warning(f"History summarizer failed, using extractive summary: {str(e)}")
+                summary = extractive_summary(previous_summary, to_fold)
+            # The summary may use at most half the window
+            summary = truncate_to_tokens(summary, self.max_tokens // 2)
+            summary_tokens = count_tokens(summary)
+            with self._lock:
+                # Messages are only appended, so the cutoff still marks the same turns
+                round_.summary = summary
+                round_.summary_tokens = summary_tokens
+                round_.summarized = cutoff
+                round_._rendered.clear()
+        finally:
+            with self._lock:
+                self._compacting = False
+        self.logger.info(f"Compacted {len(to_fold)} message(s) of round {round_number} into the summary")
+        return True
+
+    def _window_start(self, round_: _Round, budget: int) -> int:
+        """First message index such that messages[start:] fit in `budget` tokens"""
+        total = round_.cumulative_tokens[-1] if round_.cumulative_tokens else 0
+        if total <= budget:
+            start = 0
+        else:
+            # Smallest start with total - cumulative[start - 1] <= budget
+            start = bisect.bisect_left(round_.cumulative_tokens, total - budget) + 1
+        return max(start, round_.summarized)
+
+    def window(self, max_tokens: Optional[int] = None) -> List[Dict]:
+        """
+        The current round as sent to the LLM: the rolling summary (if any) as a
+        `summary` entry followed by the most recent messages that fit the budget.
+        """
+        with self._lock:
+            round_ = self._rounds.get(self.current_round)
+            if not round_ or not round_.messages:
+                return []
+            budget = (max_tokens or self.max_tokens) - round_.summary_tokens
+            start = self._window_start(round_, max(budget, 0))
+            window = [{"role": SUMMARY_ROLE, "content": round_.summary}] if round_.summary else []
+            return window + round_.messages[start:]
+
+    def build_prompt(self, prompt: str, max_tokens: Optional[int] = None) -> str:
+        """Prepend the windowed history of the current round to a prompt"""
+        with self._lock:
+            round_ = self._rounds.get(self.current_round)
+            if not round_ or not round_.messages:
+                return prompt
+            budget = (max_tokens or self.max_tokens) - round_.summary_tokens
+            start = self._window_start(round_, max(budget, 0))
+            end = len(round_.lines)
+            cached = round_._rendered.get(start)
+            if cached and cached[0] <= end:
+                # Extend the cached transcript with the lines added since it was rendered
+                transcript = cached[1] + "".join(round_.lines[cached[0]:end])
+            else:
+                transcript = "".join(round_.lines[start:end])
+            round_._rendered = {start: (end, transcript)}
+            summary = f"Summary of earlier messages: {round_.summary}\n" if round_.summary else ""
+            if not summary and not transcript:
+                return prompt
+            return HISTORY_HEADER + summary + transcript + HISTORY_FOOTER + prompt
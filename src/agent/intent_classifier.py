@@ -0,0 +1,285 @@
+import os
+import re
+import json
+import math
+import time
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+# Constants
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+DEFAULT_STATE_PATH = os.getenv("INTENT_MODEL_PATH", os.path.join(PROJECT_ROOT, "data", "intent_model.json"))
+DEFAULT_CONFIDENCE = float(os.getenv("INTENT_CONFIDENCE", "0.85"))
+MAX_LEARNED_EXAMPLES = 2000
+# Learned examples are written to disk at most this often (and on exit)
+STATE_SAVE_INTERVAL_SECONDS = 30
+# Messages shorter than this are replies to the previous assistant turn more often than requests
+MIN_CONTEXT_FREE_WORDS = 3
+
+ACTIONS = ["search_restaurant", "get_menu", "get_recommendations", "general_conversation", "health_query"]
+
+ZIP_PATTERN = re.compile(r"\b(\d{5})(?:-\d{4})?\b")
+PROPER_NOUN_PATTERN = re.compile(r"(?<=\w)\s+(?!I\b)[A-Z][\w'&]*")
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+# Answers whose meaning depends on what the assistant just asked ("yes", "sure", "that one")
+REPLY_PATTERN = re.compile(
+    r"^\W*(?:yes|yeah|yep|yup|sure|ok|okay|no|nope|nah|please|that|this|those|these|it|same|"
+    r"the (?:first|second|third|last|other)|(?:first|second|third|last|other) one)\b",
+    re.IGNORECASE
+)
+# Phrases that usually introduce a restaurant name; without one (and no gazetteer hit)
+# the message most likely names no restaurant
+RESTAURANT_CUES = re.compile(
+    r"\b(?:eat|eating|dine|dining|at|go to|going to|visit|find|order from|restaurant|place called)\b",
+    re.IGNORECASE
+)
+
+# Seed training set for the naive Bayes model; grows with LLM-labelled messages
+SEED_EXAMPLES = [
+    ("where is the restaurant", "search_restaurant"),
+    ("find a restaurant near me", "search_restaurant"),
+    ("can you locate this place", "search_restaurant"),
+    ("what is the address of the restaurant", "search_restaurant"),
+    ("is it open now", "search_restaurant"),
+    ("look up another location", "search_restaurant"),
+    ("show me the menu", "get_menu"),
+    ("what do they serve", "get_menu"),
+    ("what dishes do they have", "get_menu"),
+    ("can i see the food options", "get_menu"),
+    ("list the items they sell", "get_menu"),
+    ("how much is the burrito", "get_menu"),
+    ("what should i order", "get_recommendations"),
+    ("recommend something spicy", "get_recommendations"),
+    ("pick a dish for me", "get_recommendations"),
+    ("what is good here", "get_recommendations"),
+    ("suggest a meal under 15 dollars", "get_recommendations"),
+    ("i want something with chicken", "get_recommendations"),
+    ("which dish would you choose", "get_recommendations"),
+    ("hi", "general_conversation"),
+    ("hello there", "general_conversation"),
+    ("thanks a lot", "general_conversation"),
+    ("how are you", "general_conversation"),
+    ("tell me a joke", "general_conversation"),
+    ("ok sounds good", "general_conversation"),
+    ("who are you", "general_conversation"),
+    ("is this healthy for me", "health_query"),
+    ("how many calories are in it", "health_query"),
+    ("is it ok for my blood pressure", "health_query"),
+    ("can a diabetic eat this", "health_query"),
+    ("what about my cholesterol", "health_query"),
+    ("is this good for weight loss", "health_query"),
+    ("how much protein and fat", "health_query"),
+]
+
+
+def tokenize(text: str) -> List[str]:
+    words = TOKEN_PATTERN.findall((text or "").lower())
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+def is_context_dependent(text: str) -> bool:
+    """True for short or reply-style messages whose intent depends on the previous assistant turn"""
+    return len(TOKEN_PATTERN.findall((text or "").lower())) < MIN_CONTEXT_FREE_WORDS \
+        or REPLY_PATTERN.match(text or "") is not None
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(TOKEN_PATTERN.findall((name or "").lower()))
+
+
+class NaiveBayesIntentModel:
+    """Multinomial naive Bayes over unigrams and bigrams with Laplace smoothing"""
+    def __init__(self, labels: List[str] = ACTIONS):
+        self.labels = list(labels)
+        self.doc_counts = Counter()
+        self.token_counts = defaultdict(Counter)
+        self.token_totals = Counter()
+        self.vocabulary = set()
+
+    def learn(self, text: str, label: str):
+        tokens = tokenize(text)
+        if not tokens or label not in self.labels:
+            return
+        self.doc_counts[label] += 1
+        self.token_counts[label].update(tokens)
+        self.token_totals[label] += len(tokens)
+        self.vocabulary.update(tokens)
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """Return (label, posterior probability)"""
+        tokens = [token for token in tokenize(text) if token in self.vocabulary]
+        total_docs = sum(self.doc_counts.values())
+        if not tokens or not total_docs:
+            return "general_conversation", 0.0
+        vocabulary_size = len(self.vocabulary)
+        scores = {}
+        for label in self.labels:
+            if not self.doc_counts[label]:
+                continue
+            score = math.log(self.doc_counts[label] / total_docs)
+            denominator = self.token_totals[label] + vocabulary_size
+            for token in tokens:
+                score += math.log((self.token_counts[label][token] + 1) / denominator)
+            scores[label] = score
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        normalizer = sum(math.exp(score - top) for score in scores.values())
+        return best, 1.0 / normalizer
+
+
+class IntentClassifier:
+    """
+    Local fast path for process_input: restaurant/zip extraction and intent
+    classification without an LLM call.
+
+    Zip codes come from a regex, restaurant names from a gazetteer of
+    restaurants the agent has already resolved, and the intent from a naive
+    Bayes model. Results below `confidence` are reported as misses so the
+    caller falls back to the LLM, whose answer is then learned. Short and
+    reply-style messages are left to the LLM and never learned, since their
+    intent depends on the previous assistant turn.
+    """
+    def __init__(self, state_path: str = DEFAULT_STATE_PATH, confidence: float = DEFAULT_CONFIDENCE):
+        self.state_path = state_path
+        self.confidence = confidence
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._lock = threading.Lock()
+        self.model = NaiveBayesIntentModel()
+        self.gazetteer: Dict[str, str] = {}  # normalized name -> display name
+        self.learned: List[Tuple[str, str]] = []
+        self._counters = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._last_save = 0.0
+        self._dirty = False
+
+        for text, label in SEED_EXAMPLES:
+            self.model.learn(text, label)
+        self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        for name in state.get("restaurants", []):
+            self.gazetteer[normalize_name(name)] = name
+        for text, label in state.get("examples", [])[-MAX_LEARNED_EXAMPLES:]:
+            self.learned.append((text, label))
+            self.model.learn(text, label)
+
+    def _save_state(self):
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            tmp_path = self.state_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"restaurants": sorted(self.gazetteer.values()),
+                           "examples": self.learned}, f)
+            os.replace(tmp_path, self.state_path)
+            self._dirty = False
+        except OSError as e:
+            self.logger.warning(f"Could not save intent model state: {str(e)}")
+        self._last_save = time.monotonic()
+
+    def flush(self):
+        """Write learned examples that are not on disk yet"""
+        with self._lock:
+            if self._dirty:
+                self._save_state()
+
+    def _count(self, stage: str, hit: bool):
+        with self._lock:
+            self._counters[stage]["hits" if hit else "misses"] += 1
+
+    def add_restaurant(self, name: str):
+        """Remember a restaurant name the agent resolved so later messages can be matched locally"""
+        key = normalize_name(name)
+        if not key or key in self.gazetteer:
+            return
+        with self._lock:
+            self.gazetteer[key] = name.strip()
+            self._save_state()
+
+    def learn(self, text: str, action: str):
+        """
+        Add an LLM-labelled message to the training set; the state file is saved
+        at most every STATE_SAVE_INTERVAL_SECONDS
+        """
+        if action not in ACTIONS or not text.strip() or is_context_dependent(text):
+            return
+        with self._lock:
+            self.model.learn(text, action)
+            self.learned.append((text, action))
+            del self.learned[:-MAX_LEARNED_EXAMPLES]
+            self._dirty = True
+            if time.monotonic() - self._last_save >= STATE_SAVE_INTERVAL_SECONDS:
+                self._save_state()
+
+    def _find_restaurant(self, text: str) -> str:
+        """Longest gazetteer name that appears in the text as a whole-word phrase"""
+        words = normalize_name(text).split()
+        best = ""
+        for start in range(len(words)):
+            for end in range(len(words), start, -1):
+                if end - start <= len(best.split()):
+                    break
+                candidate = " ".join(words[start:end])
+                if candidate in self.gazetteer:
+                    best = candidate
+                    break
+        return self.gazetteer.get(best, "")
+
+    def extract(self, text: str) -> Optional[Tuple[str, str]]:
+        """
+        Return (restaurant, zipcode) when they can be extracted confidently,
+        or None when the LLM should decide.
+        """
+        zip_match = ZIP_PATTERN.search(text or "")
+        zipcode = zip_match.group(1) if zip_match else ""
+        restaurant = self._find_restaurant(text)
+        # A zip code, a restaurant cue or a capitalized word may mean an unknown restaurant name
+        might_name_restaurant = bool(zipcode or RESTAURANT_CUES.search(text or "") or PROPER_NOUN_PATTERN.search(text or ""))
+        if restaurant or not might_name_restaurant:
+            self._count("extraction", True)
+            return restaurant, zipcode
+        self._count("extraction", False)
+        return None
+
+    def classify(self, text: str) -> Optional[str]:
+        """Return the action when the model is confident enough, otherwise None"""
+        if is_context_dependent(text):
+            self._count("intent", False)
+            return None
+        with self._lock:
+            action, probability = self.model.predict(text)
+        hit = probability >= self.confidence
+        self._count("intent", hit)
+        if hit:
+            self.logger.info(f"Local intent '{action}' ({probability:.2f})")
+            return action
+        return None
+
+    def stats(self) -> Dict[str, Dict]:
+        """Fast-path hits, misses and hit rate per stage"""
+        with self._lock:
+            stats = {stage: dict(counts) for stage, counts in self._counters.items()}
+        for counts in stats.values():
+            total = counts["hits"] + counts["misses"]
+            counts["hit_rate"] = round(counts["hits"] / total, 3) if total else 0.0
+        return stats
+
+
+_intent_classifier: Optional[IntentClassifier] = None
+_intent_classifier_lock = threading.Lock()
+
+
+def get_intent_classifier() -> IntentClassifier:
+    """Return the process-wide intent classifier, creating it on first use"""
+    global _intent_classifier
+    with _intent_classifier_lock:
+        if _intent_classifier is None:
+            _intent_classifier = IntentClassifier()
+            atexit.register(_intent_classifier.flush)
+        return _intent_classifier
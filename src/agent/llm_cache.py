@@ -0,0 +1,207 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional
+
+# Constants
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+DEFAULT_DB_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(PROJECT_ROOT, "data", "llm_cache.sqlite"))
+DEFAULT_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "1024"))
+DEFAULT_TTL_SECONDS = 60 * 60
+
+# Per-action TTLs in seconds; 0 disables caching for that action
+ACTION_TTLS = {
+    "analyze_turn": 7 * 24 * 60 * 60,
+    "translation": 30 * 24 * 60 * 60,
+    "summarize_history": 7 * 24 * 60 * 60,
+    "recommendations": 60 * 60,
+    "health_query": 60 * 60,
+    "general_conversation": 10 * 60,
+}
+
+
+class CacheTier:
+    """
+    Interface for a response cache tier. Tiers store plain strings with an absolute expiry time.
+    """
+    name = "tier"
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str, expires_at: float):
+        raise NotImplementedError
+
+
+class MemoryLRUTier(CacheTier):
+    """In-process LRU tier, bounded by entry count"""
+    name = "memory"
+
+    def __init__(self, max_entries: int = DEFAULT_MEMORY_ENTRIES):
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, expires_at: float):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteTier(CacheTier):
+    """On-disk tier shared by every process on the machine"""
+    name = "sqlite"
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return row[0]
+
+    def set(self, key: str, value: str, expires_at: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at)
+            )
+            self._conn.commit()
+
+    def purge_expired(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+
+
+class LLMResponseCache:
+    """
+    Content-addressed cache for LLM completions.
+
+    Keys combine the model, the whitespace-normalized prompt and a fingerprint of
+    the conversation history sent with it. Lookups go through the tiers in order
+    and a hit in a slower tier is copied into the faster ones.
+    """
+    def __init__(self, tiers: Optional[List[CacheTier]] = None, action_ttls: Optional[Dict[str, int]] = None,
+                 default_ttl: int = DEFAULT_TTL_SECONDS):
+        self.tiers = tiers if tiers is not None else [MemoryLRUTier(), SQLiteTier()]
+        self.action_ttls = dict(ACTION_TTLS, **(action_ttls or {}))
+        self.default_ttl = default_ttl
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._counters = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._counter_lock = threading.Lock()
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        return re.sub(r"\s+", " ", prompt or "").strip()
+
+    @staticmethod
+    def fingerprint_history(history: Optional[List[Dict]]) -> str:
+        payload = json.dumps(
+            [(msg.get("role", ""), msg.get("content", "")) for msg in history or []],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def make_key(self, model: str, prompt: str, history: Optional[List[Dict]] = None) -> str:
+        material = "\x1f".join([model or "", self.normalize_prompt(prompt), self.fingerprint_history(history)])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, action: Optional[str]) -> int:
+        return self.action_ttls.get(action, self.default_ttl)
+
+    def _count(self, action: Optional[str], field: str):
+        with self._counter_lock:
+            self._counters[action or "default"][field] += 1
+
+    def get(self, key: str, action: Optional[str] = None) -> Optional[str]:
+        if self.ttl_for(action) <= 0:
+            return None
+        for i, tier in enumerate(self.tiers):
+            try:
+                value = tier.get(key)
+            except Exception as e:
+                self.logger.warning(f"LLM cache tier '{tier.name}' failed on read: {str(e)}")
+                continue
+            if value is not None:
+                self._count(action, "hits")
+                # Promote into the faster tiers
+                expires_at = time.time() + self.ttl_for(action)
+                for faster in self.tiers[:i]:
+                    faster.set(key, value, expires_at)
+                return value
+        self._count(action, "misses")
+        return None
+
+    def set(self, key: str, value: str, action: Optional[str] = None):
+        ttl = self.ttl_for(action)
+        if ttl <= 0 or not value:
+            return
+        expires_at = time.time() + ttl
+        for tier in self.tiers:
+            try:
+                tier.set(key, value, expires_at)
+            except Exception as e:
+                self.logger.warning(f"LLM cache tier '{tier.name}' failed on write: {str(e)}")
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit/miss counters per action, plus a 'total' row"""
+        with self._counter_lock:
+            stats = {action: dict(counts) for action, counts in self._counters.items()}
+        stats["total"] = {
+            "hits": sum(c["hits"] for c in stats.values()),
+            "misses": sum(c["misses"] for c in stats.values())
+        }
+        return stats
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Return the process-wide LLM response cache, creating it on first use"""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            if os.getenv("LLM_CACHE_DISABLED"):
+                _llm_cache = LLMResponseCache(tiers=[])
+            else:
+                _llm_cache = LLMResponseCache()
+        return _llm_cache
@@ -0,0 +1,137 @@
+import os
+import base64
+import asyncio
+import logging
+import mimetypes
+import threading
+import weakref
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+from openai import OpenAI, AsyncOpenAI
+
+# Constants
+DEFAULT_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+DEFAULT_VISION_MODEL = os.getenv("LLM_VISION_MODEL", "gpt-4o-mini")
+DEFAULT_IMAGE_MODEL = os.getenv("LLM_IMAGE_MODEL", "dall-e-2")
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+DEFAULT_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+DEFAULT_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+DOWNLOAD_TIMEOUT_SECONDS = 45
+
+
+class LLMGateway:
+    """
+    Single-shot access to the OpenAI API shared by the agent and all tools.
+
+    One thread-safe client per process keeps HTTP connections alive between
+    calls; timeouts and retries (with backoff) are handled by the SDK. Async
+    calls get one client per event loop, since pooled connections cannot be
+    shared across loops. Multi-turn orchestration is not handled here.
+    """
+    def __init__(self, api_key: Optional[str] = None, model: str = DEFAULT_MODEL,
+                 timeout: float = DEFAULT_TIMEOUT_SECONDS, max_retries: int = DEFAULT_MAX_RETRIES,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.http = httpx.Client(limits=self.limits, timeout=timeout, follow_redirects=True)
+        self.client = OpenAI(api_key=self.api_key, timeout=timeout, max_retries=max_retries, http_client=self.http)
+        self._async_clients = weakref.WeakKeyDictionary()  # event loop -> AsyncOpenAI
+        self._async_lock = threading.Lock()
+
+    @staticmethod
+    def _messages(prompt: Optional[str], messages: Optional[List[Dict]]) -> List[Dict]:
+        if messages is not None:
+            return messages
+        return [{"role": "user", "content": prompt}]
+
+    def complete(self, prompt: Optional[str] = None, messages: Optional[List[Dict]] = None,
+                 model: Optional[str] = None, **kwargs) -> str:
+        """
+        One chat completion. Pass either a single user `prompt` or full `messages`;
+        extra keyword arguments (temperature, response_format, ...) go to the API.
+        """
+        completion = self.client.chat.completions.create(
+            model=model or self.model, messages=self._messages(prompt, messages), **kwargs
+        )
+        return (completion.choices[0].message.content or "").strip()
+
+    def stream(self, prompt: Optional[str] = None, messages: Optional[List[Dict]] = None,
+               model: Optional[str] = None, **kwargs) -> Iterator[str]:
+        """Yield a chat completion as text deltas"""
+        chunks = self.client.chat.completions.create(
+            model=model or self.model, messages=self._messages(prompt, messages), stream=True, **kwargs
+        )
+        for chunk in chunks:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+    def _async_client(self) -> AsyncOpenAI:
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = AsyncOpenAI(
+                    api_key=self.api_key, timeout=self.timeout, max_retries=self.max_retries,
+                    http_client=httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+                )
+                self._async_clients[loop] = client
+            return client
+
+    async def acomplete(self, prompt: Optional[str] = None, messages: Optional[List[Dict]] = None,
+                        model: Optional[str] = None, **kwargs) -> str:
+        """Async complete"""
+        completion = await self._async_client().chat.completions.create(
+            model=model or self.model, messages=self._messages(prompt, messages), **kwargs
+        )
+        return (completion.choices[0].message.content or "").strip()
+
+    def describe_image(self, image_path: str, prompt: str, model: str = DEFAULT_VISION_MODEL,
+                       max_tokens: int = 1000) -> str:
+        """Ask a vision model about a local image file (sent inline as a data URI)"""
+        mime_type = mimetypes.guess_type(image_path)[0] or "image/png"
+        with open(image_path, "rb") as f:
+            data_uri = f"data:{mime_type};base64,{base64.b64encode(f.read()).decode('ascii')}"
+        return self.complete(
+            messages=[
+                {"role": "system", "content": "You are a helpful assistant."},
+                {"role": "user", "content": [
+                    {"type": "text", "text": prompt},
+                    {"type": "image_url", "image_url": {"url": data_uri}},
+                ]},
+            ],
+            model=model,
+            max_tokens=max_tokens,
+        )
+
+    def generate_image(self, prompt: str, model: str = DEFAULT_IMAGE_MODEL, size: str = "1024x1024") -> str:
+        """Generate one image and return its (temporary) URL"""
+        response = self.client.images.generate(model=model, prompt=prompt, n=1, size=size)
+        return response.data[0].url
+
+    def download(self, url: str, timeout: float = DOWNLOAD_TIMEOUT_SECONDS) -> bytes:
+        """Fetch a URL (e.g. a generated image) over the pooled connection"""
+        response = self.http.get(url, timeout=timeout)
+        response.raise_for_status()
+        return response.content
+
+    def close(self):
+        self.client.close()
+
+
+_llm_gateway: Optional[LLMGateway] = None
+_llm_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Return the process-wide LLM gateway, creating it on first use"""
+    global _llm_gateway
+    with _llm_gateway_lock:
+        if _llm_gateway is None:
+            _llm_gateway = LLMGateway()
+        return _llm_gateway
@@ -1,10 +1,13 @@
 from .browser import BrowserTool
+from .browser_pool import BrowserPool, get_browser_pool
 from .locate_restaurant import LocateRestaurantTool
 from .restaurant_menu import RestaurantMenuTool
 from .restaurant_recommendations import RestaurantRecommendationsTool
 
 __all__ = [
     'BrowserTool',
+    'BrowserPool',
+    'get_browser_pool',
     'LocateRestaurantTool',
     'RestaurantMenuTool',
     'RestaurantRecommendationsTool'
@@ -0,0 +1,102 @@
+import os
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+# Shared executor for blocking tool work (Selenium, HTTP, file I/O)
+DEFAULT_EXECUTOR_WORKERS = int(os.getenv("AGENT_EXECUTOR_WORKERS", "8"))
+_executor = ThreadPoolExecutor(max_workers=DEFAULT_EXECUTOR_WORKERS, thread_name_prefix="agent-tool")
+
+logger = logging.getLogger("AsyncAdapters")
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """Run a blocking callable on the shared tool executor without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+_background_tasks = set()
+
+
+def run_in_background(func: Callable, *args, **kwargs):
+    """
+    Start a blocking callable on the shared tool executor and return without waiting.
+
+    Inside a running event loop it is scheduled as a run_blocking task (kept
+    referenced until done); from synchronous code it is submitted directly.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return _executor.submit(functools.partial(func, *args, **kwargs))
+    task = loop.create_task(run_blocking(func, *args, **kwargs))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+async def first_successful(coroutines: Iterable[Awaitable], is_success: Callable[[Any], bool] = bool,
+                           head_start: Optional[float] = None) -> Optional[Any]:
+    """
+    Race coroutines and return the first result accepted by `is_success`.
+
+    Without `head_start` all coroutines start at once. With it they start one
+    at a time in order: the next starts when every running one has failed, or
+    when none has succeeded within `head_start` seconds of the last start.
+    The losers are cancelled and coroutines never started are closed. Work
+    already running in an executor thread is not interrupted, so pass it a
+    cancel event to set once the race is decided.
+    Returns None when no coroutine succeeds.
+    """
+    waiting = list(coroutines)
+    pending = set()
+    try:
+        while waiting or pending:
+            if waiting and (head_start is None or not pending):
+                count = len(waiting) if head_start is None else 1
+                pending.update(asyncio.ensure_future(coroutine) for coroutine in waiting[:count])
+                del waiting[:count]
+            done, pending = await asyncio.wait(pending, timeout=head_start if waiting else None,
+                                               return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                logger.info(f"No result within the {head_start}s head start, starting the next task")
+                pending.add(asyncio.ensure_future(waiting.pop(0)))
+                continue
+            for task in done:
+                if task.cancelled():
+                    continue
+                if task.exception() is not None:
+                    logger.warning(f"Raced task failed: {task.exception()}")
+                    continue
+                if is_success(task.result()):
+                    return task.result()
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
+        for coroutine in waiting:
+            coroutine.close()
+
+
+class AsyncToolAdapter:
+    """
+    Exposes a synchronous tool's methods as coroutines that run on the shared executor.
+
+        menu_tool = AsyncToolAdapter(RestaurantMenuTool())
+        result = await menu_tool.get_menu("Chipotle", restaurant_url=url)
+    """
+    def __init__(self, tool):
+        self.tool = tool
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.tool, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def _call(*args, **kwargs):
+            return await run_blocking(attr, *args, **kwargs)
+        return _call
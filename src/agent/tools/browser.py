@@ -4,7 +4,7 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from .driver_resolver import resolve_chromedriver_path
 import time
 import os
 from datetime import datetime
@@ -15,8 +15,9 @@ class BrowserTool:
     """
     A tool for browsing the web using Selenium.
     """
-    def __init__(self):
+    def __init__(self, headless: bool = False):
         self.setup_logging()
+        self.headless = headless
         self.driver = None
         
     def setup_logging(self):
@@ -38,6 +39,9 @@ class BrowserTool:
         """Setup Chrome browser with necessary options"""
         try:
             chrome_options = Options()
+            if self.headless:
+                chrome_options.add_argument('--headless=new')
+                chrome_options.add_argument('--window-size=1280,3000')
             
             # Add options to make browser appear more like a regular user
             chrome_options.add_argument('--disable-blink-features=AutomationControlled')
@@ -58,9 +62,14 @@ class BrowserTool:
             # Add stealth options
             chrome_options.add_argument('--disable-blink-features')
             chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+
+            # Expose CDP Network events through the performance log for network-idle waits
+            chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
             
             # Set up the driver
-            service = Service(ChromeDriverManager().install())
+            # The driver binary is resolved once per process and remembered on disk
+            driver_path = resolve_chromedriver_path()
+            service = Service(driver_path) if driver_path else Service()
             self.driver = webdriver.Chrome(service=service, options=chrome_options)
             
             # Execute CDP commands to prevent detection
@@ -0,0 +1,199 @@
+import os
+import queue
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+from .browser import BrowserTool
+
+# Defaults, overridable through the environment
+DEFAULT_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+DEFAULT_MAX_PAGES = int(os.getenv("BROWSER_POOL_MAX_PAGES", "25"))
+DEFAULT_WARM_DRIVERS = int(os.getenv("BROWSER_POOL_WARM", "1"))
+DEFAULT_CHECKOUT_TIMEOUT = float(os.getenv("BROWSER_POOL_TIMEOUT", "60"))
+
+
+class PooledBrowser:
+    """
+    A BrowserTool owned by the pool, with the number of pages it has served.
+    """
+    def __init__(self, browser: BrowserTool):
+        self.browser = browser
+        self.pages_served = 0
+
+    @property
+    def driver(self):
+        return self.browser.driver
+
+
+class BrowserPool:
+    """
+    A process-wide pool of warm headless Chrome drivers shared by the browser tools.
+
+    Drivers are checked out with `lease()` (or `checkout()`/`checkin()`), health
+    checked before being handed out, and recycled after `max_pages` page loads.
+    """
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, max_pages: int = DEFAULT_MAX_PAGES,
+                 warm: int = DEFAULT_WARM_DRIVERS, headless: bool = True):
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self.headless = headless
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self._idle = queue.LifoQueue()  # LIFO keeps the most recently used (hottest) drivers busy
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+        if warm > 0:
+            self.warm_up(min(warm, self.size))
+
+    def warm_up(self, count: int):
+        """Pre-spawn `count` drivers in the background so the first lookup does not pay for Chrome startup"""
+        def _spawn():
+            for _ in range(count):
+                pooled = self._reserve_and_create()
+                if pooled is None:
+                    break
+                self._idle.put(pooled)
+            self.logger.info(f"Browser pool warmed with {self._idle.qsize()} driver(s)")
+
+        threading.Thread(target=_spawn, name="browser-pool-warmup", daemon=True).start()
+
+    def _reserve_and_create(self) -> Optional[PooledBrowser]:
+        """Create a new driver if the pool has capacity left, otherwise return None"""
+        with self._lock:
+            if self._closed or self._created >= self.size:
+                return None
+            self._created += 1
+
+        browser = BrowserTool(headless=self.headless)
+        if not browser.setup_browser():
+            with self._lock:
+                self._created -= 1
+            raise RuntimeError("Could not start a Chrome driver for the browser pool")
+        return PooledBrowser(browser)
+
+    def _is_healthy(self, pooled: PooledBrowser) -> bool:
+        try:
+            return pooled.driver is not None and pooled.driver.execute_script("return 1") == 1
+        except Exception as e:
+            self.logger.warning(f"Pooled driver failed health check: {str(e)}")
+            return False
+
+    def _destroy(self, pooled: PooledBrowser):
+        try:
+            pooled.browser.close()
+        finally:
+            with self._lock:
+                self._created -= 1
+
+    def checkout(self, timeout: float = DEFAULT_CHECKOUT_TIMEOUT) -> PooledBrowser:
+        """Take a healthy driver out of the pool, creating one if capacity allows"""
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                pooled = self._reserve_and_create()
+                if pooled is None:
+                    try:
+                        pooled = self._idle.get(timeout=timeout)
+                    except queue.Empty:
+                        raise TimeoutError(f"No browser available in the pool after {timeout}s")
+
+            if self._is_healthy(pooled):
+                return pooled
+            self._destroy(pooled)
+
+    def checkin(self, pooled: PooledBrowser, discard: bool = False):
+        """Return a driver to the pool, recycling it once it has served `max_pages` pages"""
+        pooled.pages_served += 1
+        if discard or self._closed or pooled.pages_served >= self.max_pages:
+            self.logger.info(f"Recycling pooled driver after {pooled.pages_served} page(s)")
+            self._destroy(pooled)
+            return
+
+        try:
+            # Drop per-site state so the next lease starts clean
+            pooled.driver.delete_all_cookies()
+            pooled.driver.get("about:blank")
+            self._drain_performance_log(pooled)
+        except Exception as e:
+            self.logger.warning(f"Could not reset pooled driver, recycling it: {str(e)}")
+            self._destroy(pooled)
+            return
+        self._idle.put(pooled)
+
+    def _drain_performance_log(self, pooled: PooledBrowser):
+        # Network events left over from the last page would look like requests still in flight
+        try:
+            pooled.driver.get_log("performance")
+        except Exception:
+            pass
+
+    @contextmanager
+    def lease(self, timeout: float = DEFAULT_CHECKOUT_TIMEOUT):
+        """
+        Context manager yielding a Selenium driver from the pool.
+
+        The driver is discarded instead of returned if the block raises.
+        """
+        pooled = self.checkout(timeout=timeout)
+        failed = False
+        try:
+            yield pooled.driver
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.checkin(pooled, discard=failed)
+
+    def shutdown(self):
+        """Close every idle driver; leased drivers are closed when they are checked in"""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._destroy(pooled)
+        self.logger.info("Browser pool shut down")
+
+
+@contextmanager
+def count_webdriver_commands(driver):
+    """
+    Count the WebDriver commands (HTTP round trips) a block sends through `driver`.
+
+    Yields a dict whose "count" (and per-command "commands") is filled in as the block runs.
+    """
+    stats = {"count": 0, "commands": {}}
+    original_execute = driver.execute
+
+    def counting_execute(driver_command, params=None):
+        stats["count"] += 1
+        stats["commands"][driver_command] = stats["commands"].get(driver_command, 0) + 1
+        return original_execute(driver_command, params)
+
+    driver.execute = counting_execute
+    try:
+        yield stats
+    finally:
+        del driver.execute  # back to the class method
+
+
+_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Return the process-wide browser pool, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+            atexit.register(_pool.shutdown)
+        return _pool
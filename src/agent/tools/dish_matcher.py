@@ -0,0 +1,84 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from .image_store import normalize_dish_name
+
+# Minimum combined score for a fuzzy match
+DEFAULT_MATCH_THRESHOLD = 0.75
+# Words that say nothing about which dish it is
+STOPWORDS = {"the", "a", "an", "and", "with", "of", "w", "our", "house", "special"}
+
+
+def _stem(token: str) -> str:
+    return token[:-1] if len(token) > 3 and token.endswith("s") and not token.endswith("ss") else token
+
+
+def dish_tokens(name: str) -> List[str]:
+    return [_stem(token) for token in normalize_dish_name(name).split() if token not in STOPWORDS]
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance with a two-row table"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def edit_similarity(a: str, b: str) -> float:
+    if not a and not b:
+        return 1.0
+    return 1.0 - edit_distance(a, b) / max(len(a), len(b))
+
+
+class DishIndex:
+    """
+    Fuzzy lookup from a dish name (as written in a recommendation) to a menu item.
+
+    Exact normalized names are a dict hit. Otherwise candidates sharing at least
+    one token come from an inverted token index and are scored by token overlap
+    (F1) and edit similarity of the normalized names, so "**Chicken Burrito
+    Bowls**" still finds "Chicken Burrito Bowl".
+    """
+    def __init__(self, menu_items: List[Dict], threshold: float = DEFAULT_MATCH_THRESHOLD):
+        self.threshold = threshold
+        self.items = [item for item in menu_items if item.get("name")]
+        self._by_name = {}
+        self._tokens = []
+        self._postings = defaultdict(set)
+        for position, item in enumerate(self.items):
+            self._by_name.setdefault(normalize_dish_name(item["name"]), item)
+            tokens = set(dish_tokens(item["name"]))
+            self._tokens.append(tokens)
+            for token in tokens:
+                self._postings[token].add(position)
+
+    def match(self, dish_name: str) -> Tuple[Optional[Dict], float]:
+        """Return (best menu item, score), or (None, best score) below the threshold"""
+        normalized = normalize_dish_name(dish_name)
+        if normalized in self._by_name:
+            return self._by_name[normalized], 1.0
+        tokens = set(dish_tokens(dish_name))
+        candidates = set()
+        for token in tokens:
+            candidates |= self._postings.get(token, set())
+
+        best_item, best_score = None, 0.0
+        for position in candidates:
+            item_tokens = self._tokens[position]
+            shared = len(tokens & item_tokens)
+            overlap = 2 * shared / (len(tokens) + len(item_tokens))
+            if shared == len(tokens) >= 2:
+                # Every word of a multi-word name appears in the menu item ("Burrito Bowl")
+                overlap = max(overlap, 0.95)
+            score = 0.5 * overlap + 0.5 * edit_similarity(normalized, normalize_dish_name(self.items[position]["name"]))
+            if score > best_score:
+                best_item, best_score = self.items[position], score
+        if best_score >= self.threshold:
+            return best_item, best_score
+        return None, best_score
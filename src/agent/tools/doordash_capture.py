@@ -0,0 +1,207 @@
+import re
+import json
+import base64
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from selenium.common.exceptions import WebDriverException
+
+# Store/menu API responses worth reading (GraphQL store page feed, menu and item endpoints)
+MENU_RESPONSE_PATTERN = re.compile(r"graphql|storepage|store_page|/menu|itempage|item_page", re.IGNORECASE)
+MAX_CAPTURED_RESPONSES = 25
+
+# Serialized state the page embeds for hydration (Next.js data, Apollo cache, other JSON script tags)
+EMBEDDED_STATE_SCRIPT = """
+const blobs = [];
+for (const script of document.querySelectorAll("script[type='application/json'], script#__NEXT_DATA__")) {
+    if (script.textContent && script.textContent.length > 2) blobs.push(script.textContent);
+}
+for (const name of ["__APOLLO_STATE__", "__PRELOADED_STATE__", "__INITIAL_STATE__"]) {
+    try {
+        if (window[name]) blobs.push(JSON.stringify(window[name]));
+    } catch (e) {}
+}
+return blobs;
+"""
+
+NAME_KEYS = ("name", "displayName")
+PRICE_KEYS = ("displayPrice", "priceDisplayString", "price", "unitAmount")
+# Keys of a nested price object ({"unitAmount": 1149, "displayString": "$11.49"})
+PRICE_OBJECT_KEYS = ("displayString", "unitAmount", "amount")
+ID_KEYS = ("id", "itemId", "menuItemId")
+DESCRIPTION_KEYS = ("description", "displayDescription")
+IMAGE_KEYS = ("imageUrl", "imgUrl", "image", "imageUrlWithSizing")
+# Store-feed lists that repeat items from their real category
+CAROUSEL_PATTERN = re.compile(r"popular|most ordered|featured|recommended|picked for you", re.IGNORECASE)
+
+logger = logging.getLogger("DoorDashCapture")
+
+
+def _format_price(value) -> str:
+    """Price display string; integer amounts are treated as cents"""
+    if isinstance(value, dict):
+        for key in PRICE_OBJECT_KEYS:
+            if key in value:
+                return _format_price(value[key])
+        return ""
+    if isinstance(value, bool) or value is None:
+        return ""
+    if isinstance(value, int):
+        return f"${value / 100:.2f}"
+    if isinstance(value, float):
+        return f"${value:.2f}"
+    text = str(value).strip()
+    return text if re.search(r"\d", text) else ""
+
+
+def _image_url(value) -> str:
+    if isinstance(value, dict):
+        return str(value.get("url") or value.get("uri") or "")
+    return str(value or "") if str(value or "").startswith("http") else ""
+
+
+def _first_value(node: Dict, keys: Iterable[str]):
+    for key in keys:
+        if node.get(key) not in (None, ""):
+            return node[key]
+    return None
+
+
+def _as_menu_item(node: Dict, category: str = "") -> Optional[Dict]:
+    """A menu item dict from a JSON object that has a name and a price, else None"""
+    name = _first_value(node, NAME_KEYS)
+    if not isinstance(name, str) or not name.strip():
+        return None
+    price = _format_price(_first_value(node, PRICE_KEYS))
+    if not price:
+        return None
+    description = _first_value(node, DESCRIPTION_KEYS)
+    return {
+        "name": name.strip(),
+        "price": price,
+        "ingredients": description.strip() if isinstance(description, str) else "",
+        "image_url": _image_url(_first_value(node, IMAGE_KEYS)),
+        "category": category,
+        "meal_time": "",
+        "reviews": []
+    }
+
+
+def _item_candidates(payload) -> Iterable[Tuple[Dict, str, int]]:
+    """
+    Yield (item node, category, rank) in document order. Items of a store feed's
+    `itemLists[*].items` carry the list name as category (rank 2, or 1 for
+    carousels like "Popular Items"); any other object with an item id, a name
+    and a price is an item without category (rank 0). Fees, ratings and other
+    priced objects without an id are not items.
+    """
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+            continue
+        if not isinstance(node, dict):
+            continue
+        item_lists = node.get("itemLists")
+        if isinstance(item_lists, list):
+            for item_list in item_lists:
+                if not isinstance(item_list, dict) or not isinstance(item_list.get("items"), list):
+                    continue
+                category = str(_first_value(item_list, NAME_KEYS) or "").strip()
+                rank = 1 if CAROUSEL_PATTERN.search(category) else 2
+                for item in item_list["items"]:
+                    if isinstance(item, dict):
+                        yield item, category, rank
+        elif _first_value(node, ID_KEYS) is not None and _first_value(node, PRICE_KEYS) is not None:
+            yield node, "", 0
+            continue
+        stack.extend(reversed([value for key, value in node.items()
+                               if key != "itemLists" and isinstance(value, (dict, list))]))
+
+
+def menu_items_from_json(payloads: Iterable) -> List[Dict]:
+    """
+    Menu items from decoded store/menu JSON payloads, deduplicated by (name, price).
+    An item listed several times keeps the category of its real item list over
+    carousels and uncategorized occurrences, and the position of its first one.
+    """
+    items: Dict[Tuple[str, str], Dict] = {}
+    ranks: Dict[Tuple[str, str], int] = {}
+    for payload in payloads:
+        for node, category, rank in _item_candidates(payload):
+            item = _as_menu_item(node, category)
+            if not item:
+                continue
+            key = (item["name"].lower(), item["price"])
+            if key not in items:
+                items[key], ranks[key] = item, rank
+            elif rank > ranks[key]:
+                items[key]["category"], ranks[key] = category, rank
+                for field in ("ingredients", "image_url"):
+                    items[key][field] = items[key][field] or item[field]
+    return list(items.values())
+
+
+class NetworkMenuCapture:
+    """
+    Collects DoorDash store/menu API responses from CDP Network events.
+
+    Pass `observe` as the `network_listener` of wait_for_page; afterwards
+    `menu_items(driver)` reads the matching response bodies (and the page's
+    embedded state) and builds menu items from the JSON, without scrolling or
+    rendering the menu.
+    """
+    def __init__(self, max_responses: int = MAX_CAPTURED_RESPONSES):
+        self.max_responses = max_responses
+        self.candidates = {}  # requestId -> url
+        self.finished = set()
+
+    def observe(self, message: Dict):
+        method = message.get("method")
+        params = message.get("params", {})
+        if method == "Network.responseReceived":
+            response = params.get("response", {})
+            url = response.get("url", "")
+            if "json" in (response.get("mimeType") or "") and MENU_RESPONSE_PATTERN.search(url) \
+                    and len(self.candidates) < self.max_responses:
+                self.candidates[params.get("requestId")] = url
+        elif method == "Network.loadingFinished":
+            self.finished.add(params.get("requestId"))
+
+    def _response_payloads(self, driver) -> List:
+        payloads = []
+        for request_id, url in self.candidates.items():
+            if request_id not in self.finished:
+                continue
+            try:
+                body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+                text = body.get("body", "")
+                if body.get("base64Encoded"):
+                    text = base64.b64decode(text).decode("utf-8", errors="replace")
+                payloads.append(json.loads(text))
+            except (WebDriverException, ValueError) as e:
+                logger.debug(f"Could not read response body for {url}: {e}")
+        return payloads
+
+    def _embedded_payloads(self, driver) -> List:
+        payloads = []
+        try:
+            blobs = driver.execute_script(EMBEDDED_STATE_SCRIPT) or []
+        except WebDriverException as e:
+            logger.debug(f"Could not read embedded state: {e}")
+            return payloads
+        for blob in blobs:
+            try:
+                payloads.append(json.loads(blob))
+            except (TypeError, ValueError):
+                continue
+        return payloads
+
+    def menu_items(self, driver) -> List[Dict]:
+        responses = self._response_payloads(driver)
+        items = menu_items_from_json(responses)
+        if not items:
+            items = menu_items_from_json(self._embedded_payloads(driver))
+        logger.info(f"Captured {len(items)} menu items from {len(responses)} API response(s)")
+        return items
@@ -0,0 +1,168 @@
+import os
+import re
+import json
+import time
+import shutil
+import logging
+import platform
+import threading
+import subprocess
+from datetime import datetime
+from typing import Optional
+
+# Constants
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../"))
+MANIFEST_PATH = os.getenv(
+    "CHROMEDRIVER_MANIFEST",
+    os.path.join(PROJECT_ROOT, "data", "drivers", "chromedriver_manifest.json")
+)
+
+CHROME_BINARIES = [
+    "google-chrome",
+    "google-chrome-stable",
+    "chromium",
+    "chromium-browser",
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+]
+VERSION_PATTERN = re.compile(r"(\d+)\.(\d+)\.(\d+)\.(\d+)")
+# After a failed resolution, how long callers get None before the (slow) lookup is tried again
+RESOLVE_RETRY_SECONDS = int(os.getenv("CHROMEDRIVER_RESOLVE_RETRY", "600"))
+
+logger = logging.getLogger("DriverResolver")
+
+_UNRESOLVED = object()
+_resolved_path = _UNRESOLVED  # path, None after a failure, or _UNRESOLVED before the first attempt
+_failed_at = 0.0
+_resolve_lock = threading.Lock()
+
+
+def _run_version_command(args) -> Optional[str]:
+    try:
+        output = subprocess.run(args, capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = VERSION_PATTERN.search(output or "")
+    return match.group(0) if match else None
+
+
+def detect_chrome_version() -> Optional[str]:
+    """Return the installed Chrome version (e.g. '122.0.6261.94') without touching the network"""
+    binary = os.getenv("CHROME_BINARY")
+    candidates = [binary] if binary else CHROME_BINARIES
+
+    for candidate in candidates:
+        path = candidate if os.path.isabs(candidate) else shutil.which(candidate)
+        if path and os.path.exists(path):
+            version = _run_version_command([path, "--version"])
+            if version:
+                return version
+
+    if platform.system() == "Windows":
+        # Chrome on Windows does not print its version, read it from the registry instead
+        return _run_version_command([
+            "reg", "query", r"HKEY_CURRENT_USER\Software\Google\Chrome\BLBeacon", "/v", "version"
+        ])
+    return None
+
+
+def detect_driver_version(driver_path: str) -> Optional[str]:
+    """Return the version reported by a chromedriver binary"""
+    return _run_version_command([driver_path, "--version"])
+
+
+def _major(version: Optional[str]) -> Optional[str]:
+    return version.split(".", 1)[0] if version else None
+
+
+def _load_manifest() -> dict:
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(driver_path: str, chrome_version: Optional[str], source: str):
+    try:
+        os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+        tmp_path = MANIFEST_PATH + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "driver_path": driver_path,
+                "chrome_version": chrome_version,
+                "source": source,
+                "resolved_at": datetime.now().isoformat()
+            }, f, indent=2)
+        os.replace(tmp_path, MANIFEST_PATH)  # atomic, so concurrent workers never read half a file
+    except OSError as e:
+        logger.warning(f"Could not write chromedriver manifest: {str(e)}")
+
+
+def _matches_chrome(driver_path: str, chrome_version: Optional[str]) -> bool:
+    """A local driver is usable when it exists and its major version matches Chrome's"""
+    if not driver_path or not os.path.isfile(driver_path):
+        return False
+    if not chrome_version:
+        return True  # Chrome version unknown offline, trust the binary we were given
+    return _major(detect_driver_version(driver_path)) == _major(chrome_version)
+
+
+def _resolve_uncached() -> Optional[str]:
+    chrome_version = detect_chrome_version()
+
+    # 1. Explicit override always wins
+    env_path = os.getenv("CHROMEDRIVER_PATH")
+    if env_path and os.path.isfile(env_path):
+        logger.info(f"Using chromedriver from CHROMEDRIVER_PATH: {env_path}")
+        return env_path
+
+    # 2. Manifest from a previous process, valid while the Chrome version is unchanged
+    manifest = _load_manifest()
+    manifest_path = manifest.get("driver_path")
+    if manifest_path and os.path.isfile(manifest_path) and (
+            chrome_version is None or manifest.get("chrome_version") == chrome_version):
+        logger.info(f"Using chromedriver from manifest: {manifest_path}")
+        return manifest_path
+
+    # 3. Binaries already on this machine (project directory, then PATH) - no network needed
+    for source, candidate in [("project", os.path.join(PROJECT_ROOT, "chromedriver")),
+                              ("project", os.path.join(PROJECT_ROOT, "chromedriver.exe")),
+                              ("path", shutil.which("chromedriver"))]:
+        if candidate and _matches_chrome(candidate, chrome_version):
+            logger.info(f"Using local chromedriver: {candidate}")
+            _save_manifest(candidate, chrome_version, source)
+            return candidate
+
+    # 4. Last resort: download through webdriver-manager (needs network)
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+        downloaded = ChromeDriverManager().install()
+        logger.info(f"Downloaded chromedriver via webdriver-manager: {downloaded}")
+        _save_manifest(downloaded, chrome_version, "webdriver-manager")
+        return downloaded
+    except Exception as e:
+        logger.warning(f"webdriver-manager could not resolve chromedriver: {str(e)}")
+
+    # A stale manifest entry is still better than nothing when we are offline
+    if manifest_path and os.path.isfile(manifest_path):
+        logger.warning(f"Falling back to stale chromedriver from manifest: {manifest_path}")
+        return manifest_path
+    return None
+
+
+def resolve_chromedriver_path(force: bool = False) -> Optional[str]:
+    """
+    Resolve the chromedriver binary once per process.
+
+    Returns None when no driver could be found, in which case Selenium Manager
+    gets a chance to locate one itself. A failure is cached too and only retried
+    after RESOLVE_RETRY_SECONDS, or right away with `force`.
+    """
+    global _resolved_path, _failed_at
+    with _resolve_lock:
+        retry_due = _resolved_path is None and time.monotonic() - _failed_at >= RESOLVE_RETRY_SECONDS
+        if force or retry_due or _resolved_path is _UNRESOLVED:
+            _resolved_path = _resolve_uncached()
+            if _resolved_path is None:
+                _failed_at = time.monotonic()
+        return _resolved_path
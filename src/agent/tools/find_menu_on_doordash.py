@@ -1,78 +1,181 @@
-from .browser import BrowserTool
-import time
+from .browser_pool import get_browser_pool
+from .doordash_capture import NetworkMenuCapture
+from .google_results_parser import parse_google_results
+from .wait_strategies import profile_for_url, wait_for_page
+import os
 import re
 import logging
+import threading
+from typing import Dict, List, Optional
+from urllib.parse import quote_plus
 from bs4 import BeautifulSoup
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+# "script" collects the whole menu with one execute_script call; "elements" uses per-element WebDriver calls
+DEFAULT_EXTRACTION_MODE = os.getenv("DOORDASH_EXTRACTION_MODE", "script")
+# "network" builds the menu from the store/menu API JSON and only scrolls the DOM when that yields nothing;
+# "dom" always scrolls and scrapes the rendered menu
+DEFAULT_CAPTURE_MODE = os.getenv("DOORDASH_CAPTURE_MODE", "network")
+
+# Runs in the page: every MenuItem block with its name, price, description and the
+# src of the first StyledImg whose alt text contains the dish name
+EXTRACT_MENU_ITEMS_SCRIPT = """
+const text = (el) => (el && el.innerText ? el.innerText.trim() : "");
+const images = Array.from(document.querySelectorAll("img[class*='StyledImg']"))
+    .map((img) => ({alt: (img.getAttribute("alt") || "").toLowerCase(), src: img.getAttribute("src") || ""}))
+    .filter((img) => img.alt);
+const byAlt = new Map();
+for (const img of images) {
+    if (!byAlt.has(img.alt)) byAlt.set(img.alt, img.src);
+}
+const findImage = (name) => {
+    const key = name.toLowerCase();
+    if (byAlt.has(key)) return byAlt.get(key);
+    const match = images.find((img) => img.alt.includes(key));
+    return match ? match.src : "";
+};
+const items = [];
+for (const block of document.querySelectorAll("div[data-anchor-id='MenuItem']")) {
+    const name = text(block.querySelector("h3"));
+    const price = block.querySelector("span[class*='Price']");
+    if (!name || !price) continue;
+    items.push({name: name, price: text(price), description: text(block.querySelector("p")), image_url: findImage(name)});
+}
+return items;
+"""
+
+
+def _menu_item(name: str, price: str, description: str, image_url: str) -> Dict:
+    return {
+        "name": name,
+        "price": price,
+        "ingredients": description,
+        "image_url": image_url or "",
+        "category": "",
+        "meal_time": "",
+        "reviews": []
+    }
+
+
 class FindMenuOnDeliverySiteTool:
-    def __init__(self):
-        self.browser = BrowserTool()
+    def __init__(self, extraction_mode: str = DEFAULT_EXTRACTION_MODE, capture_mode: str = DEFAULT_CAPTURE_MODE):
+        self.browser_pool = get_browser_pool()
+        self.extraction_mode = extraction_mode
+        self.capture_mode = capture_mode
         self.logger = logging.getLogger(self.__class__.__name__)
-        
-    def find_doordash_menu(self, restaurant_name: str, zipcode: str) -> dict:
+
+    def _extract_items_with_script(self, driver) -> List[Dict]:
+        """All menu items in one WebDriver round trip; image matching happens in the browser"""
+        payload = driver.execute_script(EXTRACT_MENU_ITEMS_SCRIPT)
+        if not isinstance(payload, list):
+            raise ValueError(f"Unexpected extraction payload: {type(payload).__name__}")
+        return [
+            _menu_item(entry.get("name", ""), entry.get("price", ""), entry.get("description", ""), entry.get("image_url", ""))
+            for entry in payload if isinstance(entry, dict) and entry.get("name")
+        ]
+
+    def _extract_items_with_elements(self, driver) -> List[Dict]:
+        """Per-element extraction (several WebDriver round trips per item)"""
+        # Cache all <img> tags globally with class StyledImg
+        img_elements = driver.find_elements(By.XPATH, "//img[contains(@class, 'StyledImg')]")
+
+        items = driver.find_elements(By.CSS_SELECTOR, "div[data-anchor-id='MenuItem']")
+        menu_items = []
+
+        for item in items:
+            try:
+                name = item.find_element(By.CSS_SELECTOR, "h3").text
+                price = item.find_element(By.CSS_SELECTOR, "span[class*='Price']").text
+                description = ""
+                p_tags = item.find_elements(By.CSS_SELECTOR, "p")
+                if p_tags:
+                    description = p_tags[0].text
+
+                img_url = ""
+
+                # Match <img alt="Dish name"> to dish name
+                for img in img_elements:
+                    alt_text = img.get_attribute("alt")
+                    if alt_text and name.lower() in alt_text.lower():
+                        img_url = img.get_attribute("src")
+                        break
+
+                menu_items.append(_menu_item(name, price, description, img_url))
+
+            except Exception as e:
+                self.logger.error(f"Error parsing menu item: {e}")
+                continue
+        return menu_items
+
+    def extract_menu_items(self, driver) -> List[Dict]:
+        """Extract menu items from a loaded DoorDash store page"""
+        if self.extraction_mode == "script":
+            try:
+                return self._extract_items_with_script(driver)
+            except (WebDriverException, ValueError) as e:
+                self.logger.warning(f"Script extraction failed, falling back to per-element extraction: {e}")
+        return self._extract_items_with_elements(driver)
+
+    def _search_google_for_doordash(self, query: str) -> Optional[str]:
+        """First DoorDash store URL in the Google results for `query`"""
+        with self.browser_pool.lease() as driver:
+            driver.get(f"https://www.google.com/search?q={quote_plus(query)}")
+            wait_for_page(driver)
+            parsed = parse_google_results(driver.page_source, driver.current_url)
+        for result in parsed["results"]:
+            if "doordash.com" in result["url"]:
+                return result["url"]
+        return None
+
+    def _load_menu_items(self, driver, url: str) -> List[Dict]:
+        """
+        Load a store page and return its menu items: from the captured store/menu
+        API JSON when possible, otherwise by scrolling and scraping the DOM.
+        """
+        if self.capture_mode == "network":
+            capture = NetworkMenuCapture()
+            try:
+                driver.execute_cdp_cmd("Network.enable", {})
+            except WebDriverException as e:
+                self.logger.debug(f"Could not enable CDP Network domain: {e}")
+            driver.get(url)
+            # No scrolling: the menu JSON arrives with the first render
+            wait_for_page(driver, url, profile=dict(profile_for_url(url), scroll=False),
+                          network_listener=capture.observe)
+            menu_items = capture.menu_items(driver)
+            if menu_items:
+                self.logger.info(f"Extracted {len(menu_items)} items from network JSON")
+                return menu_items
+            self.logger.info("No menu JSON captured, falling back to DOM extraction")
+        else:
+            driver.get(url)
+
+        # Wait for the menu to render, scrolling until lazy-loaded sections stop appearing
+        wait_for_page(driver, url)
+        menu_items = self.extract_menu_items(driver)
+        self.logger.info(f"Extracted {len(menu_items)} items ({self.extraction_mode} mode)")
+        return menu_items
+
+    def find_doordash_menu(self, restaurant_name: str, zipcode: str,
+                           cancel_event: Optional[threading.Event] = None) -> dict:
         try:
             self.logger.info(f"Searching DoorDash menu for {restaurant_name} in {zipcode}")
             query = f"{restaurant_name} site:doordash.com/menu {zipcode}"
             url = self._search_google_for_doordash(query)
             if not url:
                 return {"status": "error", "message": "Could not find DoorDash URL"}
+            if cancel_event is not None and cancel_event.is_set():
+                return {"status": "cancelled", "message": "DoorDash lookup cancelled"}
 
             self.logger.info(f"Opening URL: {url}")
-            driver = self.browser.setup_browser()
-            driver.get(url)
-            time.sleep(5)
-
-            # Scroll to load content
-            scroll_pause = 0.5
-            scroll_height = driver.execute_script("return document.body.scrollHeight")
-            for i in range(0, scroll_height, 500):
-                driver.execute_script(f"window.scrollTo(0, {i});")
-                time.sleep(scroll_pause)
-
-            # Cache all <img> tags globally with class StyledImg
-            img_elements = driver.find_elements(By.XPATH, "//img[contains(@class, 'StyledImg')]")
-
-            items = driver.find_elements(By.CSS_SELECTOR, "div[data-anchor-id='MenuItem']")
-            menu_items = []
-
-            for item in items:
-                try:
-                    name = item.find_element(By.CSS_SELECTOR, "h3").text
-                    price = item.find_element(By.CSS_SELECTOR, "span[class*='Price']").text
-                    description = ""
-                    p_tags = item.find_elements(By.CSS_SELECTOR, "p")
-                    if p_tags:
-                        description = p_tags[0].text
-
-                    img_url = ""
-
-                    # Match <img alt="Dish name"> to dish name
-                    for img in img_elements:
-                        alt_text = img.get_attribute("alt")
-                        if alt_text and name.lower() in alt_text.lower():
-                            img_url = img.get_attribute("src")
-                            break
-
-                    menu_items.append({
-                        "name": name,
-                        "price": price,
-                        "ingredients": description,
-                        "image_url": img_url,
-                        "category": "",
-                        "meal_time": "",
-                        "reviews": []
-                    })
-
-                except Exception as e:
-                    self.logger.error(f"Error parsing menu item: {e}")
-                    continue
-
+            with self.browser_pool.lease() as driver:
+                menu_items = self._load_menu_items(driver, url)
 
             # Save raw menu with image URLs to a .txt file
-            save_path = f"data/menus/{restaurant_name.lower().replace(' ', '_')}_{zipcode}_menu.txt"
+            save_path = f"data/menus/{restaurant_name.lower().replace(' ', '_')}_{zipcode}_doordash_items.txt"
             with open(save_path, "w", encoding="utf-8") as f:
                 for entry in menu_items:
                     f.write(f"{entry['name']}\n")
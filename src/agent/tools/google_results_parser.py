@@ -0,0 +1,97 @@
+from typing import Dict, List, Optional
+
+from lxml import html as lxml_html
+
+MAX_RESULTS = 5
+
+ADDRESS_XPATH = "//div[@data-attrid='kc:/location/location:address']"
+HOURS_XPATH = "//div[@data-attrid='kc:/location/location:hours']"
+PHONE_XPATH = "//div[@data-attrid='kc:/collection/knowledge_panels/has_phone:phone']"
+WEBSITE_XPATH = "//a[@data-url]"
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Organic result containers (the same ones the per-element search used: div.g, div.tF2Cxc, div.yuRUbf)
+RESULT_XPATH = f"//div[{_has_class('g')} or {_has_class('tF2Cxc')} or {_has_class('yuRUbf')}]"
+SNIPPET_XPATH = f".//div[{_has_class('VwiC3b')} or {_has_class('IsZvec')}]"
+
+
+NON_TEXT_TAGS = {"script", "style", "noscript", "template"}
+
+
+def _text(element) -> str:
+    """Visible-ish text of an element: its text nodes (outside script/style) joined by single spaces"""
+    if element is None:
+        return ""
+    if not isinstance(element.tag, str) or element.tag in NON_TEXT_TAGS:
+        # Comments and non-rendered elements only contribute their tail, which the parent adds
+        return ""
+    parts = []
+    if element.text:
+        parts.append(element.text)
+    for child in element:
+        parts.append(_text(child))
+        if child.tail:
+            parts.append(child.tail)
+    return " ".join(part.strip() for part in parts if part and part.strip())
+
+
+def _first(tree, xpath: str):
+    found = tree.xpath(xpath)
+    return found[0] if found else None
+
+
+def parse_knowledge_panel(tree, page_url: str = "") -> Optional[Dict]:
+    """Address, hours, phone and website from the Maps knowledge panel, or None without one"""
+    address = _first(tree, ADDRESS_XPATH)
+    if address is None:
+        return None
+    website = _first(tree, WEBSITE_XPATH)
+    return {
+        "address": _text(address),
+        "hours": _text(_first(tree, HOURS_XPATH)) or "Hours not available",
+        "phone": _text(_first(tree, PHONE_XPATH)) or "Phone not available",
+        "url": (website.get("href") if website is not None else "") or page_url,
+    }
+
+
+def parse_organic_results(tree, limit: int = MAX_RESULTS) -> List[Dict]:
+    """Title, URL and snippet of the top organic results, deduplicated by URL"""
+    results = []
+    seen_urls = set()
+    for container in tree.xpath(RESULT_XPATH):
+        title = _first(container, ".//h3")
+        # Prefer the link wrapping the title over any other link in the container
+        link = _first(container, ".//a[@href][.//h3]")
+        if link is None:
+            link = _first(container, ".//a[@href]")
+        snippet = _first(container, SNIPPET_XPATH)
+        if title is None or link is None or snippet is None:
+            continue
+        url = link.get("href")
+        if not url or url in seen_urls:
+            continue
+        seen_urls.add(url)
+        results.append({"title": _text(title), "url": url, "description": _text(snippet)})
+        if len(results) >= limit:
+            break
+    return results
+
+
+def parse_google_results(page_source: str, page_url: str = "") -> Dict:
+    """
+    Parse a Google results page snapshot.
+
+    Returns {"panel": knowledge panel dict or None, "results": organic results}.
+    """
+    tree = lxml_html.fromstring(page_source or "<html></html>")
+    if page_url:
+        # Relative links (e.g. "/url?q=...") resolve against the page, like WebElement.get_attribute("href")
+        tree.make_links_absolute(page_url, resolve_base_href=True)
+    return {
+        "panel": parse_knowledge_panel(tree, page_url),
+        "results": parse_organic_results(tree),
+    }
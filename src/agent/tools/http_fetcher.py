@@ -0,0 +1,221 @@
+import os
+import re
+import json
+import codecs
+import time
+import logging
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .browser_pool import get_browser_pool
+from .menu_parser import has_price_signal
+from .visible_text import extract_visible_menu_text
+from .wait_strategies import wait_for_page
+
+# Constants
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../"))
+TIER_MEMORY_PATH = os.path.join(PROJECT_ROOT, "data/menus/cache/fetch_tiers.json")
+# How long a per-domain decision is trusted before the HTTP tier is probed again
+DEFAULT_TIER_TTL_SECONDS = int(os.getenv("FETCH_TIER_TTL", str(7 * 24 * 60 * 60)))
+# "auto" tries HTTP first, "browser" always uses Chrome (the previous behaviour)
+DEFAULT_FETCH_MODE = os.getenv("MENU_FETCH_MODE", "auto")
+HTTP_TIMEOUT = (5, 15)  # (connect, read) seconds
+HTTP_POOL_SIZE = 10
+MIN_HTTP_PRICES = 3
+
+TIER_HTTP = "http"
+TIER_BROWSER = "browser"
+
+REQUEST_HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+# JSON-LD blocks that describe a menu (schema.org Menu / MenuItem / Restaurant with hasMenu)
+JSONLD_MENU_PATTERN = re.compile(
+    r"<script[^>]+application/ld\+json[^>]*>[^<]*\"(?:Menu|MenuItem|MenuSection|hasMenu)\"", re.IGNORECASE
+)
+# <meta charset="utf-8"> or <meta http-equiv="Content-Type" content="text/html; charset=utf-8">
+META_CHARSET_PATTERN = re.compile(rb"<meta[^>]+charset=[\"']?([A-Za-z0-9_.:-]+)", re.IGNORECASE)
+
+
+def has_menu_signal(html: str) -> bool:
+    """True when server-rendered HTML already carries the menu (JSON-LD menu or enough visible prices)"""
+    if not html:
+        return False
+    if JSONLD_MENU_PATTERN.search(html):
+        return True
+    return has_price_signal(extract_visible_menu_text(html), min_prices=MIN_HTTP_PRICES)
+
+
+def decode_html(response: requests.Response) -> str:
+    """
+    Response body as text. Without a charset in Content-Type, requests assumes
+    ISO-8859-1 for text/html; use the page's <meta charset> (or a detected
+    encoding) instead, so UTF-8 dish names and "€" prices survive.
+    """
+    if "charset" not in response.headers.get("Content-Type", "").lower():
+        match = META_CHARSET_PATTERN.search(response.content[:4096])
+        encoding = match.group(1).decode("ascii") if match else None
+        if encoding:
+            try:
+                codecs.lookup(encoding)
+            except LookupError:
+                encoding = None
+        response.encoding = encoding or response.apparent_encoding or "utf-8"
+    return response.text
+
+
+def _domain(url: str) -> str:
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class TieredFetcher:
+    """
+    Fetches restaurant pages with a plain HTTP GET first and Chrome only when needed.
+
+    The HTTP tier uses one pooled keep-alive `requests.Session` with compression.
+    A response without menu signal (client-rendered shells, bot walls, error
+    statuses) is escalated to a pooled browser. Which tier worked is remembered
+    per domain on disk, so known JavaScript sites go straight to the browser and
+    static sites never launch one; failed requests are not remembered, only
+    pages that loaded without a menu.
+    """
+    def __init__(self, memory_path: str = TIER_MEMORY_PATH, ttl_seconds: int = DEFAULT_TIER_TTL_SECONDS,
+                 mode: str = DEFAULT_FETCH_MODE):
+        self.memory_path = memory_path
+        self.ttl_seconds = ttl_seconds
+        self.mode = mode
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._lock = threading.Lock()
+        self.session = self._create_session()
+        self._tiers = self._load_memory()
+        self.stats = {TIER_HTTP: 0, TIER_BROWSER: 0, "escalations": 0}
+
+    @staticmethod
+    def _create_session() -> requests.Session:
+        session = requests.Session()
+        retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update(REQUEST_HEADERS)
+        return session
+
+    def _load_memory(self) -> Dict[str, Dict]:
+        try:
+            with open(self.memory_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_memory(self):
+        os.makedirs(os.path.dirname(self.memory_path), exist_ok=True)
+        tmp_path = self.memory_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._tiers, f)
+        os.replace(tmp_path, self.memory_path)
+
+    def remembered_tier(self, url: str) -> Optional[str]:
+        with self._lock:
+            entry = self._tiers.get(_domain(url))
+            if entry and time.time() - entry.get("decided_at", 0) <= self.ttl_seconds:
+                return entry.get("tier")
+        return None
+
+    def remember(self, url: str, tier: str):
+        domain = _domain(url)
+        if not domain:
+            return
+        with self._lock:
+            if self._tiers.get(domain, {}).get("tier") == tier:
+                self._tiers[domain]["decided_at"] = time.time()
+            else:
+                self.logger.info(f"Remembering {tier} tier for {domain}")
+                self._tiers[domain] = {"tier": tier, "decided_at": time.time()}
+            try:
+                self._save_memory()
+            except OSError as e:
+                self.logger.warning(f"Could not save fetch tier memory: {e}")
+
+    def fetch_http(self, url: str) -> Optional[str]:
+        """Page HTML of a 200 HTML response to a plain GET, or None for errors, other statuses and non-HTML"""
+        try:
+            response = self.session.get(url, timeout=HTTP_TIMEOUT)
+        except requests.RequestException as e:
+            self.logger.info(f"HTTP fetch failed for {url}: {e}")
+            return None
+        if response.status_code != 200:
+            self.logger.info(f"HTTP fetch of {url} returned {response.status_code}")
+            return None
+        if "html" not in response.headers.get("Content-Type", "html"):
+            return None
+        return decode_html(response)
+
+    def fetch_browser(self, url: str, screenshot_path: Optional[str] = None) -> str:
+        """Page HTML rendered in a pooled Chrome driver, with an optional full-page screenshot"""
+        with get_browser_pool().lease() as driver:
+            driver.get(url)
+            driver.set_window_size(1280, 3000)
+
+            # Let the page settle before capturing it, so the screenshot shows the rendered menu
+            wait_for_page(driver, url)
+            if screenshot_path:
+                driver.save_screenshot(screenshot_path)
+            return driver.page_source
+
+    def fetch(self, url: str, screenshot_path: Optional[str] = None, force_browser: bool = False) -> Dict:
+        """
+        Fetch a page through the cheapest tier that yields menu content.
+
+        Returns {"html", "tier", "screenshot_path", "elapsed"}; `screenshot_path`
+        is None unless the browser tier was used.
+        """
+        start = time.monotonic()
+        use_browser = force_browser or self.mode == TIER_BROWSER or self.remembered_tier(url) == TIER_BROWSER
+        if not use_browser:
+            html = self.fetch_http(url)
+            if has_menu_signal(html):
+                self.remember(url, TIER_HTTP)
+                self.stats[TIER_HTTP] += 1
+                elapsed = time.monotonic() - start
+                self.logger.info(f"[HTTP] Fetched {url} in {elapsed:.2f}s without a browser")
+                return {"html": html, "tier": TIER_HTTP, "screenshot_path": None, "elapsed": elapsed}
+            if html is None:
+                # Errors and timeouts may be transient, so they do not pin the domain to the browser
+                self.logger.info(f"HTTP fetch of {url} failed, using the browser this time")
+            else:
+                self.logger.info(f"No menu signal in static HTML of {url}, escalating to the browser")
+                self.remember(url, TIER_BROWSER)
+            self.stats["escalations"] += 1
+
+        html = self.fetch_browser(url, screenshot_path)
+        self.stats[TIER_BROWSER] += 1
+        elapsed = time.monotonic() - start
+        self.logger.info(f"[BROWSER] Fetched {url} in {elapsed:.2f}s")
+        return {"html": html, "tier": TIER_BROWSER, "screenshot_path": screenshot_path, "elapsed": elapsed}
+
+    def close(self):
+        self.session.close()
+
+
+_fetcher: Optional[TieredFetcher] = None
+_fetcher_lock = threading.Lock()
+
+
+def get_tiered_fetcher() -> TieredFetcher:
+    """Return the process-wide tiered fetcher, creating it on first use"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = TieredFetcher()
+        return _fetcher
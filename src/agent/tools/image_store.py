@@ -0,0 +1,211 @@
+import os
+import re
+import io
+import json
+import time
+import base64
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from PIL import Image
+
+# Constants
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../"))
+IMAGE_DIR = os.path.join(PROJECT_ROOT, "data/images")
+DEFAULT_MAX_BYTES = int(float(os.getenv("IMAGE_STORE_MAX_MB", "200")) * 1024 * 1024)
+DEFAULT_MAX_AGE_SECONDS = int(os.getenv("IMAGE_STORE_MAX_AGE", str(30 * 24 * 60 * 60)))
+# Reads persist their access time to the index at most this often
+INDEX_SAVE_INTERVAL_SECONDS = 30
+THUMBNAIL_SIZE = (320, 320)  # chat messages show images at most 300px wide
+THUMBNAIL_QUALITY = 80
+
+
+def normalize_dish_name(name: str) -> str:
+    """Lowercase, drop markdown/punctuation and collapse whitespace"""
+    name = re.sub(r"[*_`#]", "", name or "").lower()
+    return " ".join(re.findall(r"[^\W_]+", name))
+
+
+def hash_prompt(prompt: str) -> str:
+    return hashlib.sha256((prompt or "").encode("utf-8")).hexdigest()
+
+
+class ImageStore:
+    """
+    On-disk, content-addressed store of generated dish images keyed by
+    (restaurant, normalized dish name, prompt hash).
+
+    Each entry keeps the original image plus a pre-rendered JPEG thumbnail, so
+    repeat requests are served from local files (or data URIs for the chat UI)
+    instead of a new generation or an expiring remote URL. Entries older than
+    `max_age_seconds` are dropped, then the least recently used ones until the
+    store fits in `max_bytes`.
+    """
+    def __init__(self, image_dir: str = IMAGE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age_seconds: int = DEFAULT_MAX_AGE_SECONDS):
+        self.image_dir = image_dir
+        self.max_bytes = max(1, max_bytes)
+        self.max_age_seconds = max_age_seconds
+        self.index_path = os.path.join(image_dir, "index.json")
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        os.makedirs(image_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    @staticmethod
+    def make_key(restaurant_name: str, dish_name: str, prompt: str) -> str:
+        raw_key = "|".join([
+            (restaurant_name or "").strip().lower(),
+            normalize_dish_name(dish_name),
+            hash_prompt(prompt)
+        ])
+        return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()[:32]
+
+    def _load_index(self) -> OrderedDict:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return OrderedDict()
+        # Oldest access first, so the front of the dict is the LRU end
+        return OrderedDict(sorted(entries.items(), key=lambda kv: kv[1].get("last_access", 0)))
+
+    def _save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self.index_path)
+        self._last_save = time.monotonic()
+
+    def _touch(self, key: str, meta: Dict):
+        """Mark an entry as used; the index is saved at most every INDEX_SAVE_INTERVAL_SECONDS"""
+        meta["last_access"] = time.time()
+        self._index.move_to_end(key)
+        if time.monotonic() - self._last_save >= INDEX_SAVE_INTERVAL_SECONDS:
+            try:
+                self._save_index()
+            except OSError as e:
+                self.logger.warning(f"Could not save index: {str(e)}")
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.image_dir, filename)
+
+    def _remove(self, key: str):
+        meta = self._index.pop(key, None) or {}
+        for filename in (meta.get("original"), meta.get("thumbnail")):
+            if filename:
+                try:
+                    os.remove(self._path(filename))
+                except OSError:
+                    pass
+
+    def _evict(self):
+        now = time.time()
+        for key in [key for key, meta in self._index.items() if now - meta.get("created_at", 0) > self.max_age_seconds]:
+            self.logger.info(f"Evicting expired image {key}")
+            self._remove(key)
+        total = sum(meta.get("bytes", 0) for meta in self._index.values())
+        while total > self.max_bytes and self._index:
+            key = next(iter(self._index))
+            total -= self._index[key].get("bytes", 0)
+            self.logger.info(f"Evicting image {key} to stay under {self.max_bytes} bytes")
+            self._remove(key)
+
+    def get(self, restaurant_name: str, dish_name: str, prompt: str) -> Optional[Dict]:
+        """Return the entry ({"key", "original_path", "thumbnail_path", ...}) or None"""
+        key = self.make_key(restaurant_name, dish_name, prompt)
+        with self._lock:
+            meta = self._index.get(key)
+            if meta is None:
+                return None
+            if time.time() - meta.get("created_at", 0) > self.max_age_seconds \
+                    or not os.path.exists(self._path(meta["original"])):
+                self._remove(key)
+                self._save_index()
+                return None
+            self._touch(key, meta)
+            return self._entry(key, meta)
+
+    def _entry(self, key: str, meta: Dict) -> Dict:
+        return {
+            "key": key,
+            "dish_name": meta.get("dish_name"),
+            "original_path": self._path(meta["original"]),
+            "thumbnail_path": self._path(meta["thumbnail"]),
+            "source_url": meta.get("source_url"),
+            "created_at": meta.get("created_at"),
+        }
+
+    def put(self, restaurant_name: str, dish_name: str, prompt: str, image_bytes: bytes,
+            source_url: Optional[str] = None) -> Optional[Dict]:
+        """Store an image and its thumbnail; returns the entry, or None if the bytes are not an image"""
+        key = self.make_key(restaurant_name, dish_name, prompt)
+        try:
+            image = Image.open(io.BytesIO(image_bytes))
+            extension = (image.format or "png").lower()
+            thumbnail = image.convert("RGB")
+            thumbnail.thumbnail(THUMBNAIL_SIZE)
+            thumbnail_buffer = io.BytesIO()
+            thumbnail.save(thumbnail_buffer, format="JPEG", quality=THUMBNAIL_QUALITY)
+        except Exception as e:
+            self.logger.warning(f"Not storing image for '{dish_name}': {str(e)}")
+            return None
+
+        now = time.time()
+        meta = {
+            "restaurant_name": restaurant_name,
+            "dish_name": dish_name,
+            "prompt_hash": hash_prompt(prompt),
+            "source_url": source_url,
+            "original": f"{key}.{extension}",
+            "thumbnail": f"{key}_thumb.jpg",
+            "bytes": len(image_bytes) + thumbnail_buffer.tell(),
+            "created_at": now,
+            "last_access": now,
+        }
+        with self._lock:
+            try:
+                with open(self._path(meta["original"]), "wb") as f:
+                    f.write(image_bytes)
+                with open(self._path(meta["thumbnail"]), "wb") as f:
+                    f.write(thumbnail_buffer.getvalue())
+                self._index[key] = meta
+                self._index.move_to_end(key)
+                self._evict()
+                self._save_index()
+            except OSError as e:
+                self.logger.warning(f"Could not write image store entry: {str(e)}")
+                return None
+            if key not in self._index:
+                return None  # larger than the whole store
+            return self._entry(key, meta)
+
+    @staticmethod
+    def data_uri(path: str) -> str:
+        """Inline a stored file as a data URI (for <img src> in the chat UI)"""
+        mime_type = "image/jpeg" if path.endswith((".jpg", ".jpeg")) else f"image/{os.path.splitext(path)[1].lstrip('.') or 'png'}"
+        with open(path, "rb") as f:
+            return f"data:{mime_type};base64,{base64.b64encode(f.read()).decode('ascii')}"
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+            self._save_index()
+
+
+_image_store: Optional[ImageStore] = None
+_image_store_lock = threading.Lock()
+
+
+def get_image_store() -> ImageStore:
+    """Return the process-wide image store, creating it on first use"""
+    global _image_store
+    with _image_store_lock:
+        if _image_store is None:
+            _image_store = ImageStore()
+        return _image_store
@@ -1,17 +1,17 @@
 from typing import Dict
-import time
 import os
 from datetime import datetime
 import logging
-from .browser import BrowserTool
-from selenium.webdriver.common.by import By
+from .browser_pool import get_browser_pool, count_webdriver_commands
+from .wait_strategies import wait_for_page
+from .google_results_parser import parse_google_results
 
 class LocateRestaurantTool:
     """
     A tool for locating a restaurant by name and zip code.
     """
     def __init__(self):
-        self.browser = BrowserTool()
+        self.browser_pool = get_browser_pool()
         self.setup_logging()
         
     def setup_logging(self):
@@ -34,90 +34,61 @@ class LocateRestaurantTool:
         try:
             self.logger.info(f"Searching for restaurant: {restaurant_name} in {zip_code}")
             
-            # Setup browser if not already done
-            if not self.browser.driver:
-                self.browser.setup_browser()
-            
-            # Construct the search URL
-            search_url = f"https://www.google.com/search?q={restaurant_name}+{zip_code}"
-            self.browser.driver.get(search_url)
-            
-            time.sleep(2)
-            
-            # Attempt to extract from Maps panel
-            try:
-                maps_panel = self.browser.driver.find_element(By.CSS_SELECTOR, "div[data-attrid='kc:/location/location:address']")
-                if maps_panel:
-                    address = maps_panel.text
-
-                    try:
-                        hours = self.browser.driver.find_element(By.CSS_SELECTOR, "div[data-attrid='kc:/location/location:hours']").text
-                    except:
-                        hours = "Hours not available"
-
-                    try:
-                        phone = self.browser.driver.find_element(By.CSS_SELECTOR, "div[data-attrid='kc:/collection/knowledge_panels/has_phone:phone']").text
-                    except:
-                        phone = "Phone not available"
-
-                    try:
-                        url = self.browser.driver.find_element(By.CSS_SELECTOR, "a[data-url]").get_attribute("href")
-                    except:
-                        url = self.browser.driver.current_url
+            # Lease a warm driver from the shared pool
+            with self.browser_pool.lease() as driver, count_webdriver_commands(driver) as commands:
+                result = self._search_with_driver(driver, restaurant_name, zip_code)
+            self.logger.info(f"Search for {restaurant_name} used {commands['count']} WebDriver commands")
+            return result
 
-                    return {
-                        "status": "success",
-                        "message": f"Located restaurant in Google Maps:\nAddress: {address}\nHours: {hours}\nPhone: {phone}",
-                        "url": url
-                    }
-            except Exception as e:
-                self.logger.warning(f"Could not find Google Maps panel: {str(e)}")
+        except Exception as e:
+            self.logger.error(f"Error during restaurant search: {str(e)}")
+            return {
+                "status": "error",
+                "message": f"Unexpected error: {str(e)}"
+            }
 
-            # Try fallback to search results
-            selectors = ["div.g", "div.tF2Cxc", "div.yuRUbf"]
-            matched_restaurants = []
+    def _search_with_driver(self, driver, restaurant_name: str, zip_code: str) -> Dict:
+        """Run the Google search and parse the results with a leased driver"""
+        # Construct the search URL
+        search_url = f"https://www.google.com/search?q={restaurant_name}+{zip_code}"
+        driver.get(search_url)
+        wait_for_page(driver, search_url)
+        
+        # One snapshot of the page, parsed locally (no per-element WebDriver calls)
+        parsed = parse_google_results(driver.page_source, driver.current_url)
 
-            for selector in selectors:
-                results = self.browser.driver.find_elements(By.CSS_SELECTOR, selector)
-                for result in results[:5]:  # Limit to top 5
-                    try:
-                        title = result.find_element(By.CSS_SELECTOR, "h3").text
-                        link = result.find_element(By.CSS_SELECTOR, "a").get_attribute("href")
-                        snippet = result.find_element(By.CSS_SELECTOR, "div.VwiC3b, div.IsZvec").text
-                        matched_restaurants.append({
-                            "title": title,
-                            "url": link,
-                            "description": snippet
-                        })
-                    except:
-                        continue
+        # Attempt to extract from Maps panel
+        panel = parsed["panel"]
+        if panel:
+            return {
+                "status": "success",
+                "message": f"Located restaurant in Google Maps:\nAddress: {panel['address']}\nHours: {panel['hours']}\nPhone: {panel['phone']}",
+                "url": panel["url"]
+            }
+        self.logger.warning("Could not find Google Maps panel")
 
-            if len(matched_restaurants) > 1:
-                return {
-                    "status": "user_select",
-                    "restaurants": matched_restaurants,
-                    "message": f"Found {len(matched_restaurants)} possible matches. Please choose one."
-                }
-            elif matched_restaurants:
-                return {
-                    "status": "success",
-                    "message": f"Located restaurant in search results:\nTitle: {matched_restaurants[0]['title']}",
-                    "url": matched_restaurants[0]["url"]
-                }
-            else:
-                return {
-                    "status": "error",
-                    "message": "No results found in search"
-                }
+        # Fallback to search results
+        matched_restaurants = parsed["results"]
 
-        except Exception as e:
-            self.logger.error(f"Error during restaurant search: {str(e)}")
+        if len(matched_restaurants) > 1:
+            return {
+                "status": "user_select",
+                "restaurants": matched_restaurants,
+                "message": f"Found {len(matched_restaurants)} possible matches. Please choose one."
+            }
+        elif matched_restaurants:
+            return {
+                "status": "success",
+                "message": f"Located restaurant in search results:\nTitle: {matched_restaurants[0]['title']}",
+                "url": matched_restaurants[0]["url"]
+            }
+        else:
             return {
                 "status": "error",
-                "message": f"Unexpected error: {str(e)}"
+                "message": "No results found in search"
             }
 
     def close(self):
         """Close all resources"""
-        self.browser.close()
+        # Drivers belong to the shared browser pool, which shuts itself down at exit
         self.logger.info("Restaurant location search tool closed")
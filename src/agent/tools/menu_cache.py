@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# Constants
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../"))
+CACHE_DIR = os.path.join(PROJECT_ROOT, "data/menus/cache")
+DEFAULT_TTL_SECONDS = int(os.getenv("MENU_CACHE_TTL", str(24 * 60 * 60)))
+DEFAULT_MAX_ENTRIES = int(os.getenv("MENU_CACHE_MAX_ENTRIES", "500"))
+# Reads persist their access time to the index at most this often
+INDEX_SAVE_INTERVAL_SECONDS = 30
+
+
+class MenuCache:
+    """
+    On-disk cache of normalized menus keyed by (restaurant, zipcode, source URL).
+
+    Entries expire after `ttl_seconds` and the least recently used entries are
+    evicted once more than `max_entries` are stored. Each entry remembers the
+    hash of the raw scraped text so a re-scrape with unchanged content can skip
+    LLM normalization.
+    """
+    def __init__(self, cache_dir: str = CACHE_DIR, ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    @staticmethod
+    def make_key(restaurant_name: str, zipcode: str, url: str) -> str:
+        raw_key = "|".join([
+            (restaurant_name or "").strip().lower(),
+            (zipcode or "").strip(),
+            (url or "").strip().rstrip("/").lower()
+        ])
+        return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()[:32]
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_index(self) -> OrderedDict:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return OrderedDict()
+        # Oldest access first, so the front of the dict is the LRU end
+        return OrderedDict(sorted(entries.items(), key=lambda kv: kv[1].get("last_access", 0)))
+
+    def _save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self.index_path)
+        self._last_save = time.monotonic()
+
+    def _touch(self, key: str, meta: Dict):
+        """Mark an entry as used; the index is saved at most every INDEX_SAVE_INTERVAL_SECONDS"""
+        meta["last_access"] = time.time()
+        self._index.move_to_end(key)
+        if time.monotonic() - self._last_save >= INDEX_SAVE_INTERVAL_SECONDS:
+            try:
+                self._save_index()
+            except OSError as e:
+                self.logger.warning(f"Could not save index: {str(e)}")
+
+    def _remove(self, key: str):
+        self._index.pop(key, None)
+        try:
+            os.remove(self._entry_path(key))
+        except OSError:
+            pass
+
+    def get(self, restaurant_name: str, zipcode: str, url: str, allow_stale: bool = False) -> Optional[Dict]:
+        """
+        Return the cached entry ({"raw_hash", "normalized", ...}) or None.
+
+        Expired entries are only returned when `allow_stale` is set, which is how
+        callers compare content hashes after a fresh scrape.
+        """
+        key = self.make_key(restaurant_name, zipcode, url)
+        with self._lock:
+            meta = self._index.get(key)
+            if meta is None:
+                return None
+            expired = time.time() - meta.get("created_at", 0) > self.ttl_seconds
+            if expired and not allow_stale:
+                return None
+            try:
+                with open(self._entry_path(key), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                self._remove(key)
+                return None
+            self._touch(key, meta)
+            entry["expired"] = expired
+            return entry
+
+    def put(self, restaurant_name: str, zipcode: str, url: str, raw_hash: str, normalized: Dict):
+        """Store a normalized menu and evict least recently used entries over capacity"""
+        if not normalized or not normalized.get("items"):
+            return
+        key = self.make_key(restaurant_name, zipcode, url)
+        now = time.time()
+        entry = {
+            "restaurant_name": restaurant_name,
+            "zipcode": zipcode,
+            "url": url,
+            "raw_hash": raw_hash,
+            "created_at": now,
+            "normalized": normalized
+        }
+        with self._lock:
+            try:
+                with open(self._entry_path(key), "w", encoding="utf-8") as f:
+                    json.dump(entry, f)
+                self._index[key] = {"created_at": now, "last_access": now, "raw_hash": raw_hash}
+                self._index.move_to_end(key)
+                while len(self._index) > self.max_entries:
+                    evicted_key = next(iter(self._index))
+                    self.logger.info(f"Evicting menu cache entry {evicted_key}")
+                    self._remove(evicted_key)
+                self._save_index()
+            except OSError as e:
+                self.logger.warning(f"Could not write menu cache entry: {str(e)}")
+
+    def invalidate(self, restaurant_name: str, zipcode: str, url: str):
+        key = self.make_key(restaurant_name, zipcode, url)
+        with self._lock:
+            self._remove(key)
+            self._save_index()
+
+
+_menu_cache: Optional[MenuCache] = None
+_menu_cache_lock = threading.Lock()
+
+
+def get_menu_cache() -> MenuCache:
+    """Return the process-wide menu cache, creating it on first use"""
+    global _menu_cache
+    with _menu_cache_lock:
+        if _menu_cache is None:
+            _menu_cache = MenuCache()
+        return _menu_cache
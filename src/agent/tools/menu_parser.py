@@ -0,0 +1,279 @@
+import re
+import json
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+from pydantic import ValidationError
+
+from .normalize_menu import MenuItem
+
+# Record sources, reported on every MenuItem
+SOURCE_JSONLD = "jsonld"
+SOURCE_DOORDASH = "doordash_dom"
+SOURCE_PRICE_PATTERN = "price_pattern"
+SOURCE_LLM = "llm"
+
+PRICE_PATTERN = re.compile(r"\$\s?\d{1,4}(?:[.,]\d{2})?")
+
+logger = logging.getLogger("MenuParser")
+
+
+def _format_price(price, currency: Optional[str] = None) -> str:
+    if price is None or price == "":
+        return ""
+    if isinstance(price, (int, float)) or re.fullmatch(r"\d+(?:\.\d+)?", str(price).strip()):
+        if currency in (None, "", "USD"):
+            return f"${float(price):.2f}"
+        return f"{float(price):.2f} {currency}"
+    return str(price).strip()
+
+
+def _make_item(name: str, price: str, description: str = "", category: str = "",
+               image_url: str = "", source: str = "") -> Optional[Dict]:
+    name = (name or "").strip()
+    if not name:
+        return None
+    try:
+        return MenuItem(
+            category=(category or "").strip(),
+            name=name,
+            ingredients=(description or "").strip(),
+            price=price or "",
+            image_url=image_url or None,
+            source=source
+        ).model_dump()
+    except ValidationError as e:
+        logger.debug(f"Skipping invalid parsed item '{name}': {e}")
+        return None
+
+
+# schema.org JSON-LD
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _types(node: dict) -> set:
+    return {str(t).split("/")[-1] for t in _as_list(node.get("@type"))}
+
+
+def _walk_jsonld(node, category: str, items: List[Dict]):
+    if isinstance(node, list):
+        for child in node:
+            _walk_jsonld(child, category, items)
+        return
+    if not isinstance(node, dict):
+        return
+
+    node_types = _types(node)
+    if "MenuItem" in node_types:
+        offers = _as_list(node.get("offers"))
+        offer = offers[0] if offers and isinstance(offers[0], dict) else {}
+        image = node.get("image")
+        if isinstance(image, dict):
+            image = image.get("url")
+        elif isinstance(image, list):
+            image = image[0] if image else ""
+        item = _make_item(
+            name=node.get("name", ""),
+            price=_format_price(offer.get("price"), offer.get("priceCurrency")),
+            description=node.get("description", ""),
+            category=category,
+            image_url=image or "",
+            source=SOURCE_JSONLD
+        )
+        if item:
+            items.append(item)
+        return
+
+    if "MenuSection" in node_types:
+        category = node.get("name", category)
+
+    for key in ("@graph", "hasMenu", "hasMenuSection", "hasMenuItem", "menu", "mainEntity"):
+        if key in node:
+            _walk_jsonld(node[key], category, items)
+
+
+def parse_jsonld_menu(soup: BeautifulSoup) -> List[Dict]:
+    """Extract items from schema.org Menu/MenuSection/MenuItem JSON-LD blocks"""
+    items = []
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string or script.get_text() or "")
+        except ValueError:
+            continue
+        _walk_jsonld(data, "", items)
+    return items
+
+
+# DoorDash menu item blocks
+
+def parse_doordash_menu(soup: BeautifulSoup) -> List[Dict]:
+    """Extract items from DoorDash `data-anchor-id='MenuItem'` blocks"""
+    items = []
+    for block in soup.select("[data-anchor-id='MenuItem']"):
+        name_tag = block.find("h3")
+        price_tag = block.select_one("span[class*='Price']")
+        description_tag = block.find("p")
+        image_tag = block.find("img")
+        category_tag = block.find_previous("h2")
+        item = _make_item(
+            name=name_tag.get_text(strip=True) if name_tag else "",
+            price=price_tag.get_text(strip=True) if price_tag else "",
+            description=description_tag.get_text(" ", strip=True) if description_tag else "",
+            category=category_tag.get_text(strip=True) if category_tag else "",
+            image_url=image_tag.get("src", "") if image_tag else "",
+            source=SOURCE_DOORDASH
+        )
+        if item:
+            items.append(item)
+    return items
+
+
+# Price-pattern tables and lists
+
+def parse_price_pattern_menu(soup: BeautifulSoup) -> List[Dict]:
+    """
+    Extract items from <li> and <tr> rows that contain exactly one price.
+
+    The text before the price is the name, the rest is the description, and the
+    closest preceding heading is used as the category.
+    """
+    items = []
+    for row in soup.find_all(["li", "tr"]):
+        if row.find(["li", "tr"]):
+            continue  # only innermost rows
+        if row.name == "tr":
+            cells = [c.get_text(" ", strip=True) for c in row.find_all(["td", "th"])]
+            text = " | ".join(c for c in cells if c)
+        else:
+            text = row.get_text(" ", strip=True)
+        prices = PRICE_PATTERN.findall(text)
+        if len(prices) != 1 or len(text) > 300:
+            continue
+
+        name_part, _, description_part = text.partition(prices[0])
+        name = name_part.strip(" |-–—:.")
+        description = description_part.strip(" |-–—:.")
+        if not name:
+            # Price-first rows ("$9.99 Chicken Bowl - rice, beans") put the name after the price
+            name, _, description = description.partition(" - ")
+        if len(name) > 80:
+            continue
+        heading = row.find_previous(["h2", "h3", "h4"])
+        item = _make_item(
+            name=name.strip(" |-–—:."),
+            price=prices[0].replace(" ", ""),
+            description=description,
+            category=heading.get_text(strip=True) if heading else "",
+            source=SOURCE_PRICE_PATTERN
+        )
+        if item:
+            items.append(item)
+    return items
+
+
+# Entry point
+
+def _item_key(item: Dict) -> Tuple[str, str]:
+    return (item["name"].strip().lower(), item.get("price", ""))
+
+
+def _dedupe(items: Iterable[Dict]) -> List[Dict]:
+    seen = set()
+    unique_items = []
+    for item in items:
+        key = _item_key(item)
+        if key not in seen:
+            seen.add(key)
+            unique_items.append(item)
+    return unique_items
+
+
+AMOUNT_PATTERN = re.compile(r"\d{1,4}(?:[.,]\d{1,2})?")
+PRICE_ONLY_PATTERN = re.compile(r"[$€£]?\s?\d{1,4}(?:[.,]\d{1,2})?(?:\s?[A-Z]{3})?")
+
+
+def _amount(text: str) -> Optional[str]:
+    """First number in a price string as a two-decimal amount ("$10.95", "10.95 USD" -> "10.95")"""
+    match = AMOUNT_PATTERN.search(text or "")
+    return f"{float(match.group().replace(',', '.')):.2f}" if match else None
+
+
+def residue_text(menu_text: str, items: List[Dict]) -> str:
+    """
+    Return the lines of `menu_text` not accounted for by the parsed items.
+
+    A line is accounted for when it equals an item's name, description or
+    price, is a bare price equal to a parsed price however it is written
+    ("$10.95" for "10.95"), or mentions an item's name and carries no prices
+    other than parsed ones ("Chicken Bowl $10.95").
+    """
+    consumed = set()
+    amounts = set()
+    names = set()
+    for item in items:
+        for field in ("name", "price", "ingredients"):
+            value = (item.get(field) or "").strip().lower()
+            if value:
+                consumed.add(value)
+        amount = _amount(item.get("price") or "")
+        if amount:
+            amounts.add(amount)
+        name = (item.get("name") or "").strip().lower()
+        if len(name) >= 3:
+            names.add(name)
+    name_pattern = re.compile(
+        r"\b(?:" + "|".join(re.escape(name) for name in sorted(names, key=len, reverse=True)) + r")\b"
+    ) if names else None
+
+    def accounted_for(line: str) -> bool:
+        if line.lower() in consumed:
+            return True
+        if PRICE_ONLY_PATTERN.fullmatch(line):
+            return _amount(line) in amounts
+        if name_pattern and name_pattern.search(line.lower()):
+            return all(_amount(price) in amounts for price in PRICE_PATTERN.findall(line))
+        return False
+
+    remaining = [line.strip() for line in menu_text.splitlines() if line.strip() and not accounted_for(line.strip())]
+    return "\n".join(remaining)
+
+
+def menu_items_text(items: List[Dict]) -> str:
+    """Plain-text menu (name, price and description lines) for items parsed from page structure"""
+    lines = []
+    for item in items:
+        lines.extend(value for value in (item.get("name"), item.get("price"), item.get("ingredients")) if value)
+    return "\n".join(lines)
+
+
+def has_price_signal(text: str, min_prices: int = 2) -> bool:
+    """True when the text still looks like it contains menu items"""
+    return len(PRICE_PATTERN.findall(text or "")) >= min_prices
+
+
+def parse_menu_html(html: str, menu_text: str = "") -> Tuple[List[Dict], str]:
+    """
+    Parse menu items deterministically from structured HTML.
+
+    Parsers run from most to least structured and the first one that yields
+    items wins. Returns (items, residue) where residue is the part of
+    `menu_text` the parser could not account for, to be sent to the LLM.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    items = []
+    for parser in (parse_jsonld_menu, parse_doordash_menu, parse_price_pattern_menu):
+        try:
+            items = _dedupe(parser(soup))
+        except Exception as e:
+            logger.warning(f"{parser.__name__} failed: {e}")
+            items = []
+        if items:
+            logger.info(f"{parser.__name__} extracted {len(items)} items")
+            break
+    residue = residue_text(menu_text, items) if items else menu_text
+    return items, residue
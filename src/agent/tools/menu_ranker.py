@@ -0,0 +1,187 @@
+import os
+import re
+import logging
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_TOP_K = int(os.getenv("RECOMMENDATION_TOP_K", "25"))
+
+PRICE_PATTERN = re.compile(r"(\d+(?:[.,]\d{1,2})?)")
+
+MEAT = ["beef", "steak", "chicken", "pork", "bacon", "ham", "sausage", "chorizo", "carnitas", "barbacoa",
+        "lamb", "turkey", "duck", "veal", "pepperoni", "brisket", "meatball", "prosciutto", "salami"]
+SEAFOOD = ["fish", "salmon", "tuna", "shrimp", "prawn", "crab", "lobster", "clam", "oyster", "scallop",
+           "anchovy", "cod", "squid", "calamari", "mussel"]
+DAIRY = ["cheese", "milk", "cream", "butter", "yogurt", "queso", "sour cream", "mozzarella", "parmesan", "ghee"]
+EGG = ["egg", "eggs", "mayo", "mayonnaise", "aioli"]
+NUTS = ["nut", "nuts", "peanut", "almond", "cashew", "walnut", "pecan", "pistachio", "hazelnut", "macadamia"]
+GLUTEN = ["bread", "bun", "wheat", "flour", "pasta", "noodle", "tortilla", "pita", "bagel", "croissant",
+          "breaded", "crouton", "pizza", "wrap", "sandwich", "burrito", "dumpling", "bao"]
+
+# Dietary restrictions / allergies mapped to ingredient keywords that violate them
+RESTRICTION_KEYWORDS = {
+    "vegetarian": MEAT + SEAFOOD,
+    "vegan": MEAT + SEAFOOD + DAIRY + EGG + ["honey"],
+    "pescatarian": MEAT,
+    "no meat": MEAT,
+    "no red meat": ["beef", "steak", "pork", "lamb", "veal", "barbacoa", "brisket", "bacon", "ham"],
+    "no pork": ["pork", "bacon", "ham", "carnitas", "chorizo", "prosciutto", "salami", "pepperoni"],
+    "halal": ["pork", "bacon", "ham", "carnitas", "chorizo", "prosciutto", "salami", "pepperoni", "wine", "beer"],
+    "kosher": ["pork", "bacon", "ham", "shrimp", "crab", "lobster", "clam", "oyster", "scallop"],
+    "no beef": ["beef", "steak", "barbacoa", "brisket", "veal"],
+    "dairy-free": DAIRY,
+    "lactose intolerant": DAIRY,
+    "gluten-free": GLUTEN,
+    "celiac": GLUTEN,
+    "no nuts": NUTS,
+    "nut allergy": NUTS,
+    "nuts": NUTS,
+    "peanuts": NUTS,
+    "shellfish": ["shrimp", "prawn", "crab", "lobster", "clam", "oyster", "scallop", "mussel"],
+    "seafood": SEAFOOD,
+    "dairy": DAIRY,
+    "eggs": EGG,
+    "gluten": GLUTEN,
+}
+
+# Dietary goals mapped to (favoured keywords, penalized keywords)
+GOAL_KEYWORDS = {
+    "weight loss": (["salad", "grilled", "steamed", "vegetable", "veggie", "lean", "broth", "light", "fresh"],
+                    ["fried", "cream", "cheese", "bacon", "butter", "sugar", "dessert", "milkshake", "loaded"]),
+    "muscle building": (["chicken", "steak", "beef", "egg", "protein", "salmon", "tuna", "turkey", "double"],
+                        ["dessert", "soda", "sugar"]),
+    "high protein": (["chicken", "steak", "beef", "egg", "protein", "salmon", "tuna", "turkey", "tofu", "beans"],
+                     ["dessert", "soda"]),
+    "low carb": (["salad", "grilled", "protein", "vegetable", "bowl", "lettuce"],
+                 ["rice", "bread", "pasta", "noodle", "tortilla", "fries", "bun", "sugar", "potato"]),
+    "low fat": (["grilled", "steamed", "lean", "salad", "vegetable", "broth"],
+                ["fried", "cream", "cheese", "butter", "bacon", "crispy"]),
+    "low sodium": (["fresh", "steamed", "salad", "fruit", "vegetable"],
+                   ["soy", "cured", "bacon", "ham", "pickled", "salami", "fries"]),
+    "high fiber": (["beans", "lentil", "whole grain", "brown rice", "vegetable", "salad", "quinoa", "fajita"],
+                   ["white bread", "fries", "soda"]),
+}
+
+EMPTY_VALUES = {"", "none", "none specified", "no preference", "nan", "n/a", "null"}
+
+logger = logging.getLogger("MenuRanker")
+
+
+def parse_price(price) -> Optional[float]:
+    """Parse '$12.99', '12,99' or 12.99 into a float"""
+    if price is None:
+        return None
+    if isinstance(price, (int, float)):
+        return float(price)
+    match = PRICE_PATTERN.search(str(price))
+    return float(match.group(1).replace(",", ".")) if match else None
+
+
+def split_terms(value) -> List[str]:
+    """Split a comma separated profile field into lowercase terms"""
+    if value is None or not isinstance(value, str):
+        return []
+    return [term.strip().lower() for term in value.split(",") if term.strip().lower() not in EMPTY_VALUES]
+
+
+def singularize(term: str) -> str:
+    """English singular of a free-text ingredient ("strawberries" -> "strawberry", "tomatoes" -> "tomato")"""
+    if len(term) > 4 and term.endswith("ies"):
+        return term[:-3] + "y"
+    if term.endswith(("ches", "shes", "sses", "xes", "zes", "oes")):
+        return term[:-2]
+    if term.endswith("s") and not term.endswith(("ss", "us")):
+        return term[:-1]
+    return term
+
+
+def _contains(text: str, keyword: str) -> bool:
+    """Whole-word match of a keyword in its singular or plural form"""
+    if len(keyword) > 2 and keyword.endswith("y") and keyword[-2] not in "aeiou":
+        pattern = rf"\b{re.escape(keyword[:-1])}(?:y|ies)\b"
+    else:
+        pattern = rf"\b{re.escape(keyword)}(?:s|es)?\b"
+    return re.search(pattern, text) is not None
+
+
+def _item_text(item: Dict) -> str:
+    return " ".join(str(item.get(field) or "") for field in ("name", "ingredients", "category")).lower()
+
+
+def _violation_keywords(health_data: Dict) -> List[str]:
+    keywords = set()
+    for term in split_terms(health_data.get("dietary_restriction")) + split_terms(health_data.get("allergies")):
+        if term in RESTRICTION_KEYWORDS:
+            keywords.update(RESTRICTION_KEYWORDS[term])
+        elif term.startswith("no "):
+            keywords.add(term[3:])
+        else:
+            # Free-text allergy such as "sesame" or "strawberries"; match either form
+            keywords.update({term, singularize(term)})
+    return sorted(keywords)
+
+
+def _budget_range(budget) -> Tuple[Optional[float], Optional[float]]:
+    """(min, max) price of a budget dict, or (None, max) for a plain number"""
+    if budget is None:
+        return None, None
+    if isinstance(budget, dict):
+        return budget.get("min"), budget.get("max")
+    return None, float(budget)
+
+
+def _fits_budget(price: Optional[float], min_price: Optional[float], max_price: Optional[float]) -> bool:
+    """Unpriced items always fit"""
+    if price is None:
+        return True
+    return (min_price is None or price >= min_price) and (max_price is None or price <= max_price)
+
+
+def rank_menu_items(menu_items: List[Dict], health_data: Optional[Dict] = None, budget=None,
+                    food_preference: Optional[str] = None, top_k: int = DEFAULT_TOP_K) -> List[Dict]:
+    """
+    Pick the `top_k` best recommendation candidates from a menu.
+
+    Items that violate dietary restrictions or allergies are always removed.
+    Items priced outside the budget range are removed too, unless that would
+    leave no items. The rest are scored on food-preference and dietary-goal
+    keywords. Ties keep menu order.
+    """
+    health_data = health_data or {}
+    violations = _violation_keywords(health_data)
+    preferences = split_terms(food_preference)
+    goals = split_terms(health_data.get("dietary_goal"))
+    min_price, max_price = _budget_range(budget)
+
+    allowed = []
+    for item in menu_items:
+        text = _item_text(item)
+        if any(_contains(text, keyword) for keyword in violations):
+            continue
+        allowed.append((item, text))
+
+    within_budget = [
+        (item, text) for item, text in allowed
+        if _fits_budget(parse_price(item.get("price")), min_price, max_price)
+    ]
+    if within_budget:
+        allowed = within_budget
+    else:
+        logger.info("No items fit the budget, keeping items outside it as candidates")
+
+    scored = []
+    for position, (item, text) in enumerate(allowed):
+        score = 0.0
+        for preference in preferences:
+            if _contains(text, preference):
+                score += 3
+            if preference == str(item.get("category") or "").lower():
+                score += 1
+        for goal in goals:
+            favoured, penalized = GOAL_KEYWORDS.get(goal, ([goal], []))
+            score += sum(1 for keyword in favoured if _contains(text, keyword))
+            score -= sum(1 for keyword in penalized if _contains(text, keyword))
+        score += min(len(item.get("reviews") or []), 5) * 0.1
+        scored.append((-score, position, item))
+
+    scored.sort(key=lambda entry: (entry[0], entry[1]))
+    return [item for _, _, item in scored[:max(1, top_k)]]
@@ -1,12 +1,19 @@
 import json
 import os
+import re
 import logging
-from typing import List, Optional
-from openai import OpenAI
+import concurrent.futures
+from typing import Iterable, List, Optional
+import tiktoken
 from pydantic import BaseModel, ValidationError
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from .visible_text import PRICE_PATTERN
+from ..llm_gateway import get_llm_gateway
+
+# normalize_with_llm only sends this many characters of raw text per call
+MAX_SNIPPET_CHARS = 4000
+DEFAULT_CHUNK_TOKENS = int(os.getenv("NORMALIZE_CHUNK_TOKENS", "900"))
+DEFAULT_NORMALIZE_WORKERS = int(os.getenv("NORMALIZE_MAX_WORKERS", "4"))
 
 # Schema definitions
 class MenuItem(BaseModel):
@@ -16,6 +23,7 @@ class MenuItem(BaseModel):
     price: str
     image_url: Optional[str] = None
     reviews: List[str] = []  # optional, default to empty list
+    source: Optional[str] = None  # which extraction path produced the record, e.g. "jsonld" or "llm"
 
 class NormalizedMenu(BaseModel):
     restaurant_name: str
@@ -29,7 +37,7 @@ def load_raw_menu(path: str) -> str:
 
 # Normalize using OpenAI
 def normalize_with_llm(raw_text: str, restaurant_name: str, zipcode: str, reviews: Optional[dict] = None) -> dict:
-    snippet = raw_text.replace("```", "")[:4000]  # avoid triple backticks and truncate
+    snippet = raw_text.replace("```", "")[:MAX_SNIPPET_CHARS]  # avoid triple backticks and truncate
 
     prompt = (
         f"I scraped the following messy menu text from DoorDash for restaurant '{restaurant_name}' "
@@ -68,15 +76,13 @@ def normalize_with_llm(raw_text: str, restaurant_name: str, zipcode: str, review
         f"Return ONLY the JSON object — no explanation or extra text."
     )
 
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0,
-    )
+    content = get_llm_gateway().complete(prompt, model="gpt-3.5-turbo", temperature=0)
 
     try:
-        content = response.choices[0].message.content
-        return NormalizedMenu.model_validate_json(content).model_dump()
+        normalized = NormalizedMenu.model_validate_json(content).model_dump()
+        for item in normalized["items"]:
+            item["source"] = "llm"
+        return normalized
     except ValidationError as ve:
         logging.warning(f"Validation error: {ve}")
         return {}
@@ -89,6 +95,136 @@ def normalize_with_llm(raw_text: str, restaurant_name: str, zipcode: str, review
 def chunk_text(text, max_length=4000):
     return [text[i:i+max_length] for i in range(0, len(text), max_length)]
 
+
+_encoding = None
+
+def count_tokens(text: str) -> int:
+    """Count cl100k tokens, estimating when the encoding cannot be loaded"""
+    global _encoding
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # Encoding files unavailable (e.g. offline) - fall back to ~4 characters per token
+            logging.warning(f"tiktoken unavailable, estimating token counts: {e}")
+            _encoding = False
+    if _encoding is False:
+        return len(text) // 4 + 1
+    return len(_encoding.encode(text))
+
+
+def split_at_prices(block: str) -> List[str]:
+    """Split a block into items: each item runs up to and including a line with a price"""
+    items, current = [], []
+    for line in block.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        current.append(line)
+        if PRICE_PATTERN.search(line):
+            items.append("\n".join(current))
+            current = []
+    if current:
+        items.append("\n".join(current))
+    return items
+
+
+def chunk_menu_text(text: str, max_tokens: int = DEFAULT_CHUNK_TOKENS,
+                    max_chars: int = MAX_SNIPPET_CHARS) -> List[str]:
+    """
+    Split raw menu text into chunks of at most `max_tokens` tokens (and `max_chars`
+    characters) without cutting through a menu item.
+
+    Blank-line separated blocks are kept whole; a block that is too large on its
+    own (e.g. a whole category) is split after each line carrying a price, which
+    is where an item ends, and only an item that is still too large is split on
+    line boundaries.
+    """
+    def fits(unit: str) -> bool:
+        return count_tokens(unit) <= max_tokens and len(unit) <= max_chars
+
+    blocks = [b.strip() for b in re.split(r"\n\s*\n", text.replace("```", "")) if b.strip()]
+    units = []
+    for block in blocks:
+        if fits(block):
+            units.append(block)
+            continue
+        for item in split_at_prices(block):
+            if fits(item):
+                units.append(item)
+            else:
+                units.extend(line[:max_chars] for line in item.splitlines())
+
+    chunks, current, current_tokens, current_chars = [], [], 0, 0
+    for unit in units:
+        unit_tokens = count_tokens(unit)
+        if current and (current_tokens + unit_tokens > max_tokens or current_chars + len(unit) + 2 > max_chars):
+            chunks.append("\n\n".join(current))
+            current, current_tokens, current_chars = [], 0, 0
+        current.append(unit)
+        current_tokens += unit_tokens
+        current_chars += len(unit) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _dedupe_items(items: Iterable[dict], seen: set) -> List[dict]:
+    """Return items whose (name, price) has not been seen yet, updating `seen`"""
+    unique_items = []
+    for item in items:
+        key = (str(item.get("name", "")).strip().lower(), item.get("price"))
+        if key[0] and key not in seen:
+            seen.add(key)
+            unique_items.append(item)
+    return unique_items
+
+
+def normalize_menu_parallel(raw_text: str, restaurant_name: str, zipcode: str,
+                            reviews: Optional[dict] = None, max_tokens: int = DEFAULT_CHUNK_TOKENS,
+                            max_workers: int = DEFAULT_NORMALIZE_WORKERS) -> dict:
+    """
+    Normalize a menu of any size by running normalize_with_llm over token-bounded
+    chunks concurrently, then merging and deduplicating the items.
+
+    Chunk results are merged as they complete, in original chunk order, so the
+    wall time is roughly that of the slowest chunk rather than the sum.
+    """
+    chunks = chunk_menu_text(raw_text, max_tokens=max_tokens)
+    if not chunks:
+        return {}
+    logging.info(f"Normalizing {len(chunks)} menu chunk(s) with up to {max_workers} worker(s)")
+
+    seen = set()
+    merged_items = []
+    pending = {}  # finished chunks waiting for an earlier chunk to complete
+    next_index = 0
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as executor:
+        future_to_index = {
+            executor.submit(normalize_with_llm, chunk, restaurant_name, zipcode, reviews): i
+            for i, chunk in enumerate(chunks)
+        }
+        for future in concurrent.futures.as_completed(future_to_index):
+            index = future_to_index[future]
+            try:
+                pending[index] = (future.result() or {}).get("items", [])
+            except Exception as e:
+                logging.error(f"Chunk {index} normalization failed: {e}")
+                pending[index] = []
+
+            # Stream finished chunks into the result as soon as their predecessors are in
+            while next_index in pending:
+                merged_items.extend(_dedupe_items(pending.pop(next_index), seen))
+                next_index += 1
+
+    return {
+        "restaurant_name": restaurant_name,
+        "zipcode": zipcode,
+        "items": merged_items
+    }
+
+
 # Main
 if __name__ == "__main__":
     input_path = "src/data/menus/i_want_to_eat_chipotle_in_menu.txt"
@@ -96,26 +232,7 @@ if __name__ == "__main__":
 
     raw = load_raw_menu(input_path)
 
-    all_items = []
-    for chunk in chunk_text(raw):
-        parsed = normalize_with_llm(chunk, "Chipotle", "92037")
-        if parsed and "items" in parsed:
-            all_items.extend(parsed["items"])
-
-    # Deduplicate items by name + price
-    seen = set()
-    unique_items = []
-    for item in all_items:
-        key = (item["name"].strip().lower(), item["price"])
-        if key not in seen:
-            seen.add(key)
-            unique_items.append(item)
-
-    final_result = {
-        "restaurant_name": "Chipotle",
-        "zipcode": "92037",
-        "items": unique_items
-    }
+    final_result = normalize_menu_parallel(raw, "Chipotle", "92037")
 
     with open(output_path, 'w', encoding='utf-8') as f:
         json.dump(final_result, f, indent=2)
@@ -2,19 +2,17 @@ from typing import Dict, Optional
 import time
 import os
 import json
-import re
 import logging
+import threading
 from datetime import datetime
 
-from bs4 import BeautifulSoup
-from PIL import Image
-import openai
-
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from .browser import BrowserTool
-from .normalize_menu import normalize_with_llm
+from .http_fetcher import get_tiered_fetcher
+from .normalize_menu import normalize_menu_parallel
+from .menu_cache import get_menu_cache
+from .menu_parser import parse_menu_html, has_price_signal, menu_items_text
+from .visible_text import extract_visible_menu_text
+from .review_attribution import ReviewAttributor, extract_review_lines
+from ..llm_gateway import get_llm_gateway
 
 # Constants
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../"))
@@ -25,6 +23,8 @@ LOG_DIR = os.path.join(PROJECT_ROOT, "logs")
 class RestaurantMenuTool:
     def __init__(self, agent=None):
         self.agent = agent
+        self.menu_cache = get_menu_cache()
+        self.fetcher = get_tiered_fetcher()
         self.setup_logging()
 
     def setup_logging(self):
@@ -38,25 +38,21 @@ class RestaurantMenuTool:
         self.logger = logging.getLogger(self.__class__.__name__)
 
     def _extract_with_vlm(self, image_path: str) -> str:
-        img = Image.open(image_path)
-        response = openai.ChatCompletion.create(
-            model="gpt-4-vision-preview",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": "Extract all menu items with their names and prices from this image. Format: 'Item -- Price'"},
-                        {"type": "image_url", "image_url": openai.Image.from_pil_image(img)}
-                    ]
-                }
-            ],
+        return get_llm_gateway().describe_image(
+            image_path,
+            "Extract all menu items with their names and prices from this image. Format: 'Item -- Price'",
             max_tokens=1000,
         )
-        return response.choices[0].message.content
 
     def get_menu(self, restaurant_name: str, restaurant_url: Optional[str] = None,
-                 uploaded_menu: Optional[str] = None, zipcode: Optional[str] = "00000") -> Dict:
+                 uploaded_menu: Optional[str] = None, zipcode: Optional[str] = "00000",
+                 source: str = "website", cancel_event: Optional[threading.Event] = None) -> Dict:
+        """
+        Menu of a restaurant from an upload or a scraped page. `source` names the
+        kind of page ("website", "doordash") in the saved file names, so racing
+        sources don't overwrite each other; once `cancel_event` is set, a scrape
+        stops before fetching and before normalizing.
+        """
         try:
             self.logger.info(f"Getting menu for {restaurant_name}")
             os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -65,7 +61,7 @@ class RestaurantMenuTool:
             if uploaded_menu:
                 raw_text = uploaded_menu
                 zipcode = self._infer_zipcode_from_context() or zipcode
-                normalized = normalize_with_llm(raw_text, restaurant_name, zipcode)
+                normalized = normalize_menu_parallel(raw_text, restaurant_name, zipcode)
                 self.logger.info(f"[LLM-NORMALIZED] Got {len(normalized.get('items', []))} normalized items")
                 return {
                     "status": "success",
@@ -75,20 +71,38 @@ class RestaurantMenuTool:
 
             # If scraping menu from restaurant website
             if restaurant_url:
-                browser = BrowserTool()
-                browser.setup_browser()
-                driver = browser.get_driver()
-                driver.get(restaurant_url)
-                driver.set_window_size(1280, 3000)
+                zipcode = self._infer_zipcode_from_context() or zipcode
 
+                # Serve repeat lookups from the menu cache without launching a browser
+                cached = self.menu_cache.get(restaurant_name, zipcode, restaurant_url)
+                if cached:
+                    self.logger.info(f"[CACHE HIT] Menu for {restaurant_name} ({zipcode}) served from cache")
+                    return {
+                        "status": "success",
+                        "message": "Normalized menu returned from cache",
+                        "menu_items": [dict(item) for item in cached["normalized"].get("items", [])]
+                    }
+
+                if cancel_event is not None and cancel_event.is_set():
+                    return self._cancelled(restaurant_name)
+
+                # Plain HTTP first; Chrome only for pages that need JavaScript
                 screenshot_path = f"/tmp/{restaurant_name.lower().replace(' ', '_')}_menu.png"
-                driver.save_screenshot(screenshot_path)
-                WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
-                page_content = driver.page_source
-                browser.close()
+                fetched = self.fetcher.fetch(restaurant_url, screenshot_path)
+                page_content = fetched["html"]
 
                 # Try HTML scraping first
                 menu_text = self.extract_visible_menu_text(page_content)
+                if not menu_text.strip() and fetched["tier"] != "browser":
+                    # Structured (JSON-LD) menus need no visible text; otherwise the VLM
+                    # fallback needs a rendered screenshot
+                    parsed_items, _ = parse_menu_html(page_content)
+                    if parsed_items:
+                        menu_text = menu_items_text(parsed_items)
+                    else:
+                        fetched = self.fetcher.fetch(restaurant_url, screenshot_path, force_browser=True)
+                        page_content = fetched["html"]
+                        menu_text = self.extract_visible_menu_text(page_content)
                 raw_text = menu_text
 
                 if not menu_text.strip():
@@ -98,16 +112,25 @@ class RestaurantMenuTool:
                 # Save raw menu text
                 raw_txt_path = os.path.join(
                     OUTPUT_DIR,
-                    f"{restaurant_name.replace(' ', '_').lower()}_{zipcode}_menu.txt"
+                    f"{restaurant_name.replace(' ', '_').lower()}_{zipcode}_{source}_menu.txt"
                 )
                 with open(raw_txt_path, "w", encoding="utf-8") as f:
                     f.write(raw_text)
                 self.logger.info(f"Saved extracted menu to: {raw_txt_path}")
 
-                # Normalize menu
-                zipcode = self._infer_zipcode_from_context() or zipcode
-                dish_reviews = self.extract_dish_reviews(page_content)
-                normalized = normalize_with_llm(raw_text, restaurant_name, zipcode, reviews=dish_reviews)
+                if cancel_event is not None and cancel_event.is_set():
+                    return self._cancelled(restaurant_name)
+
+                # Skip normalization when the scraped text is unchanged since the last (expired) entry
+                raw_hash = self.menu_cache.hash_text(raw_text)
+                stale = self.menu_cache.get(restaurant_name, zipcode, restaurant_url, allow_stale=True)
+                if stale and stale.get("raw_hash") == raw_hash:
+                    self.logger.info("[CACHE] Raw menu text unchanged, reusing normalized menu")
+                    normalized = stale["normalized"]
+                else:
+                    # Normalize menu
+                    normalized = self._normalize_page(page_content, raw_text, restaurant_name, zipcode)
+                self.menu_cache.put(restaurant_name, zipcode, restaurant_url, raw_hash, normalized)
 
                 json_path = raw_txt_path.replace(".txt", "_cleaned.json")
                 with open(json_path, "w", encoding="utf-8") as f:
@@ -133,37 +156,60 @@ class RestaurantMenuTool:
                 "menu_items": []
             }
 
+    def _cancelled(self, restaurant_name: str) -> Dict:
+        self.logger.info(f"Menu lookup for {restaurant_name} cancelled")
+        return {
+            "status": "cancelled",
+            "message": "Menu lookup cancelled",
+            "menu_items": []
+        }
+
+    def _normalize_page(self, html: str, raw_text: str, restaurant_name: str, zipcode: str) -> Dict:
+        """
+        Parse structured menus deterministically and only send the residue to the LLM.
+        Every item carries a `source` field naming the path that produced it.
+        """
+        parsed_items, residue = parse_menu_html(html, raw_text)
+
+        items = list(parsed_items)
+        if not parsed_items or has_price_signal(residue):
+            llm_text = residue if parsed_items else raw_text
+            self.logger.info(f"Sending {len(llm_text)} chars of unparsed menu text to the LLM")
+            llm_result = normalize_menu_parallel(llm_text, restaurant_name, zipcode)
+            seen = {(item["name"].strip().lower(), item["price"]) for item in parsed_items}
+            for item in llm_result.get("items", []):
+                if (item["name"].strip().lower(), item["price"]) not in seen:
+                    items.append(item)
+        else:
+            self.logger.info("Menu fully parsed from page structure — skipping LLM normalization")
+
+        # Attach page reviews to every item they mention
+        dish_reviews = self.extract_dish_reviews(html, items)
+        self.logger.info(f"Attributed reviews to {len(dish_reviews)} dishes")
+
+        source_counts = {}
+        for item in items:
+            source_counts[item.get("source") or "unknown"] = source_counts.get(item.get("source") or "unknown", 0) + 1
+        self.logger.info(f"Menu items by source: {source_counts}")
+
+        return {
+            "restaurant_name": restaurant_name,
+            "zipcode": zipcode,
+            "items": items
+        }
+
     def extract_visible_menu_text(self, html: str) -> str:
-        soup = BeautifulSoup(html, "html.parser")
-        candidates = soup.find_all(["section", "div", "article"])
-        text_blocks = []
-        for block in candidates:
-            text = block.get_text(separator="\n", strip=True)
-            if len(text.splitlines()) >= 5 and any(keyword in text for keyword in
-                                                   ["$", "Burrito", "Taco", "Chicken", "Menu", "Steak"]):
-                text_blocks.append(text)
-        return "\n\n".join(text_blocks)
+        return extract_visible_menu_text(html)
     
-    def extract_dish_reviews(self, html: str) -> dict:
+    def extract_dish_reviews(self, html: str, menu_items: list) -> dict:
         """
-        Extracts dish reviews from DoorDash page HTML.
-        Returns a mapping: {dish_name: [review1, review2, ...]}
+        Attach the page's review lines to the menu items that mention them (in place).
+        Returns a mapping: {dish_name: [review1, review2, ...]} of the reviews added.
         """
-        soup = BeautifulSoup(html, "html.parser")
-        reviews = {}
-
-        # Example: pull all review blocks
-        review_blocks = soup.find_all("div", string=re.compile("DoorDash order"))
-
-        for block in review_blocks:
-            text = block.get_text(separator="\n")
-            for line in text.splitlines():
-                for dish in ["Braised Beef & Mushrooms", "Grilled Grass Fed Steak", "Side Grilled Cage Free Chicken"]:
-                    if dish.lower() in line.lower():
-                        reviews.setdefault(dish, []).append(line.strip())
-
-        return reviews
-
+        review_lines = extract_review_lines(html)
+        if not review_lines or not menu_items:
+            return {}
+        return ReviewAttributor(menu_items).attribute(review_lines)
 
     def _infer_zipcode_from_context(self) -> str:
         if hasattr(self, "agent") and self.agent:
@@ -1,22 +1,62 @@
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List
 import os
 from datetime import datetime
 import logging
 import json
 import re
-import requests
 from io import BytesIO
 from PIL import Image
 import concurrent.futures
-import openai
+
+from .menu_ranker import rank_menu_items, DEFAULT_TOP_K
+from .normalize_menu import count_tokens
+from .image_store import ImageStore, get_image_store
+from .dish_matcher import DishIndex
+from ..llm_gateway import get_llm_gateway
+
+
+def strip_code_fences(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Remove ``` fences (and an opening fence's language tag) from streamed text.
+    Trailing backticks are held back until the next chunk shows whether they start a fence.
+    """
+    buffer = ""
+    after_fence = False
+    for chunk in chunks:
+        buffer += chunk
+        while buffer:
+            if after_fence:
+                tag = re.match(r"[\w+-]*(\n|$)", buffer)
+                if tag and not tag.group(1) and tag.end() == len(buffer):
+                    break  # could still be a language tag, wait for more text
+                if tag and tag.group(1):
+                    buffer = buffer[tag.end():]
+                after_fence = False
+            index = buffer.find("```")
+            if index != -1:
+                if index:
+                    yield buffer[:index]
+                buffer = buffer[index + 3:]
+                after_fence = True
+                continue
+            held = min(len(buffer) - len(buffer.rstrip("`")), 2)
+            if len(buffer) > held:
+                yield buffer[:len(buffer) - held]
+            buffer = buffer[len(buffer) - held:]
+            break
+    if buffer and not after_fence:
+        yield buffer
+
 
 class RestaurantRecommendationsTool:
     """
     A tool for getting recommendations for dishes based on menu, health data, and budget.
     """
-    def __init__(self, agent):
+    def __init__(self, agent, top_k: int = DEFAULT_TOP_K, image_store: ImageStore = None):
         self.setup_logging()
         self.agent = agent  # Store reference to the agent
+        self.top_k = top_k  # Number of pre-ranked menu items sent to the LLM
+        self.image_store = image_store or get_image_store()
         
     def setup_logging(self):
         """Setup logging configuration"""
@@ -33,10 +73,46 @@ class RestaurantRecommendationsTool:
         )
         self.logger = logging.getLogger(self.__class__.__name__)
 
-    def generate_image_with_llm(self, item_name, item_description=None):
+    @staticmethod
+    def _image_prompt(item_name, item_description=None):
+        prompt = f"Create a realistic food photograph of '{item_name}'. "
+        if item_description:
+            prompt += f"The dish contains {item_description}. "
+        prompt += (
+            "Create an image that looks like it was casually photographed in the restaurant with an iPhone, "
+            "not a professional studio shot. Natural restaurant lighting, realistic plating, slight imperfections. "
+            "No phone frame. Background should be realistic and restaurant-like."
+        )
+        return prompt
+
+    def stored_image(self, item_name, item_description=None, restaurant_name=None):
+        """(PIL image, thumbnail data URI) from the image store, or None if this dish was never generated"""
+        restaurant_name = restaurant_name or self.agent.conversation_context.get("current_restaurant") or ""
+        stored = self.image_store.get(restaurant_name, item_name, self._image_prompt(item_name, item_description))
+        if not stored:
+            return None
+        self.logger.info(f"[IMAGE STORE HIT] {item_name}")
+        return Image.open(stored["original_path"]), self.image_store.data_uri(stored["thumbnail_path"])
+
+    def generate_image_with_llm(self, item_name, item_description=None, restaurant_name=None):
+        """
+        Return (PIL image, image URL) for a dish.
+
+        Images come from the local image store when this dish was generated
+        before with the same prompt; otherwise a new one is generated and stored.
+        Stored images are returned as a thumbnail data URI, which never expires.
+        """
+        image_url = None
+        restaurant_name = restaurant_name or self.agent.conversation_context.get("current_restaurant") or ""
+        # Keyed on the untranslated prompt so a hit skips the translation call as well
+        store_prompt = self._image_prompt(item_name, item_description)
+        stored = self.stored_image(item_name, item_description, restaurant_name)
+        if stored:
+            return stored
+
         try:
-            api_key = os.getenv("OPENAI_API_KEY")
-            if not api_key:
+            llm = get_llm_gateway()
+            if not llm.api_key:
                 self.logger.error("OPENAI_API_KEY environment variable not set")
                 return None, None
 
@@ -44,181 +120,205 @@ class RestaurantRecommendationsTool:
             english_name = item_name
             if any(ord(c) > 127 for c in item_name):
                 translation_prompt = f'Translate to English: "{item_name}"'
-                english_name = self.agent.ask_llm(translation_prompt).strip()
-
-            prompt = f"Create a realistic food photograph of '{english_name}'. "
-            if item_description:
-                prompt += f"The dish contains {item_description}. "
-            prompt += (
-                "Create an image that looks like it was casually photographed in the restaurant with an iPhone, "
-                "not a professional studio shot. Natural restaurant lighting, realistic plating, slight imperfections. "
-                "No phone frame. Background should be realistic and restaurant-like."
-            )
-
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }
-            data = {
-                "model": "dall-e-2",
-                "prompt": prompt,
-                "n": 1,
-                "size": "1024x1024"
-            }
+                english_name = self.agent.ask_llm(translation_prompt, action="translation").strip()
+            prompt = self._image_prompt(english_name, item_description)
 
             self.logger.info(f"Sending image generation request to OpenAI")
 
-            response = requests.post("https://api.openai.com/v1/images/generations", headers=headers, json=data)
-            response.raise_for_status()
-            image_url = "" # initialize url to prevent error
-            image_url = response.json()["data"][0]["url"]
-
-            image_response = requests.get(image_url, timeout=45)
-            image_response.raise_for_status()
-            return Image.open(BytesIO(image_response.content)), image_url
+            image_url = llm.generate_image(prompt, size="1024x1024")
+            image_bytes = llm.download(image_url)
+            stored = self.image_store.put(restaurant_name, item_name, store_prompt, image_bytes, source_url=image_url)
+            if stored:
+                image_url = self.image_store.data_uri(stored["thumbnail_path"])
+            return Image.open(BytesIO(image_bytes)), image_url
         
         except Exception as e:
             self.logger.error(f"Image download failed, fallback to image URL only: {e}")
             return None, image_url
 
-    def get_recommendations(self, menu_items: List[Dict], health_data: Dict, budget: float = None, food_preference: str = None, debug_prompt: bool = True) -> Dict:
-        """Get personalized recommendations based on menu, health data, budget, and food preferences"""
-        try:
-            self.logger.info("Getting recommendations")
-            self.logger.info(f"Received budget parameter: {budget}")
-            self.logger.info(f"Received food preference: {food_preference}")
-            
-            # Format menu items for prompt
-            menu_text = "\n".join([
-                json.dumps({
-                    "name": item.get("name"),
-                    "price": item.get("price"),
-                    "category": item.get("category", ""),
-                    "ingredients": item.get("ingredients", ""),
-                    "reviews": item.get("reviews", [])
-                }, ensure_ascii=False)
-                for item in menu_items
-            ])
-            self.logger.info(f"Received menu_text: {menu_text}")
+    @staticmethod
+    def _format_menu_text(menu_items: List[Dict]) -> str:
+        return "\n".join([
+            json.dumps({
+                "name": item.get("name"),
+                "price": item.get("price"),
+                "category": item.get("category", ""),
+                "ingredients": item.get("ingredients", ""),
+                "reviews": item.get("reviews", [])
+            }, ensure_ascii=False)
+            for item in menu_items
+        ])
 
-            
-            # Format health data for prompt
-            health_text = ""
-            if health_data:
-                health_text = "\n".join([f"{k}: {v}" for k, v in health_data.items() if k != "user_id"])
-            self.logger.info(f"Received health_text: {health_text}")
-            
-            # Format budget information
-            budget_text = "No specific budget limit"
-            if budget is not None:
-                if isinstance(budget, dict):
-                    # Handle min/max budget range
-                    budget_text = f"${budget['min']:.2f} - ${budget['max']:.2f}"
-                else:
-                    # Handle single budget number
-                    budget_text = f"${budget:.2f}"
-            self.logger.info(f"Received budget_text: {budget_text}")
-            
-            # Format food preference information
-            preference_text = "No specific food preference"
-            if food_preference is not None and food_preference.strip():
-                preference_text = food_preference
-            self.logger.info(f"Received preference_text: {preference_text}")
-            
-            # Get restaurant name from context
-            restaurant_name = self.agent.conversation_context.get("current_restaurant", "the restaurant")
-            self.logger.info(f"Received restaurant_name: {restaurant_name}")
-            # Create prompt for LLM
-            prompt = f"""
-            You are a helpful restaurant assistant recommending dishes from {restaurant_name} based on the menu, user's health data, budget, and preferences.
-            For each dish, return:
-            - Dish name and price
-            - Ingredients
-            - A short customer review summary(if available)
-            - A brief explanation of why it's recommended (e.g., based on ingredients, reviews, or price)
+    def _build_recommendation_prompt(self, menu_items: List[Dict], health_data: Dict, budget, food_preference: str, debug_prompt: bool, top_k: int = None) -> str:
+        """Build the recommendation prompt from the menu, health data, budget and food preferences"""
+        # Pre-rank locally so only the top-K candidates are sent to the LLM
+        candidates = rank_menu_items(menu_items, health_data, budget, food_preference, top_k=top_k or self.top_k)
 
-            Menu (including dish name, price, category, ingredients, and customer reviews):
-            {menu_text}
-            
-            User's Budget: {budget_text}
-            
-            User's Food Preferences: {preference_text}
-            
-            User's Health Data:
-            {health_text}
-            
-            BUDGET GUIDELINES:
-            - Try to recommend dishes that, when combined and added to the tax and tip, stay within the user's budget of {budget_text}
-            - If the budget is limited, prioritize healthier options that fit within the budget
-            - If very few dishes fit within budget, recommend the most affordable healthy options
-            
-            FOOD PREFERENCE GUIDELINES:
-            - Prioritize dishes that match the user's food preferences
-            - If no exact matches are found, recommend similar dishes that align with their preferences
-            - Consider both the user's health data and food preferences when making recommendations
+        # Format menu items for prompt
+        menu_text = self._format_menu_text(candidates)
+        full_tokens = count_tokens(self._format_menu_text(menu_items))
+        pruned_tokens = count_tokens(menu_text)
+        self.logger.info(
+            f"Pruned menu from {len(menu_items)} to {len(candidates)} items: "
+            f"{full_tokens} -> {pruned_tokens} menu tokens "
+            f"({100 * (full_tokens - pruned_tokens) / max(full_tokens, 1):.0f}% fewer)"
+        )
+        self.logger.info(f"Received menu_text: {menu_text}")
 
-            HEALTH GUIDELINES:
-            - Avoid any dishes containing ingredients listed in user's dietary restrictions
-            - Avoid recommending dishes that might worsen user's diseases, here are some examples:
-                - For users with diabetes: Avoid high-sugar dishes and refined carbohydrates, Recommend dishes with low glycemic index
-                - For users with hypertension: Avoid high-sodium dishes, Recommend dishes rich in potassium, magnesium and fiber
-                - For users with heart disease: Avoid dishes high in saturated fats and cholesterol, Recommend dishes with heart-healthy fats (olive oil, avocado)
-            - Recommend dishes that are suitable for user's dietary goals, here are some examples:
-                - Weight Loss: Recommend low-calorie, high-protein dishes with vegetables
-                - Muscle Building: Prioritize high-protein dishes
-                - Low Carb: Avoid pasta, bread, rice dishes; recommend protein and vegetable-based options
-                - Low Fat: Suggest lean proteins and steamed/grilled preparations
-                - Low Sodium: Avoid heavily seasoned dishes; recommend fresh preparations
-                - High Protein: Prioritize lean meat, fish, legume-based dishes
-                - High Fiber: Recommend dishes with whole grains, legumes, vegetables       
-            
-            RESPONSE GUIDELINES:           
-            Return your recommendations in the following format:
-            
-            <Recommendation Summary>
+        
+        # Format health data for prompt
+        health_text = ""
+        if health_data:
+            health_text = "\n".join([f"{k}: {v}" for k, v in health_data.items() if k != "user_id"])
+        self.logger.info(f"Received health_text: {health_text}")
+        
+        # Format budget information
+        budget_text = "No specific budget limit"
+        if budget is not None:
+            if isinstance(budget, dict):
+                # Handle min/max budget range
+                budget_text = f"${budget['min']:.2f} - ${budget['max']:.2f}"
+            else:
+                # Handle single budget number
+                budget_text = f"${budget:.2f}"
+        self.logger.info(f"Received budget_text: {budget_text}")
+        
+        # Format food preference information
+        preference_text = "No specific food preference"
+        if food_preference is not None and food_preference.strip():
+            preference_text = food_preference
+        self.logger.info(f"Received preference_text: {preference_text}")
+        
+        # Get restaurant name from context
+        restaurant_name = self.agent.conversation_context.get("current_restaurant", "the restaurant")
+        self.logger.info(f"Received restaurant_name: {restaurant_name}")
+        # Create prompt for LLM
+        prompt = f"""
+        You are a helpful restaurant assistant recommending dishes from {restaurant_name} based on the menu, user's health data, budget, and preferences.
+        For each dish, return:
+        - Dish name and price
+        - Ingredients
+        - A short customer review summary(if available)
+        - A brief explanation of why it's recommended (e.g., based on ingredients, reviews, or price)
+
+        Menu (including dish name, price, category, ingredients, and customer reviews):
+        {menu_text}
+        
+        User's Budget: {budget_text}
+        
+        User's Food Preferences: {preference_text}
+        
+        User's Health Data:
+        {health_text}
+        
+        BUDGET GUIDELINES:
+        - Try to recommend dishes that, when combined and added to the tax and tip, stay within the user's budget of {budget_text}
+        - If the budget is limited, prioritize healthier options that fit within the budget
+        - If very few dishes fit within budget, recommend the most affordable healthy options
+        
+        FOOD PREFERENCE GUIDELINES:
+        - Prioritize dishes that match the user's food preferences
+        - If no exact matches are found, recommend similar dishes that align with their preferences
+        - Consider both the user's health data and food preferences when making recommendations
 
-            <Recommendation Details>
-            Recommended dishes:
-            1. <Dish Name> - <Dish Price>  
-            - <Dish Ingredients>  
-            - <Customer Review Summary> 
-            - <Recommendation Reasoning>
-            2. <Dish Name> - <Dish Price> 
-            - <Dish Ingredients> 
-            - <Customer Review Summary> 
-            - <Recommendation Reasoning>
-            3. <Dish Name> - <Dish Price> 
-            - <Dish Ingredients> 
-            - <Customer Review Summary> 
-            - <Recommendation Reasoning>
+        HEALTH GUIDELINES:
+        - Avoid any dishes containing ingredients listed in user's dietary restrictions
+        - Avoid recommending dishes that might worsen user's diseases, here are some examples:
+            - For users with diabetes: Avoid high-sugar dishes and refined carbohydrates, Recommend dishes with low glycemic index
+            - For users with hypertension: Avoid high-sodium dishes, Recommend dishes rich in potassium, magnesium and fiber
+            - For users with heart disease: Avoid dishes high in saturated fats and cholesterol, Recommend dishes with heart-healthy fats (olive oil, avocado)
+        - Recommend dishes that are suitable for user's dietary goals, here are some examples:
+            - Weight Loss: Recommend low-calorie, high-protein dishes with vegetables
+            - Muscle Building: Prioritize high-protein dishes
+            - Low Carb: Avoid pasta, bread, rice dishes; recommend protein and vegetable-based options
+            - Low Fat: Suggest lean proteins and steamed/grilled preparations
+            - Low Sodium: Avoid heavily seasoned dishes; recommend fresh preparations
+            - High Protein: Prioritize lean meat, fish, legume-based dishes
+            - High Fiber: Recommend dishes with whole grains, legumes, vegetables       
+        
+        RESPONSE GUIDELINES:           
+        Return your recommendations in the following format:
+        
+        <Recommendation Summary>
 
-            <Cost Breakdown>
-            Pre-tax total: $60
-            After tax total: $70
-            After tips total: $80(10%), $90(15%), $100(20%)
+        <Recommendation Details>
+        Recommended dishes:
+        1. <Dish Name> - <Dish Price>  
+        - <Dish Ingredients>  
+        - <Customer Review Summary> 
+        - <Recommendation Reasoning>
+        2. <Dish Name> - <Dish Price> 
+        - <Dish Ingredients> 
+        - <Customer Review Summary> 
+        - <Recommendation Reasoning>
+        3. <Dish Name> - <Dish Price> 
+        - <Dish Ingredients> 
+        - <Customer Review Summary> 
+        - <Recommendation Reasoning>
 
-            Keep your response friendly, conversational, and focused on the food recommendations.
-            """
+        <Cost Breakdown>
+        Pre-tax total: $60
+        After tax total: $70
+        After tips total: $80(10%), $90(15%), $100(20%)
+
+        Keep your response friendly, conversational, and focused on the food recommendations.
+        """
+        
+        print("="*20)
+        print("Everything before debug_prompt looks good!")
+        ## Output Prompt on Console
+        if debug_prompt:
+            print("\n======== RECOMMENDATION PROMPT ========")
+            print(prompt)
+            print("=======================================\n")
             
-            print("="*20)
-            print("Everything before debug_prompt looks good!")
-            ## Output Prompt on Console
-            if debug_prompt:
-                print("\n======== RECOMMENDATION PROMPT ========")
-                print(prompt)
-                print("=======================================\n")
-                
-                # Also save to a file for easier viewing
-                debug_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs', 'last_prompt.txt')
-                with open(debug_file, 'w') as f:
-                    f.write(prompt)
-                self.logger.info(f"Prompt saved to {debug_file}")
+            # Also save to a file for easier viewing
+            debug_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs', 'last_prompt.txt')
+            with open(debug_file, 'w') as f:
+                f.write(prompt)
+            self.logger.info(f"Prompt saved to {debug_file}")
+        
+        # Always log the prompt
+        self.logger.info(f"Generated prompt: {prompt}")
+        return prompt
+
+    def _stream_recommendations(self, prompt: str) -> Iterator[str]:
+        """Stream the recommendation text with code fences removed on the fly"""
+        parts = []
+        for text in strip_code_fences(self.agent.ask_llm_stream(prompt, action="recommendations")):
+            parts.append(text)
+            yield text
+        cleaned_response = "".join(parts).strip()
+        self.logger.info(f"LLM streamed response: {cleaned_response}")
+        # Store the recommendation response in the agent context for later use
+        self.agent.conversation_context["last_recommendations"] = cleaned_response
+
+    def get_recommendations(self, menu_items: List[Dict], health_data: Dict, budget: float = None, food_preference: str = None, debug_prompt: bool = True, stream: bool = False, top_k: int = None) -> Dict:
+        """
+        Get personalized recommendations based on menu, health data, budget, and food preferences
+
+        With `stream=True` the returned dict carries a `stream` generator of text
+        chunks instead of the full `message`. `top_k` overrides how many pre-ranked
+        menu items go into the prompt.
+        """
+        try:
+            self.logger.info("Getting recommendations")
+            self.logger.info(f"Received budget parameter: {budget}")
+            self.logger.info(f"Received food preference: {food_preference}")
             
-            # Always log the prompt
-            self.logger.info(f"Generated prompt: {prompt}")
+            prompt = self._build_recommendation_prompt(menu_items, health_data, budget, food_preference, debug_prompt, top_k=top_k)
+
+            if stream:
+                # Hand back a generator; the caller renders it incrementally
+                return {
+                    "status": "success",
+                    "message": "",
+                    "menu_items": [],
+                    "stream": self._stream_recommendations(prompt)
+                }
             
             # Get response from agent's LLM
-            response = self.agent.ask_llm(prompt)
+            response = self.agent.ask_llm(prompt, action="recommendations")
             self.logger.info(f"LLM response: {response}")
             
             # Clean the response to ensure it's plain text
@@ -277,15 +377,8 @@ class RestaurantRecommendationsTool:
                     "dish_images": []
                 }
             
-            # Create a lookup dictionary for menu items
-            menu_lookup = {}
-            for item in menu_items:
-                name = item.get("name")
-                if name:
-                    menu_lookup[name] = {
-                        "ingredients": item.get("ingredients", ""),
-                        "image_link": item.get("image_link")
-                    }
+            # Fuzzy index so recommended dish names find their menu items (and scraped photos)
+            dish_index = DishIndex(menu_items)
             
             # Get dish names from last recommendations if available
             dish_names = []
@@ -316,26 +409,37 @@ class RestaurantRecommendationsTool:
             # Prepare results and collect dishes that need image generation
             dish_images = []
             images_to_generate = []
+            stats = {"matched": 0, "menu_images": 0, "stored_images": 0, "generated_images": 0, "failed": 0}
             
-            # First pass: use existing image_links and collect dishes that need generation
+            # First pass: use scraped menu photos and stored images, collect dishes that need generation
             for dish_name in dish_names:
-                # Get dish info from menu lookup
-                dish_info = menu_lookup.get(dish_name, {})
+                dish_info, score = dish_index.match(dish_name)
+                dish_info = dish_info or {}
+                if dish_info:
+                    stats["matched"] += 1
+                    self.logger.info(f"Matched '{dish_name}' to menu item '{dish_info['name']}' ({score:.2f})")
                 
-                # Check if image_link exists
-                if dish_info.get("image_link"):
-                    self.logger.info(f"Using existing image_link for {dish_name}")
+                # Check if the scraper captured a photo
+                if dish_info.get("image_url"):
+                    self.logger.info(f"Using existing image_url for {dish_name}")
+                    stats["menu_images"] += 1
                     dish_images.append({
                         "dish_name": dish_name,
                         "image": None,
-                        "image_url": dish_info["image_link"]
+                        "image_url": dish_info["image_url"]
                     })
+                    continue
+
+                # Get ingredients for description
+                description = dish_info.get("ingredients", "")
+                if not description:
+                    description = f"A dish from {self.agent.conversation_context.get('current_restaurant', 'restaurant')}"
+
+                stored = self.stored_image(dish_name, description)
+                if stored:
+                    stats["stored_images"] += 1
+                    dish_images.append({"dish_name": dish_name, "image": stored[0], "image_url": stored[1]})
                 else:
-                    # Get ingredients for description
-                    description = dish_info.get("ingredients", "")
-                    if not description:
-                        description = f"A dish from {self.agent.conversation_context.get('current_restaurant', 'restaurant')}"
-                    
                     # Add to generation list
                     images_to_generate.append((dish_name, description))
             
@@ -358,18 +462,29 @@ class RestaurantRecommendationsTool:
                         try:
                             img, img_url = future.result()
                             if img:
+                                stats["generated_images"] += 1
                                 dish_images.append({
                                     "dish_name": dish_name,
                                     "image": img,
                                     "image_url": img_url
                                 })
+                            else:
+                                stats["failed"] += 1
                         except Exception as e:
+                            stats["failed"] += 1
                             self.logger.error(f"Error generating image for {dish_name}: {str(e)}")
             
+            self.logger.info(
+                f"Dish images: {stats['matched']}/{len(dish_names)} matched to the menu, "
+                f"{stats['menu_images']} menu photos, {stats['stored_images']} stored, "
+                f"{stats['generated_images']} generated, {stats['failed']} failed"
+            )
             return {
                 "status": "success",
-                "message": f"Generated {len(dish_images)} dish images",
-                "dish_images": dish_images
+                "message": (f"Found {len(dish_images)} dish images ({stats['menu_images']} from the menu, "
+                            f"{stats['stored_images']} saved, {stats['generated_images']} newly generated)"),
+                "dish_images": dish_images,
+                "image_stats": stats
             }
                 
         except Exception as e:
@@ -0,0 +1,130 @@
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+from bs4 import BeautifulSoup
+
+from .image_store import normalize_dish_name
+
+DEFAULT_MAX_REVIEWS_PER_DISH = 5
+# Text blocks that are customer reviews on delivery-site pages
+REVIEW_MARKER = re.compile("DoorDash order")
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over a set of patterns: one scan of a text finds every
+    occurrence of every pattern, in time linear in the text plus matches.
+    """
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        for pattern in patterns:
+            self._add(pattern)
+        self._build_failure_links()
+
+    def _add(self, pattern: str):
+        if not pattern:
+            return
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append(len(self.patterns))
+        self.patterns.append(pattern)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                # Children of the root fail back to the root
+                self._fail[child] = self._goto[fallback].get(char, 0) if node else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def search(self, text: str) -> Iterable[Tuple[int, int]]:
+        """Yield (start index, pattern index) for every occurrence"""
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for pattern_index in self._output[node]:
+                yield position - len(self.patterns[pattern_index]) + 1, pattern_index
+
+
+def extract_review_lines(html: str) -> List[str]:
+    """Every line of the review blocks on a page"""
+    soup = BeautifulSoup(html, "html.parser")
+    lines = []
+    for block in soup.find_all("div", string=REVIEW_MARKER):
+        lines.extend(line.strip() for line in block.get_text(separator="\n").splitlines() if line.strip())
+    return lines
+
+
+class ReviewAttributor:
+    """
+    Attributes review lines to menu items by dish name.
+
+    Dish names are normalized and padded with spaces, so a single automaton scan
+    of each normalized review only matches whole words. When names overlap
+    ("chicken" inside "chicken burrito") only the longest match counts.
+    """
+    def __init__(self, menu_items: List[Dict]):
+        self.items = [item for item in menu_items if item.get("name")]
+        self._items_by_name: Dict[str, List[Dict]] = {}
+        for item in self.items:
+            key = normalize_dish_name(item["name"])
+            if key:
+                self._items_by_name.setdefault(key, []).append(item)
+        self._names = list(self._items_by_name)
+        self._automaton = AhoCorasick(f" {name} " for name in self._names)
+
+    def match(self, review: str) -> List[str]:
+        """Normalized dish names mentioned in a review (longest match wins on overlap)"""
+        text = f" {normalize_dish_name(review)} "
+        spans = sorted(
+            ((start, start + len(self._automaton.patterns[index]), index) for start, index in self._automaton.search(text)),
+            key=lambda span: (span[0], -span[1])
+        )
+        names, covered_until = [], -1
+        for start, end, index in spans:
+            # Skip spans nested in an earlier, longer one (adjacent names may share a boundary space)
+            if end - 1 <= covered_until:
+                continue
+            names.append(self._names[index])
+            covered_until = max(covered_until, end - 1)
+        return names
+
+    def attribute(self, reviews: Iterable[str], max_per_dish: int = DEFAULT_MAX_REVIEWS_PER_DISH) -> Dict[str, List[str]]:
+        """
+        Add each review to the `reviews` of the items it mentions (deduplicated,
+        at most `max_per_dish` per item). Returns {dish name: reviews added}.
+        """
+        attributed: Dict[str, List[str]] = {}
+        seen = {id(item): {review.strip().lower() for review in item.get("reviews") or []} for item in self.items}
+        for review in reviews:
+            review = review.strip()
+            if not review:
+                continue
+            for name in self.match(review):
+                for item in self._items_by_name[name]:
+                    item_reviews = item.setdefault("reviews", [])
+                    if len(item_reviews) >= max_per_dish or review.lower() in seen[id(item)]:
+                        continue
+                    item_reviews.append(review)
+                    seen[id(item)].add(review.lower())
+                    attributed.setdefault(item["name"], []).append(review)
+        return attributed
@@ -0,0 +1,170 @@
+"""
+Single-pass extraction of the visible menu text of a page.
+
+Benchmark against the old BeautifulSoup extractor:
+    python src/agent/tools/visible_text.py page1.html page2.html
+    python src/agent/tools/visible_text.py --synthetic 2000
+"""
+
+import re
+import time
+import hashlib
+import argparse
+from typing import List
+
+from lxml import html as lxml_html
+
+BLOCK_TAGS = {"section", "div", "article"}
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "head", "iframe", "canvas"}
+MIN_BLOCK_LINES = 5
+MIN_BLOCK_PRICES = 2
+MIN_PRICE_DENSITY = 0.05  # share of a block's lines that carry a price
+PRICE_PATTERN = re.compile(r"[$€£]\s?\d{1,4}(?:[.,]\d{2})?|\b\d{1,3}[.,]\d{2}\b")
+
+
+def _split_lines(text) -> List[str]:
+    if not text:
+        return []
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def extract_visible_menu_text(html: str) -> str:
+    """
+    Text of the innermost blocks (section/div/article) that look like menu content.
+
+    Every text node is visited once and appended to a single line buffer; each
+    block only records the [start, end) range of lines it spans, so block line
+    and price counts are O(1) and nested containers never re-serialize their
+    children. A block qualifies with at least MIN_BLOCK_LINES lines,
+    MIN_BLOCK_PRICES prices and a price density of MIN_PRICE_DENSITY; only the
+    innermost qualifying blocks are kept. Inside a block that contains
+    qualifying blocks, the runs of lines they do not cover are kept too when
+    they carry a price, so a one-item category next to a large one is not
+    dropped. Blocks come out in document order and identical ones once.
+    """
+    if not html or not html.strip():
+        return ""
+    try:
+        root = lxml_html.fromstring(html)
+    except ValueError:
+        # Unicode strings with an XML encoding declaration must be parsed as bytes
+        root = lxml_html.fromstring(html.encode("utf-8"))
+
+    lines: List[str] = []
+    price_prefix = [0]  # price_prefix[i] = number of price lines in lines[:i]
+
+    def add(text):
+        for line in _split_lines(text):
+            lines.append(line)
+            price_prefix.append(price_prefix[-1] + (1 if PRICE_PATTERN.search(line) else 0))
+
+    def uncovered_price_ranges(start, end, covered):
+        """Gaps of [start, end) outside the covered ranges that contain at least one price"""
+        gaps, cursor = [], start
+        for covered_start, covered_end in sorted(covered):
+            if covered_start > cursor:
+                gaps.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return [(gap_start, gap_end) for gap_start, gap_end in gaps if price_prefix[gap_end] > price_prefix[gap_start]]
+
+    ranges = []
+    frames = []  # open elements: [start line, has a qualifying descendant, len(ranges) when opened]
+    stack = [(root, False)]
+    while stack:
+        element, closing = stack.pop()
+        if closing:
+            start, has_qualified_descendant, first_range = frames.pop()
+            qualified = False
+            if element.tag in BLOCK_TAGS and not has_qualified_descendant:
+                count = len(lines) - start
+                prices = price_prefix[-1] - price_prefix[start]
+                qualified = (count >= MIN_BLOCK_LINES and prices >= MIN_BLOCK_PRICES
+                             and prices / count >= MIN_PRICE_DENSITY)
+                if qualified:
+                    ranges.append((start, len(lines)))
+            elif element.tag in BLOCK_TAGS:
+                # Keep priced content next to the qualifying blocks (small categories, the block's own text)
+                ranges.extend(uncovered_price_ranges(start, len(lines), ranges[first_range:]))
+            if (qualified or has_qualified_descendant) and frames:
+                frames[-1][1] = True
+            add(element.tail)
+            continue
+
+        if not isinstance(element.tag, str) or element.tag.lower() in SKIP_TAGS:
+            # Comments, processing instructions and invisible elements only contribute their tail
+            add(element.tail)
+            continue
+
+        frames.append([len(lines), False, len(ranges)])
+        add(element.text)
+        stack.append((element, True))
+        for child in reversed(element):
+            stack.append((child, False))
+
+    blocks = []
+    seen = set()
+    for start, end in sorted(ranges):
+        text = "\n".join(lines[start:end])
+        digest = hashlib.sha1(text.encode("utf-8")).digest()
+        if digest not in seen:
+            seen.add(digest)
+            blocks.append(text)
+    return "\n\n".join(blocks)
+
+
+def legacy_extract_visible_menu_text(html: str) -> str:
+    """The previous BeautifulSoup extractor, kept for the benchmark"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    text_blocks = []
+    for block in soup.find_all(["section", "div", "article"]):
+        text = block.get_text(separator="\n", strip=True)
+        if len(text.splitlines()) >= 5 and any(keyword in text for keyword in
+                                               ["$", "Burrito", "Taco", "Chicken", "Menu", "Steak"]):
+            text_blocks.append(text)
+    return "\n\n".join(text_blocks)
+
+
+def synthetic_menu_page(items: int, depth: int = 8) -> str:
+    """A deeply nested page with `items` menu entries, for benchmarking"""
+    categories = []
+    for category in range(max(1, items // 20)):
+        entries = "".join(
+            f"<div class='item'><h3>Dish {category}-{index}</h3><p>Rice, beans and salsa</p>"
+            f"<span class='price'>${5 + index % 10}.99</span></div>"
+            for index in range(20)
+        )
+        categories.append(f"<section><h2>Category {category}</h2>{entries}</section>")
+    body = "".join(categories)
+    for _ in range(depth):
+        body = f"<div class='wrapper'>{body}</div>"
+    return f"<html><head><script>var x = 1;</script></head><body>{body}</body></html>"
+
+
+def _benchmark(name: str, html: str, repeat: int):
+    for label, extractor in (("lxml single-pass", extract_visible_menu_text),
+                             ("legacy bs4", legacy_extract_visible_menu_text)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            text = extractor(html)
+        elapsed = (time.perf_counter() - start) / repeat
+        print(f"{name:40.40} {label:18} {elapsed * 1000:9.1f} ms  {len(text):9d} chars")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark visible menu text extraction")
+    parser.add_argument("pages", nargs="*", help="Saved HTML pages")
+    parser.add_argument("--synthetic", type=int, default=0, help="Also benchmark a generated page with N items")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    if not args.pages and not args.synthetic:
+        args.synthetic = 1000
+
+    print(f"{'page':40} {'extractor':18} {'time':>12}  {'output':>15}")
+    for path in args.pages:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            _benchmark(path, f.read(), args.repeat)
+    if args.synthetic:
+        _benchmark(f"synthetic ({args.synthetic} items)", synthetic_menu_page(args.synthetic), args.repeat)
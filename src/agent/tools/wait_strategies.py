@@ -0,0 +1,275 @@
+import json
+import time
+import logging
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+# Per-site wait profiles. `legacy_sleep` is the fixed sleep the profile replaced
+# and is used to report how much time the event-driven wait saved.
+SITE_PROFILES = {
+    "google": {
+        "ready_selector": "#search, #rso, div[data-attrid]",
+        "quiet_ms": 300,
+        "network_idle_ms": 300,
+        "max_inflight": 2,
+        "timeout": 8,
+        "scroll": False,
+        "legacy_sleep": 2.0,
+    },
+    "doordash": {
+        "ready_selector": "[data-anchor-id='MenuItem']",
+        "quiet_ms": 400,
+        "network_idle_ms": 500,
+        "max_inflight": 2,
+        "timeout": 15,
+        "scroll": True,
+        "scroll_quiet_ms": 250,
+        "stable_rounds": 2,
+        "max_scrolls": 40,
+        "legacy_sleep": 5.0,
+        "legacy_scroll_step": 500,
+        "legacy_scroll_pause": 0.5,
+    },
+    "default": {
+        "ready_selector": "body",
+        "quiet_ms": 500,
+        "network_idle_ms": 500,
+        # Analytics beacons and long-polling keep a request or two open on most sites
+        "max_inflight": 2,
+        "timeout": 5,
+        "scroll": False,
+        "legacy_sleep": 0.0,
+    },
+}
+
+POLL_INTERVAL = 0.1
+
+# Resolves once the DOM has gone `quietMs` without a mutation, or with false at `timeoutMs`
+DOM_QUIESCENCE_SCRIPT = """
+const quietMs = arguments[0], timeoutMs = arguments[1], done = arguments[arguments.length - 1];
+let quietTimer = null, capTimer = null;
+const finish = (quiet) => {
+    observer.disconnect();
+    clearTimeout(quietTimer);
+    clearTimeout(capTimer);
+    done(quiet);
+};
+const observer = new MutationObserver(() => {
+    clearTimeout(quietTimer);
+    quietTimer = setTimeout(() => finish(true), quietMs);
+});
+observer.observe(document.documentElement || document,
+                 {childList: true, subtree: true, attributes: true, characterData: true});
+quietTimer = setTimeout(() => finish(true), quietMs);
+capTimer = setTimeout(() => finish(false), timeoutMs);
+"""
+
+logger = logging.getLogger("WaitStrategies")
+
+
+def profile_for_url(url: Optional[str]) -> Dict:
+    """Pick the wait profile for a URL by its host"""
+    host = urlparse(url or "").netloc.lower()
+    for name in ("google", "doordash"):
+        if name in host:
+            return dict(SITE_PROFILES[name], name=name)
+    return dict(SITE_PROFILES["default"], name="default")
+
+
+def wait_for_selector(driver, selector: str, timeout: float) -> bool:
+    """Wait until `selector` matches an element; False on timeout"""
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+        )
+        return True
+    except TimeoutException:
+        return False
+
+
+def wait_for_dom_quiescence(driver, quiet_ms: int, timeout: float) -> bool:
+    """
+    Wait until the page has made no DOM mutations for `quiet_ms`.
+
+    Returns False if the page kept mutating until `timeout`.
+    """
+    try:
+        driver.set_script_timeout(timeout + 1)
+        return bool(driver.execute_async_script(DOM_QUIESCENCE_SCRIPT, quiet_ms, int(timeout * 1000)))
+    except WebDriverException as e:
+        logger.debug(f"DOM quiescence wait failed: {e}")
+        return False
+
+
+class _NetworkTracker:
+    """
+    Counts in-flight requests from the Chrome performance log (CDP Network events).
+
+    Reading the log consumes it, so every event is also passed to `listener`
+    (if given) for callers that need more than the request count.
+    """
+    def __init__(self, driver, listener: Optional[Callable[[Dict], None]] = None):
+        self.driver = driver
+        self.listener = listener
+        self.inflight = set()
+        self.last_activity = time.monotonic()
+
+    def update(self) -> int:
+        for entry in self.driver.get_log("performance"):
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            if self.listener:
+                self.listener(message)
+            method = message.get("method", "")
+            request_id = message.get("params", {}).get("requestId")
+            if method == "Network.requestWillBeSent":
+                self.inflight.add(request_id)
+            elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+                self.inflight.discard(request_id)
+            else:
+                continue
+            self.last_activity = time.monotonic()
+        return len(self.inflight)
+
+
+class _ResourceCounter:
+    """Fallback when performance logging is off: watches the Resource Timing buffer"""
+    def __init__(self, driver):
+        self.driver = driver
+        self.count = -1
+        self.last_activity = time.monotonic()
+
+    def update(self) -> int:
+        count = self.driver.execute_script(
+            "return document.readyState === 'complete' ? performance.getEntriesByType('resource').length : -1"
+        )
+        if count != self.count or count < 0:
+            self.count = count
+            self.last_activity = time.monotonic()
+        return 0 if count >= 0 else 1
+
+
+def wait_for_network_idle(driver, idle_ms: int, timeout: float, max_inflight: int = 0,
+                          listener: Optional[Callable[[Dict], None]] = None) -> bool:
+    """
+    Wait until at most `max_inflight` requests have been pending for `idle_ms`.
+
+    Uses CDP Network events from the performance log when the driver was
+    started with `goog:loggingPrefs` (each event is also passed to `listener`),
+    and Resource Timing otherwise.
+    """
+    try:
+        tracker = _NetworkTracker(driver, listener)
+        tracker.update()
+    except WebDriverException:
+        tracker = _ResourceCounter(driver)
+
+    def _idle(_driver):
+        inflight = tracker.update()
+        return inflight <= max_inflight and time.monotonic() - tracker.last_activity >= idle_ms / 1000
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(_idle)
+        return True
+    except TimeoutException:
+        return False
+
+
+def scroll_until_stable(driver, quiet_ms: int = 250, stable_rounds: int = 2, max_scrolls: int = 40,
+                        timeout: float = 15) -> int:
+    """
+    Scroll a viewport at a time until the page height stops growing.
+
+    Each step waits for DOM quiescence instead of a fixed pause, and the loop
+    exits as soon as the bottom has been reached `stable_rounds` times without
+    new content. Returns the final scroll height.
+    """
+    deadline = time.monotonic() + timeout
+    last_height = driver.execute_script("return document.body.scrollHeight")
+    stable = 0
+    for _ in range(max_scrolls):
+        at_bottom = driver.execute_script(
+            "window.scrollBy(0, window.innerHeight);"
+            "return window.innerHeight + window.scrollY >= document.body.scrollHeight - 2;"
+        )
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        wait_for_dom_quiescence(driver, quiet_ms, min(remaining, 3))
+        height = driver.execute_script("return document.body.scrollHeight")
+        if at_bottom and height == last_height:
+            stable += 1
+            if stable >= stable_rounds:
+                break
+        else:
+            stable = 0
+        last_height = height
+    return last_height
+
+
+def _legacy_budget(profile: Dict, scroll_height: Optional[int]) -> float:
+    """Seconds the replaced fixed sleeps would have spent on this page"""
+    budget = profile.get("legacy_sleep", 0.0)
+    step = profile.get("legacy_scroll_step")
+    if step and scroll_height:
+        budget += len(range(0, scroll_height, step)) * profile.get("legacy_scroll_pause", 0.0)
+    return budget
+
+
+def wait_for_page(driver, url: Optional[str] = None, profile: Optional[Dict] = None,
+                  network_listener: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Wait for a loaded page to settle using its site profile.
+
+    Waits for the ready selector, network idle and DOM quiescence, then scrolls
+    until stable if the profile asks for it. Returns a report with the time
+    spent and the time saved compared to the fixed sleeps it replaces (None
+    for profiles that replaced no sleep).
+    `network_listener` receives the CDP Network events read while waiting.
+    """
+    profile = profile or profile_for_url(url or driver.current_url)
+    start = time.monotonic()
+    timeout = profile["timeout"]
+
+    def remaining():
+        return max(0.1, timeout - (time.monotonic() - start))
+
+    ready = wait_for_selector(driver, profile["ready_selector"], remaining())
+    network_idle = wait_for_network_idle(driver, profile["network_idle_ms"], remaining(), profile["max_inflight"],
+                                         listener=network_listener)
+    dom_quiet = wait_for_dom_quiescence(driver, profile["quiet_ms"], remaining())
+
+    scroll_height = None
+    if profile.get("scroll"):
+        scroll_height = scroll_until_stable(
+            driver,
+            quiet_ms=profile.get("scroll_quiet_ms", 250),
+            stable_rounds=profile.get("stable_rounds", 2),
+            max_scrolls=profile.get("max_scrolls", 40),
+            timeout=remaining()
+        )
+
+    elapsed = time.monotonic() - start
+    budget = _legacy_budget(profile, scroll_height)
+    report = {
+        "profile": profile["name"],
+        "ready": ready,
+        "network_idle": network_idle,
+        "dom_quiet": dom_quiet,
+        "elapsed": round(elapsed, 3),
+        "legacy_budget": round(budget, 3),
+        "saved": round(budget - elapsed, 3) if budget > 0 else None,
+    }
+    savings = f" (fixed sleeps: {budget:.2f}s, saved {budget - elapsed:.2f}s)" if budget > 0 else ""
+    logger.info(
+        f"[WAIT] {profile['name']} page settled in {elapsed:.2f}s{savings} "
+        f"ready={ready} network_idle={network_idle} dom_quiet={dom_quiet}"
+    )
+    return report
@@ -0,0 +1,145 @@
+import re
+from typing import List, Optional
+
+from pydantic import BaseModel, field_validator
+
+ACTIONS = ["search_restaurant", "get_menu", "get_recommendations", "general_conversation", "health_query"]
+DEFAULT_ACTION = "general_conversation"
+
+# Preference vocabulary for messages answered without the LLM ("-" also matches a space or nothing)
+PREFERENCE_TERMS = [
+    "vegetarian", "vegan", "pescatarian", "gluten-free", "dairy-free", "nut-free", "keto", "paleo",
+    "halal", "kosher", "low-carb", "low-calorie", "low-fat", "low-sodium", "high-protein", "healthy",
+    "light", "spicy", "mild", "sweet", "savory", "crispy", "grilled", "fried",
+    "chicken", "beef", "steak", "pork", "fish", "salmon", "tuna", "shrimp", "seafood", "tofu",
+    "lamb", "turkey", "eggs",
+]
+# Ingredients people ask to leave out ("no onions", "without cheese", "allergic to nuts")
+EXCLUDABLE_TERMS = [
+    "onions", "onion", "cheese", "dairy", "nuts", "peanuts", "gluten", "meat", "pork", "beef",
+    "mushrooms", "tomatoes", "cilantro", "beans", "rice", "sour cream", "mayo", "eggs", "shellfish",
+]
+
+
+def _term_pattern(terms: List[str]) -> str:
+    return "|".join(term.replace("-", "[- ]?") for term in sorted(terms, key=len, reverse=True))
+
+
+EXCLUSION_PATTERN = re.compile(
+    rf"\b(?:no|without|hold the|allergic to)\s+({_term_pattern(EXCLUDABLE_TERMS)})\b", re.IGNORECASE
+)
+PREFERENCE_PATTERN = re.compile(rf"\b({_term_pattern(PREFERENCE_TERMS)})\b", re.IGNORECASE)
+CANONICAL_PREFERENCES = {term.replace("-", ""): term for term in PREFERENCE_TERMS}
+# Phrasings that state a preference the vocabulary may not cover
+PREFERENCE_CUES = re.compile(
+    r"\b(?:prefer|i like|i love|i hate|i don'?t (?:eat|like)|i can'?t eat|allergic|craving|in the mood for|avoid)\b",
+    re.IGNORECASE
+)
+
+
+class TurnAnalysis(BaseModel):
+    """Everything process_input needs to know about one user message"""
+    restaurant: str = ""
+    zipcode: str = ""
+    action: str = DEFAULT_ACTION
+    preferences: List[str] = []
+    source: Optional[str] = None  # "llm", "local" or "fallback"; not part of the LLM schema
+
+    @field_validator("restaurant", "zipcode", mode="before")
+    @classmethod
+    def _strip(cls, value):
+        return (value or "").strip()
+
+    @field_validator("action", mode="before")
+    @classmethod
+    def _known_action(cls, value):
+        value = (value or "").strip().lower()
+        for action in ACTIONS:
+            if action in value:
+                return action
+        return DEFAULT_ACTION
+
+    @field_validator("preferences", mode="before")
+    @classmethod
+    def _clean_preferences(cls, value):
+        if isinstance(value, str):
+            value = value.split(",")
+        cleaned = []
+        for preference in value or []:
+            preference = str(preference).strip().strip("'\"").lower()
+            if preference and preference not in cleaned:
+                cleaned.append(preference)
+        return cleaned
+
+
+# Strict JSON schema for the structured-output request (OpenAI `response_format`)
+TURN_ANALYSIS_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "turn_analysis",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "restaurant": {"type": "string"},
+                "zipcode": {"type": "string"},
+                "action": {"type": "string", "enum": ACTIONS},
+                "preferences": {"type": "array", "items": {"type": "string"}},
+            },
+            "required": ["restaurant", "zipcode", "action", "preferences"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+def turn_analysis_prompt(user_input: str, current_restaurant: Optional[str]) -> str:
+    return f"""
+        Analyze the user's latest message to a restaurant assistant.
+
+        User input: "{user_input}"
+        Current restaurant: {current_restaurant if current_restaurant else "None"}
+
+        Return a JSON object with:
+        - restaurant: the specific restaurant name mentioned in this message (if the user mentions
+          'eat at' or 'go to' a restaurant, that's likely the restaurant name), or "" if none
+        - zipcode: a 5-digit US zip code mentioned in this message, or ""
+        - action: one of
+            search_restaurant - User wants to find or learn about a restaurant
+            get_menu - User wants to see a menu for a restaurant
+            get_recommendations - User wants food recommendations
+            general_conversation - General chat, questions, or small talk
+            health_query - Questions about health aspects of food
+        - preferences: food preferences stated or implied in the conversation (ingredients, types
+          of food, dietary preferences), e.g. ["spicy", "chicken", "low-calorie"], or []
+        """
+
+
+def extract_preferences(user_input: str) -> List[str]:
+    """Food preferences from the preference vocabulary, in message order ("no onions" for exclusions)"""
+    found = []
+    excluded_spans = []
+    for match in EXCLUSION_PATTERN.finditer(user_input):
+        found.append((match.start(), f"no {match.group(1).lower()}"))
+        excluded_spans.append(match.span(1))
+    for match in PREFERENCE_PATTERN.finditer(user_input):
+        if any(start <= match.start() < end for start, end in excluded_spans):
+            continue
+        found.append((match.start(), CANONICAL_PREFERENCES[re.sub(r"[- ]", "", match.group(1).lower())]))
+    preferences = []
+    for _, preference in sorted(found):
+        if preference not in preferences:
+            preferences.append(preference)
+    return preferences
+
+
+def states_unknown_preference(user_input: str, preferences: List[str]) -> bool:
+    """True when the message phrases a preference the vocabulary did not pick up"""
+    return not preferences and bool(PREFERENCE_CUES.search(user_input))
+
+
+def parse_turn_analysis(content: str) -> TurnAnalysis:
+    """Validate a structured-output response; raises pydantic.ValidationError on bad JSON"""
+    analysis = TurnAnalysis.model_validate_json(content)
+    analysis.source = "llm"
+    return analysis
@@ -7,7 +7,6 @@ import sys; sys.path.insert(0, './src')
 import sys
 from pathlib import Path
 import streamlit as st
-import pandas as pd
 import os
 import asyncio
 from datetime import datetime
@@ -19,7 +18,7 @@ import re
 import time
 
 from src.agent.agent import RestaurantAgent
-from src.utils.data_utils import load_health_data, update_health_data
+from src.utils.data_utils import get_user_health_data, update_health_data
 from src.utils.constants import HEALTH_REPORT_FORMAT, HEALTH_REPORT_TIPS, CHAT_INTERFACE_CSS, CHAT_HELP_TEXT
 from src.ui.components.new_user import new_user_workflow
 from src.ui.components.existing_user import existing_user_workflow
@@ -37,8 +36,8 @@ st.set_page_config(
 # Custom CSS for chat interface
 st.markdown(CHAT_INTERFACE_CSS, unsafe_allow_html=True)
 
-def display_chat_message(message, is_user=False):
-    """Display a chat message with appropriate styling"""
+def display_chat_message(message, is_user=False, container=None):
+    """Display a chat message with appropriate styling, optionally into a placeholder container"""
     message_class = "user-message" if is_user else "assistant-message"
     sender = "You" if is_user else "Assistant"
     
@@ -56,7 +55,7 @@ def display_chat_message(message, is_user=False):
     else:
         message_content = str(message)
     
-    st.markdown(f"""
+    (container or st).markdown(f"""
     <div class="{message_class}">
         <div class="message-sender">{sender}</div>
         <div class="message-content">{message_content}</div>
@@ -93,11 +92,8 @@ def home_tab():
 
     # ensure health data is added to agent
     if "health_data" not in st.session_state.agent.conversation_context:
-        health_data = load_health_data()
-        user_data = health_data[health_data['user_id'].astype(str) == str(st.session_state.user_id)]
-        if not user_data.empty:
-            health_data_dict = user_data.iloc[0].to_dict()
-            health_data_dict = {k: v for k, v in health_data_dict.items() if pd.notna(v)}
+        health_data_dict = get_user_health_data(st.session_state.user_id)
+        if health_data_dict is not None:
             st.session_state.agent.conversation_context["health_data"] = health_data_dict
 
     # ensure budget data is added to agent
@@ -196,18 +192,28 @@ def home_tab():
                                     return
 
 
-                            # Get recommendations using handle_input
+                            # Get recommendations using handle_input, streamed for a fast first token
                             response = st.session_state.agent.handle_input(
                                 "recommend dishes",
-                                force_action="recommendations"
+                                force_action="recommendations",
+                                stream=True
                             )
 
                             
                         # Process and display the recommendations
                         if response and response.get("status") == "success":
+                            content = response.get("message", "No recommendations available.")
+                            if response.get("stream") is not None:
+                                # Render the reply as it arrives, code fences are already stripped
+                                placeholder = st.empty()
+                                streamed_text = ""
+                                for chunk in response["stream"]:
+                                    streamed_text += chunk
+                                    display_chat_message(streamed_text, is_user=False, container=placeholder)
+                                content = streamed_text.strip() or "No recommendations available."
                             st.session_state.chat_history.append({
                                 'role': 'assistant',
-                                'content': response.get("message", "No recommendations available.")
+                                'content': content
                             })
                         else:
                             error_msg = response.get("message", "Failed to get recommendations.")
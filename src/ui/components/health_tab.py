@@ -3,9 +3,7 @@ This file contains the health and preferences tab implementation.
 """
 
 import streamlit as st
-import pandas as pd
-from pathlib import Path
-from src.utils.data_utils import load_health_data, update_health_data
+from src.utils.data_utils import get_user_health_data, update_health_data, update_profile_fields
 from src.ui.components.display_info import display_health_info
 
 def health_tab():
@@ -15,9 +13,8 @@ def health_tab():
     # Makes a line separator in app
     st.markdown("---")
 
-    # Load health data at the beginning of the section
-    health_data = load_health_data()
-    user_data = health_data[health_data['user_id'].astype(str) == str(st.session_state.user_id)]
+    # Look up this user's health data at the beginning of the section
+    user_data = get_user_health_data(st.session_state.user_id) or {}
 
     # Initialize session state for edit modes if they don't exist
     if 'edit_health_info' not in st.session_state:
@@ -58,11 +55,6 @@ def health_tab():
 
             if success:
                 st.session_state.edit_health_info = False
-                # Clear the cache to ensure fresh data on next load
-                load_health_data.clear()
-                # Reload health data to update the display
-                health_data = load_health_data()
-                user_data = health_data[health_data['user_id'].astype(str) == str(st.session_state.user_id)]
                 st.success("Health information updated successfully!")
                 st.rerun()
             else:
@@ -102,7 +94,7 @@ def health_tab():
     # Health Info Container
     st.write("Health Information:")
     with st.expander("User General Health Information", expanded=True):
-        if not user_data.empty:
+        if user_data:
             display_health_info(user_data)
         else:
             st.warning("No health data found for this user")
@@ -119,8 +111,8 @@ def health_tab():
                 st.markdown("---")
 
                 # Pre-fill form with existing data if available
-                if not user_data.empty:
-                    user_row = user_data.iloc[0]
+                if user_data:
+                    user_row = user_data
 
                     # Use the same 3-column layout as the display function
                     col1, col2, col3 = st.columns(3)
@@ -129,58 +121,58 @@ def health_tab():
                     with col1:
                         st.subheader("Personal Information")
                         st.session_state.health_age = st.number_input("Age", min_value=0, max_value=120,
-                                                                    value=int(user_row['age']) if not pd.isna(user_row['age']) else 0)
+                                                                    value=int(user_row['age']) if user_row.get('age') is not None else 0)
 
                         st.session_state.health_gender = st.selectbox("Gender",
                                                                     options=["Male", "Female", "Other"],
-                                                                    index=0 if user_row['gender'] == "Male" else
-                                                                    1 if user_row['gender'] == "Female" else 2)
+                                                                    index=0 if str(user_row.get('gender', '')).lower() == "male" else
+                                                                    1 if str(user_row.get('gender', '')).lower() == "female" else 2)
 
                         st.session_state.health_ethnicity = st.text_input("Ethnicity",
-                                                                        value=str(user_row['ethnicity']) if not pd.isna(user_row['ethnicity']) else "")
+                                                                        value=str(user_row['ethnicity']) if user_row.get('ethnicity') is not None else "")
 
                     # Body Metrics
                     with col2:
                         st.subheader("Body Metrics")
                         st.session_state.health_height = st.number_input("Height (cm)", min_value=0.0,
                                                                      max_value=300.0,
-                                                                     value=float(user_row['height']) if not pd.isna(user_row['height']) else 0.0)
+                                                                     value=float(user_row['height']) if user_row.get('height') is not None else 0.0)
 
                         st.session_state.health_weight = st.number_input("Weight (kg)", min_value=0.0,
                                                                      max_value=500.0,
-                                                                     value=float(user_row['weight']) if not pd.isna(user_row['weight']) else 0.0)
+                                                                     value=float(user_row['weight']) if user_row.get('weight') is not None else 0.0)
 
                         st.session_state.health_bmi = st.number_input("BMI", min_value=0.0, max_value=50.0,
-                                                                  value=float(user_row['bmi']) if not pd.isna(user_row['bmi']) else 0.0)
+                                                                  value=float(user_row['bmi']) if user_row.get('bmi') is not None else 0.0)
 
                         st.session_state.health_body_fat_pct = st.number_input("Body Fat %", min_value=0.0,
                                                                            max_value=100.0,
-                                                                           value=float(user_row['body_fat_pct']) if not pd.isna(user_row['body_fat_pct']) else 0.0)
+                                                                           value=float(user_row['body_fat_pct']) if user_row.get('body_fat_pct') is not None else 0.0)
 
                     # Health Conditions
                     with col3:
                         st.subheader("Health Conditions")
                         st.session_state.health_blood_sugar = st.number_input("Blood Sugar (mg/dL)", min_value=0.0,
                                                                           max_value=1000.0,
-                                                                          value=float(user_row['blood_sugar']) if not pd.isna(user_row['blood_sugar']) else 0.0)
+                                                                          value=float(user_row['blood_sugar']) if user_row.get('blood_sugar') is not None else 0.0)
 
                         st.session_state.health_blood_pressure = st.number_input("Blood Pressure (mmHg)",
                                                                              min_value=0.0, max_value=300.0,
-                                                                             value=float(user_row['blood_pressure']) if not pd.isna(user_row['blood_pressure']) else 0.0)
+                                                                             value=float(user_row['blood_pressure']) if user_row.get('blood_pressure') is not None else 0.0)
 
                         st.session_state.health_cholesterol = st.number_input("Cholesterol (mg/dL)", min_value=0.0,
                                                                           max_value=1000.0,
-                                                                          value=float(user_row['cholesterol']) if not pd.isna(user_row['cholesterol']) else 0.0)
+                                                                          value=float(user_row['cholesterol']) if user_row.get('cholesterol') is not None else 0.0)
 
                         # Convert 0/1 to boolean for checkboxes
                         st.session_state.health_diabetes = st.checkbox("Diabetes",
-                                                                   value=bool(user_row['diabetes']) if not pd.isna(user_row['diabetes']) else False)
+                                                                   value=bool(user_row['diabetes']) if user_row.get('diabetes') is not None else False)
 
                         st.session_state.health_hypertension = st.checkbox("Hypertension",
-                                                                       value=bool(user_row['hypertension']) if not pd.isna(user_row['hypertension']) else False)
+                                                                       value=bool(user_row['hypertension']) if user_row.get('hypertension') is not None else False)
 
                         st.session_state.health_heart_disease = st.checkbox("Heart Disease",
-                                                                        value=bool(user_row['heart_disease']) if not pd.isna(user_row['heart_disease']) else False)
+                                                                        value=bool(user_row['heart_disease']) if user_row.get('heart_disease') is not None else False)
 
                 # Form submission buttons
                 col1, col2 = st.columns(2)
@@ -194,7 +186,7 @@ def health_tab():
     with st.expander("User Dietary Information", expanded=True):
         # Allergies Section
         st.subheader("Allergies")
-        current_allergies = user_data['allergies'].iloc[0] if not user_data.empty and 'allergies' in user_data else "None specified"
+        current_allergies = user_data.get('allergies') or "None specified"
         st.write(f"**Current Allergies:** {current_allergies}")
         
         if st.button("Edit Allergies", key="edit_allergies_button"):
@@ -208,31 +200,17 @@ def health_tab():
                 submit_allergies = st.form_submit_button("Save Allergies")
                 
                 if submit_allergies:
-                    # Update health data
-                    health_data = load_health_data()
-                    user_idx = health_data[health_data['user_id'].astype(str) == str(st.session_state.user_id)].index
-                    
-                    if not user_idx.empty:
-                        health_data.loc[user_idx, 'allergies'] = new_allergies
-                        # Use the same path as data_utils.py
-                        cwd = Path.cwd()
-                        data_path = cwd / "src" / "data" / "health_data.csv"
-                        data_path.parent.mkdir(parents=True, exist_ok=True)  # Create directory if it doesn't exist
-                        health_data.to_csv(data_path, index=False)
+                    # Update the single column for this user
+                    if update_profile_fields(st.session_state.user_id, {'allergies': new_allergies}):
                         st.success("Allergies updated successfully!")
                         st.session_state.edit_allergies = False
-                        # Clear the cache to ensure fresh data on next load
-                        load_health_data.clear()
-                        # Reload health data to update the display
-                        health_data = load_health_data()
-                        user_data = health_data[health_data['user_id'].astype(str) == str(st.session_state.user_id)]
                         st.rerun()
 
         st.markdown("---")
 
         # Dietary Restrictions Section
         st.subheader("Dietary Restrictions")
-        current_restrictions = user_data['dietary_restriction'].iloc[0] if not user_data.empty and 'dietary_restriction' in user_data else "None specified"
+        current_restrictions = user_data.get('dietary_restriction') or "None specified"
         st.write(f"**Current Dietary Restrictions:** {current_restrictions}")
         
         if st.button("Edit Dietary Restrictions", key="edit_dietary_restriction_button"):
@@ -246,31 +224,17 @@ def health_tab():
                 submit_restrictions = st.form_submit_button("Save Dietary Restrictions")
                 
                 if submit_restrictions:
-                    # Update health data
-                    health_data = load_health_data()
-                    user_idx = health_data[health_data['user_id'].astype(str) == str(st.session_state.user_id)].index
-                    
-                    if not user_idx.empty:
-                        health_data.loc[user_idx, 'dietary_restriction'] = new_restrictions
-                        # Use the same path as data_utils.py
-                        cwd = Path.cwd()
-                        data_path = cwd / "src" / "data" / "health_data.csv"
-                        data_path.parent.mkdir(parents=True, exist_ok=True)  # Create directory if it doesn't exist
-                        health_data.to_csv(data_path, index=False)
+                    # Update the single column for this user
+                    if update_profile_fields(st.session_state.user_id, {'dietary_restriction': new_restrictions}):
                         st.success("Dietary restrictions updated successfully!")
                         st.session_state.edit_dietary_restriction = False
-                        # Clear the cache to ensure fresh data on next load
-                        load_health_data.clear()
-                        # Reload health data to update the display
-                        health_data = load_health_data()
-                        user_data = health_data[health_data['user_id'].astype(str) == str(st.session_state.user_id)]
                         st.rerun()
 
         st.markdown("---")
 
         # Dietary Goals Section
         st.subheader("Dietary Goals")
-        current_goals = user_data['dietary_goal'].iloc[0] if not user_data.empty and 'dietary_goal' in user_data else "None specified"
+        current_goals = user_data.get('dietary_goal') or "None specified"
         st.write(f"**Current Dietary Goals:** {current_goals}")
         
         if st.button("Edit Dietary Goals", key="edit_dietary_goal_button"):
@@ -284,22 +248,8 @@ def health_tab():
                 submit_goals = st.form_submit_button("Save Dietary Goals")
                 
                 if submit_goals:
-                    # Update health data
-                    health_data = load_health_data()
-                    user_idx = health_data[health_data['user_id'].astype(str) == str(st.session_state.user_id)].index
-                    
-                    if not user_idx.empty:
-                        health_data.loc[user_idx, 'dietary_goal'] = new_goals
-                        # Use the same path as data_utils.py
-                        cwd = Path.cwd()
-                        data_path = cwd / "src" / "data" / "health_data.csv"
-                        data_path.parent.mkdir(parents=True, exist_ok=True)  # Create directory if it doesn't exist
-                        health_data.to_csv(data_path, index=False)
+                    # Update the single column for this user
+                    if update_profile_fields(st.session_state.user_id, {'dietary_goal': new_goals}):
                         st.success("Dietary goals updated successfully!")
                         st.session_state.edit_dietary_goal = False
-                        # Clear the cache to ensure fresh data on next load
-                        load_health_data.clear()
-                        # Reload health data to update the display
-                        health_data = load_health_data()
-                        user_data = health_data[health_data['user_id'].astype(str) == str(st.session_state.user_id)]
                         st.rerun() 
\ No newline at end of file
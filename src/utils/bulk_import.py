@@ -0,0 +1,220 @@
+"""
+This file contains the bulk health-report importer used to onboard clinic partners.
+
+Usage:
+    python -m src.utils.bulk_import path/to/reports/          # directory of .txt reports
+    python -m src.utils.bulk_import reports.zip --errors errors.csv
+"""
+
+import sys
+import time
+import tarfile
+import zipfile
+import argparse
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.utils.constants import HEALTH_REPORT_FIELDS
+from src.utils.profile_store import ProfileRepository, get_profile_repository
+
+REPORT_SUFFIXES = (".txt",)
+FIELDS = list(HEALTH_REPORT_FIELDS)
+REPORT_KEY_TO_FIELD = {config['key']: field for field, config in HEALTH_REPORT_FIELDS.items()}
+LINE_PATTERN = r'^[\s\-*#]*([a-z ]+?)\s*:\s*(.*?)\s*$'
+
+logger = logging.getLogger("BulkImport")
+
+
+def read_reports(source) -> Dict[str, str]:
+    """
+    Read every .txt report from a directory, .zip or .tar(.gz) archive.
+
+    Returns {report name: text}. Reports that cannot be decoded are returned
+    with a None value so they show up in the error report.
+    """
+    source = Path(source)
+    raw_reports = {}
+    if source.is_dir():
+        for path in sorted(source.rglob("*")):
+            if path.is_file() and path.suffix.lower() in REPORT_SUFFIXES:
+                raw_reports[str(path.relative_to(source))] = path.read_bytes()
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for name in sorted(archive.namelist()):
+                if name.lower().endswith(REPORT_SUFFIXES):
+                    raw_reports[name] = archive.read(name)
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source) as archive:
+            for member in archive.getmembers():
+                if member.isfile() and member.name.lower().endswith(REPORT_SUFFIXES):
+                    raw_reports[member.name] = archive.extractfile(member).read()
+    else:
+        raise ValueError(f"{source} is not a directory, zip or tar archive")
+
+    reports = {}
+    for name, data in raw_reports.items():
+        try:
+            reports[name] = data.decode("utf-8")
+        except UnicodeDecodeError:
+            reports[name] = None
+    return reports
+
+
+def parse_reports(reports: Dict[str, str]) -> pd.DataFrame:
+    """
+    Parse all reports into one wide frame of raw string values: one row per report,
+    one column per HEALTH_REPORT_FIELDS field. The last occurrence of a key wins.
+    """
+    names = list(reports)
+    lines = pd.Series([text or "" for text in reports.values()], index=names).str.lower().str.split("\n").explode()
+    lines = lines[lines.str.contains(":", regex=False, na=False)]
+    pairs = lines.str.extract(LINE_PATTERN)
+    pairs.columns = ["key", "value"]
+    pairs["field"] = pairs["key"].map(REPORT_KEY_TO_FIELD)
+    pairs = pairs.dropna(subset=["field"])
+    pairs["report"] = pairs.index
+    pairs = pairs.drop_duplicates(subset=["report", "field"], keep="last")
+    wide = pairs.pivot(index="report", columns="field", values="value")
+    # Object dtype throughout, so fields absent from every report still take string methods
+    return wide.reindex(index=names, columns=FIELDS).astype(object)
+
+
+def _convert_column(raw: pd.Series, value_type) -> Tuple[pd.Series, pd.Series]:
+    """Convert a raw column to `value_type`, returning (values, conversion succeeded)"""
+    if value_type is int:
+        parsed = raw.str.fullmatch(r"[+-]?\d+", na=False).astype(bool)
+        values = pd.to_numeric(raw.where(parsed), errors="coerce")
+        return values, parsed
+    if value_type is float:
+        values = pd.to_numeric(raw, errors="coerce")
+        return values, values.notna()
+    return raw, raw.notna()
+
+
+def _rule_mask(values: pd.Series, config: Dict) -> pd.Series:
+    """Vectorized equivalent of data_utils.is_valid_health_value for one column"""
+    valid = pd.Series(True, index=values.index)
+    if 'choices' in config:
+        valid &= values.isin(config['choices'])
+    if config.get('non_empty'):
+        valid &= values.fillna("").astype(str).str.strip().ne("")
+    if 'min' in config:
+        valid &= values.gt(config['min']) if config.get('min_exclusive') else values.ge(config['min'])
+    if 'max' in config:
+        valid &= values.le(config['max'])
+    return valid.astype("boolean").fillna(False).astype(bool)
+
+
+def validate_reports(wide: pd.DataFrame):
+    """
+    Validate every field column at once with the HEALTH_REPORT_FIELDS rules.
+
+    Returns (profiles, errors): profiles maps accepted reports to their cleaned
+    values (invalid optional fields dropped, like the single-report parser);
+    errors maps reports to their problems. A missing or invalid required field
+    rejects the whole report.
+    """
+    errors = {name: [] for name in wide.index}
+    rejected = pd.Series(False, index=wide.index)
+    cleaned = {}
+
+    for field, config in HEALTH_REPORT_FIELDS.items():
+        raw = wide[field]
+        present = raw.notna()
+        values, converted = _convert_column(raw, config['type'])
+        valid = present & converted & _rule_mask(values, config)
+        invalid = present & ~valid
+
+        for name in invalid[invalid].index:
+            errors[name].append(f"{field}: {config['error_msg']} (got '{raw[name]}')")
+        if config['required']:
+            for name in present[~present].index:
+                errors[name].append(f"Missing required field: {field}")
+            rejected |= ~valid
+        cleaned[field] = values.where(valid)
+
+    profiles = {}
+    frame = pd.DataFrame(cleaned, index=wide.index)
+    for name, row in zip(frame.index[~rejected.values], frame[~rejected.values].to_dict(orient="records")):
+        profile = {}
+        for field, value in row.items():
+            if value is None or (isinstance(value, float) and np.isnan(value)):
+                continue
+            value_type = HEALTH_REPORT_FIELDS[field]['type']
+            profile[field] = value_type(value) if value_type is not str else value
+        profiles[name] = profile
+    return profiles, {name: problems for name, problems in errors.items() if problems}
+
+
+def bulk_import_reports(source, repository: Optional[ProfileRepository] = None, dry_run: bool = False) -> Dict:
+    """
+    Import a directory or archive of health reports as new users.
+
+    All accepted reports are committed in one transaction with IDs taken from
+    the repository's monotonic counter. Returns a summary with the new user IDs
+    per report, per-report errors and the throughput.
+    """
+    start = time.perf_counter()
+    reports = read_reports(source)
+    undecodable = {name: ["File is not valid UTF-8 text"] for name, text in reports.items() if text is None}
+    empty = {name: ["Empty health report"] for name, text in reports.items() if text is not None and not text.strip()}
+    parseable = {name: text for name, text in reports.items() if name not in undecodable and name not in empty}
+
+    profiles, errors = validate_reports(parse_reports(parseable)) if parseable else ({}, {})
+    errors.update(undecodable)
+    errors.update(empty)
+
+    user_ids = {}
+    if profiles and not dry_run:
+        repository = repository or get_profile_repository()
+        names = list(profiles)
+        user_ids = dict(zip(names, repository.create_many([profiles[name] for name in names])))
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "reports": len(reports),
+        "imported": len(user_ids) if not dry_run else 0,
+        "valid": len(profiles),
+        "rejected": len(reports) - len(profiles),
+        "user_ids": user_ids,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "reports_per_second": round(len(reports) / elapsed, 1) if elapsed > 0 else None,
+    }
+    logger.info(
+        f"Bulk import: {summary['valid']}/{summary['reports']} reports valid, "
+        f"{summary['imported']} imported in {elapsed:.2f}s ({summary['reports_per_second']} reports/s)"
+    )
+    return summary
+
+
+def write_error_report(errors: Dict[str, List[str]], path) -> int:
+    """Write one row per (report, problem) to a CSV file"""
+    rows = [{"report": name, "error": problem} for name, problems in errors.items() for problem in problems]
+    pd.DataFrame(rows, columns=["report", "error"]).to_csv(path, index=False)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Import a directory or archive of health reports as new users")
+    parser.add_argument("source", help="Directory, .zip or .tar(.gz) of .txt health reports")
+    parser.add_argument("--errors", help="Write per-report errors to this CSV file")
+    parser.add_argument("--dry-run", action="store_true", help="Validate only, do not create users")
+    args = parser.parse_args()
+
+    result = bulk_import_reports(args.source, dry_run=args.dry_run)
+    print(f"Reports: {result['reports']}  valid: {result['valid']}  imported: {result['imported']}  "
+          f"rejected: {result['rejected']}")
+    print(f"Throughput: {result['reports_per_second']} reports/s ({result['seconds']}s)")
+    if args.errors:
+        count = write_error_report(result["errors"], args.errors)
+        print(f"Wrote {count} error(s) to {args.errors}")
+    elif result["errors"]:
+        for name, problems in list(result["errors"].items())[:20]:
+            print(f"  {name}: {'; '.join(problems)}")
+    sys.exit(0 if result["valid"] or not result["reports"] else 1)
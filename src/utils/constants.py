@@ -141,4 +141,39 @@ CHAT_HELP_TEXT = """### How to Use This Assistant
 6. **Chit-Chat**: You can also send messages like "Hi" or other random messages you want to chit-chat with the agent.
 
 Have a nice play with your personal restaurant recommendation helper!
-"""
\ No newline at end of file
+"""
+
+# Health report fields: report key, value type and validation rules.
+# Shared by the single-report parser and the bulk importer.
+HEALTH_REPORT_FIELDS = {
+    'age': {'key': 'age', 'type': int, 'required': True, 'min': 0, 'max': 120,
+            'error_msg': "Age must be between 0 and 120"},
+    'gender': {'key': 'gender', 'type': str, 'required': True, 'choices': ['male', 'female', 'other'],
+               'error_msg': "Gender must be Male, Female, or Other"},
+    'ethnicity': {'key': 'ethnicity', 'type': str, 'required': False, 'non_empty': True,
+                  'error_msg': "Ethnicity cannot be empty"},
+    'height': {'key': 'height', 'type': float, 'required': False, 'min': 0, 'min_exclusive': True, 'max': 300,
+               'error_msg': "Height must be between 0 and 300 cm"},
+    'weight': {'key': 'weight', 'type': float, 'required': False, 'min': 0, 'min_exclusive': True, 'max': 500,
+               'error_msg': "Weight must be between 0 and 500 kg"},
+    'bmi': {'key': 'bmi', 'type': float, 'required': False, 'min': 10, 'max': 50,
+            'error_msg': "BMI must be between 10 and 50"},
+    'blood_sugar': {'key': 'blood sugar', 'type': float, 'required': False, 'min': 0, 'max': 1000,
+                    'error_msg': "Blood sugar must be between 0 and 1000 mg/dL"},
+    'blood_pressure': {'key': 'blood pressure', 'type': float, 'required': False, 'min': 0, 'max': 300,
+                       'error_msg': "Blood pressure must be between 0 and 300 mmHg"},
+    'cholesterol': {'key': 'cholesterol', 'type': float, 'required': False, 'min': 0, 'max': 1000,
+                    'error_msg': "Cholesterol must be between 0 and 1000 mg/dL"},
+    'body_fat_pct': {'key': 'body fat', 'type': float, 'required': False, 'min': 0, 'max': 100,
+                     'error_msg': "Body fat percentage must be between 0 and 100"},
+    'diabetes': {'key': 'diabetes', 'type': int, 'required': False, 'choices': [0, 1],
+                 'error_msg': "Diabetes must be 0 (No) or 1 (Yes)"},
+    'hypertension': {'key': 'hypertension', 'type': int, 'required': False, 'choices': [0, 1],
+                     'error_msg': "Hypertension must be 0 (No) or 1 (Yes)"},
+    'heart_disease': {'key': 'heart disease', 'type': int, 'required': False, 'choices': [0, 1],
+                      'error_msg': "Heart disease must be 0 (No) or 1 (Yes)"},
+    'dietary_restriction': {'key': 'dietary restriction', 'type': str, 'required': False,
+                            'error_msg': "Invalid dietary restriction format"},
+    'dietary_goal': {'key': 'dietary goal', 'type': str, 'required': False,
+                     'error_msg': "Invalid dietary goal format"},
+}
@@ -0,0 +1,73 @@
+"""
+This file contains the in-memory user profile cache used by the UI.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from src.utils.profile_store import ProfileRepository, get_profile_repository
+
+DEFAULT_MAX_PROFILES = int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "10000"))
+
+
+class ProfileCache:
+    """
+    Hash index from user_id to a ready-made `health_data` dict.
+
+    Misses are point lookups on the repository's primary key, so a lookup costs
+    the same whether the table holds ten users or millions. Writers call
+    `invalidate(user_id)` to drop just that user's entry.
+    """
+    def __init__(self, repository: Optional[ProfileRepository] = None, max_entries: int = DEFAULT_MAX_PROFILES):
+        self.repository = repository or get_profile_repository()
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(user_id) -> str:
+        return str(user_id).strip()
+
+    def get(self, user_id) -> Optional[Dict]:
+        """Return a copy of the user's health data (empty fields removed), or None if unknown"""
+        key = self._key(user_id)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return dict(self._entries[key])
+
+        profile = self.repository.get(key)
+        if profile is None:
+            return None
+        with self._lock:
+            self._entries[key] = profile
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return dict(profile)
+
+    def exists(self, user_id) -> bool:
+        return self.get(user_id) is not None
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(self._key(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_profile_cache: Optional[ProfileCache] = None
+_profile_cache_lock = threading.Lock()
+
+
+def get_profile_cache() -> ProfileCache:
+    """Return the process-wide profile cache, creating it on first use"""
+    global _profile_cache
+    with _profile_cache_lock:
+        if _profile_cache is None:
+            _profile_cache = ProfileCache()
+        return _profile_cache
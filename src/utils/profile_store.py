@@ -0,0 +1,241 @@
+"""
+This file contains the SQLite-backed user profile (health data) repository.
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DEFAULT_DB_PATH = Path(os.getenv("PROFILE_DB_PATH", DATA_DIR / "health_data.sqlite"))
+LEGACY_CSV_PATH = DATA_DIR / "health_data.csv"
+
+# Profile columns and their SQLite types, in CSV order
+PROFILE_COLUMNS = {
+    'user_id': 'TEXT',
+    'age': 'INTEGER',
+    'gender': 'TEXT',
+    'ethnicity': 'TEXT',
+    'height': 'REAL',
+    'weight': 'REAL',
+    'bmi': 'REAL',
+    'blood_sugar': 'REAL',
+    'blood_pressure': 'REAL',
+    'cholesterol': 'REAL',
+    'body_fat_pct': 'REAL',
+    'diabetes': 'INTEGER',
+    'hypertension': 'INTEGER',
+    'heart_disease': 'INTEGER',
+    'dietary_restriction': 'TEXT',
+    'dietary_goal': 'TEXT',
+    'allergies': 'TEXT',
+}
+FIELD_COLUMNS = [column for column in PROFILE_COLUMNS if column != 'user_id']
+
+
+def _clean(value):
+    """Convert pandas/NumPy scalars and NaN to plain Python values for SQLite"""
+    if value is None:
+        return None
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return value.item() if hasattr(value, 'item') else value
+
+
+class ProfileRepository:
+    """
+    User profiles stored one row per user in an indexed SQLite table.
+
+    Writes touch a single row: `upsert` sets the given columns of one profile and
+    `update_fields` changes individual columns. The database runs in WAL mode
+    so readers in other sessions are not blocked by a writer.
+    """
+    def __init__(self, db_path: Path = DEFAULT_DB_PATH, legacy_csv: Optional[Path] = LEGACY_CSV_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=10)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns_sql = ", ".join(
+            f"{name} {sql_type} PRIMARY KEY" if name == 'user_id' else f"{name} {sql_type}"
+            for name, sql_type in PROFILE_COLUMNS.items()
+        )
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS profiles ({columns_sql})")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.commit()
+
+        # One-shot migration from the CSV file the app used to rewrite on every edit
+        if legacy_csv is not None and Path(legacy_csv).exists() and self.count() == 0:
+            imported = self.import_csv(legacy_csv)
+            self.logger.info(f"Imported {imported} profiles from {legacy_csv}")
+
+    @staticmethod
+    def _check_columns(columns: Iterable[str]):
+        unknown = [column for column in columns if column not in FIELD_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown profile fields: {', '.join(unknown)}")
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    def exists(self, user_id) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM profiles WHERE user_id = ?", (str(user_id),)).fetchone()
+        return row is not None
+
+    def get(self, user_id) -> Optional[Dict]:
+        """Return one profile as a dict without empty fields, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM profiles WHERE user_id = ?", (str(user_id),)).fetchone()
+        if row is None:
+            return None
+        return {key: row[key] for key in row.keys() if row[key] is not None}
+
+    def _allocate_ids(self, count: int) -> List[str]:
+        """
+        Reserve `count` user IDs from the monotonic counter. Must run inside a write transaction.
+
+        The counter is seeded from the highest existing ID once; after that
+        allocation never scans the profiles table.
+        """
+        row = self._conn.execute("SELECT value FROM counters WHERE name = 'user_id'").fetchone()
+        if row is None:
+            last_id = self._conn.execute("SELECT MAX(CAST(user_id AS INTEGER)) FROM profiles").fetchone()[0] or 0
+        else:
+            last_id = row[0]
+        self._conn.execute(
+            "INSERT INTO counters (name, value) VALUES ('user_id', ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+            (last_id + count,)
+        )
+        return [str(last_id + offset) for offset in range(1, count + 1)]
+
+    def _advance_counter(self, user_ids: Iterable) -> None:
+        """
+        Move the ID counter past explicitly inserted numeric IDs. Must run inside
+        the inserting transaction; without a counter row there is nothing to
+        advance, since it is seeded from the table on first allocation.
+        """
+        numeric_ids = [int(user_id) for user_id in map(str, user_ids) if user_id.isdigit()]
+        if numeric_ids:
+            self._conn.execute("UPDATE counters SET value = MAX(value, ?) WHERE name = 'user_id'",
+                               (max(numeric_ids),))
+
+    def next_user_id(self) -> str:
+        """The ID the next created profile will get"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM counters WHERE name = 'user_id'").fetchone()
+            last_id = row[0] if row else self._conn.execute(
+                "SELECT MAX(CAST(user_id AS INTEGER)) FROM profiles").fetchone()[0]
+        return str((last_id or 0) + 1)
+
+    def upsert(self, user_id, profile: Dict) -> str:
+        """Insert a profile or update the given columns of an existing one"""
+        fields = {key: _clean(value) for key, value in profile.items() if key in FIELD_COLUMNS}
+        columns = ['user_id'] + list(fields)
+        placeholders = ", ".join("?" for _ in columns)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in fields)
+        sql = f"INSERT INTO profiles ({', '.join(columns)}) VALUES ({placeholders})"
+        sql += f" ON CONFLICT(user_id) DO UPDATE SET {updates}" if updates else " ON CONFLICT(user_id) DO NOTHING"
+        with self._lock, self._conn:
+            self._conn.execute(sql, [str(user_id)] + list(fields.values()))
+            self._advance_counter([user_id])
+        return str(user_id)
+
+    def create(self, profile: Dict) -> str:
+        """Insert a new profile under the next free user ID and return that ID"""
+        return self.create_many([profile])[0]
+
+    def create_many(self, profiles: List[Dict]) -> List[str]:
+        """Insert new profiles with freshly allocated IDs in a single transaction"""
+        if not profiles:
+            return []
+        columns = list(PROFILE_COLUMNS)
+        sql = f"INSERT INTO profiles ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+        with self._lock, self._conn:
+            # Take the write lock before allocating so concurrent registrations cannot collide
+            self._conn.execute("BEGIN IMMEDIATE")
+            user_ids = self._allocate_ids(len(profiles))
+            self._conn.executemany(sql, [
+                [user_id] + [_clean(profile.get(column)) for column in FIELD_COLUMNS]
+                for user_id, profile in zip(user_ids, profiles)
+            ])
+        return user_ids
+
+    def update_fields(self, user_id, fields: Dict) -> bool:
+        """Update individual columns of an existing profile; False if the user does not exist"""
+        if not fields:
+            return self.exists(user_id)
+        self._check_columns(fields)
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"UPDATE profiles SET {assignments} WHERE user_id = ?",
+                [_clean(value) for value in fields.values()] + [str(user_id)]
+            )
+        return cursor.rowcount > 0
+
+    def delete(self, user_id) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM profiles WHERE user_id = ?", (str(user_id),))
+        return cursor.rowcount > 0
+
+    def upsert_many(self, profiles: List[Dict]) -> int:
+        """Upsert full profile rows (each with a user_id) in one transaction"""
+        columns = list(PROFILE_COLUMNS)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in FIELD_COLUMNS)
+        sql = (f"INSERT INTO profiles ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+               f"ON CONFLICT(user_id) DO UPDATE SET {updates}")
+        rows = [
+            [str(profile['user_id'])] + [_clean(profile.get(column)) for column in FIELD_COLUMNS]
+            for profile in profiles
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(sql, rows)
+            self._advance_counter(row[0] for row in rows)
+        return len(rows)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """All profiles as a DataFrame with the CSV column layout"""
+        with self._lock:
+            df = pd.read_sql_query("SELECT * FROM profiles ORDER BY CAST(user_id AS INTEGER), user_id", self._conn)
+        return df.reindex(columns=list(PROFILE_COLUMNS))
+
+    def import_csv(self, csv_path: Path) -> int:
+        """Load every row of a health data CSV into the table in one transaction"""
+        df = pd.read_csv(csv_path, dtype={'user_id': str})
+        df = df.reindex(columns=list(PROFILE_COLUMNS))
+        df = df[df['user_id'].notna()]
+        return self.upsert_many(df.to_dict(orient='records'))
+
+    def export_csv(self, csv_path: Path) -> int:
+        """Write all profiles to a CSV file with the original column layout"""
+        df = self.to_dataframe()
+        Path(csv_path).parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(csv_path, index=False)
+        return len(df)
+
+
+_repository: Optional[ProfileRepository] = None
+_repository_lock = threading.Lock()
+
+
+def get_profile_repository() -> ProfileRepository:
+    """Return the process-wide profile repository, creating it on first use"""
+    global _repository
+    with _repository_lock:
+        if _repository is None:
+            _repository = ProfileRepository()
+        return _repository